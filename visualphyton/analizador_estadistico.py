@@ -1,15 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 import pandas as pd
+from pandas.api.types import union_categoricals
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError: # Opcional: sin pyarrow la caché columnar de datos queda desactivada
+    pa = feather = None
 import numpy as np
+from scipy import stats
 import threading
 import sys
-from io import StringIO
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
+import hashlib
+import pickle
+from collections import OrderedDict
 from datetime import datetime
 import tkinter.font as tkFont
 from PIL import Image, ImageTk, ImageDraw
@@ -21,36 +33,813 @@ import webbrowser
 # Para que el código sea autoejecutable, lo incluyo aquí.
 # En un proyecto real, estaría en un archivo separado.
 
+class CargadorCSVPorBloques:
+    """
+    Lee archivos CSV grandes por bloques, reduciendo los tipos de datos
+    inferidos a partir del primer bloque.
+    """
+    def __init__(self, file_path, chunksize=100_000, max_categorias=1000, max_ratio_categorias=0.5, limite_memoria_mb=None, cache=None):
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.max_categorias = max_categorias
+        self.max_ratio_categorias = max_ratio_categorias
+        self.limite_memoria_mb = limite_memoria_mb # None = sin límite de memoria
+        self.dtypes = None # Se infieren con el primer bloque
+        self.filas_leidas = 0
+        self.truncado = False # True si el límite de memoria detuvo la carga
+        self.cache = cache # CacheColumnar, o None para leer siempre el CSV
+        self.desde_cache = False # True si la última carga se mapeó desde la caché
+        self.huella = None # Huella del contenido guardada junto a la copia en caché
+
+    def _inferir_dtypes(self, bloque):
+        """Elige el tipo más pequeño para cada columna (float32, int8/16/32, category)."""
+        dtypes = {}
+        for col in bloque.columns:
+            serie = bloque[col]
+            if pd.api.types.is_float_dtype(serie):
+                dtypes[col] = np.dtype(np.float32)
+            elif pd.api.types.is_integer_dtype(serie):
+                dtypes[col] = pd.to_numeric(serie, downcast='integer').dtype
+            elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+                n_unicos = serie.nunique(dropna=True)
+                if n_unicos <= self.max_categorias and n_unicos <= self.max_ratio_categorias * max(len(serie), 1):
+                    dtypes[col] = 'category'
+        return dtypes
+
+    def _aplicar_dtypes(self, bloque):
+        """Convierte un bloque a los tipos inferidos, ampliándolos si los valores no caben."""
+        for col, dtype in self.dtypes.items():
+            if col not in bloque.columns:
+                continue
+            serie = bloque[col]
+            if dtype == 'category':
+                if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+                    # Bloque con valores solo numéricos: las categorías se guardan como texto
+                    serie = serie.map(str, na_action='ignore')
+                bloque[col] = serie.astype('category')
+            elif not pd.api.types.is_numeric_dtype(serie):
+                continue
+            elif np.issubdtype(dtype, np.integer) and pd.api.types.is_integer_dtype(serie):
+                info = np.iinfo(dtype)
+                if len(serie) and (serie.min() < info.min or serie.max() > info.max):
+                    bloque[col] = pd.to_numeric(serie, downcast='integer')
+                else:
+                    bloque[col] = serie.astype(dtype)
+            else:
+                bloque[col] = pd.to_numeric(serie, downcast='float')
+        return bloque
+
+    def iter_bloques(self, progress_callback=None, cancel_event=None):
+        """Genera bloques tipados e informa el progreso (0-100) según los bytes leídos."""
+        tamano = os.path.getsize(self.file_path) or 1
+        self.filas_leidas = 0
+        with open(self.file_path, 'rb') as f:
+            with pd.read_csv(f, chunksize=self.chunksize) as lector:
+                for bloque in lector:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    if self.dtypes is None:
+                        self.dtypes = self._inferir_dtypes(bloque)
+                    bloque = self._aplicar_dtypes(bloque)
+                    self.filas_leidas += len(bloque)
+                    if progress_callback:
+                        progress_callback(min(100.0, 100.0 * f.tell() / tamano))
+                    yield bloque
+
+    def cargar(self, progress_callback=None, cancel_event=None):
+        """Carga el archivo en un único DataFrame compacto, respetando el límite de memoria."""
+        if self.cache is not None:
+            guardado = self.cache.leer(self.file_path)
+            if guardado is not None:
+                # Mapeado en memoria: el límite no aplica, las páginas se leen al usar cada columna
+                df, entrada = guardado
+                self.desde_cache, self.huella, self.truncado = True, entrada.get('huella'), False
+                self.filas_leidas = len(df)
+                if progress_callback:
+                    progress_callback(100.0)
+                return df
+        self.desde_cache = False
+        limite = self.limite_memoria_mb * 1024 ** 2 if self.limite_memoria_mb else None
+        self.truncado = False
+        bloques = []
+        memoria = 0
+        iterador = self.iter_bloques(progress_callback, cancel_event)
+        try:
+            for bloque in iterador:
+                bloques.append(bloque)
+                memoria += bloque.memory_usage(deep=True).sum()
+                if limite is not None and memoria >= limite:
+                    self.truncado = True
+                    break
+        finally:
+            iterador.close()
+
+        if not bloques:
+            raise ValueError("El archivo CSV está vacío o no contiene datos válidos.")
+        # Unificar categorías para que pd.concat conserve el tipo 'category'
+        for col, dtype in self.dtypes.items():
+            if dtype != 'category' or not all(isinstance(b[col].dtype, pd.CategoricalDtype) for b in bloques):
+                continue
+            categorias = union_categoricals([b[col] for b in bloques]).categories
+            for b in bloques:
+                b[col] = b[col].cat.set_categories(categorias)
+        df = pd.concat(bloques, ignore_index=True)
+        cancelado = cancel_event is not None and cancel_event.is_set()
+        if self.cache is not None and not self.truncado and not cancelado:
+            # Solo se guardan cargas completas; se devuelve ya la copia mapeada
+            self.huella = CacheResultados.huella(df)
+            if self.cache.escribir(self.file_path, df, huella=self.huella):
+                guardado = self.cache.leer(self.file_path)
+                if guardado is not None:
+                    df = guardado[0]
+        return df
+
+class CacheColumnar:
+    """
+    Copia columnar en disco de los conjuntos de datos cargados. La primera
+    carga completa de un archivo se escribe en Feather (Arrow IPC) sin
+    compresión y en un único lote, y un manifiesto JSON la asocia con la ruta,
+    la fecha de modificación y el tamaño del original. Las cargas siguientes
+    mapean ese archivo en memoria: las columnas numéricas llegan sin copia y
+    solo se leen del disco las páginas de las columnas que un análisis usa.
+    Las entradas se separan por una etiqueta `formato` que indica cómo tipó el
+    cargador el DataFrame, para que las aplicaciones que comparten el directorio
+    nunca lean copias con tipos distintos a los suyos.
+    """
+    def __init__(self, directorio, formato):
+        self.directorio = directorio
+        self.formato = formato # Manifiesto y nombres de archivo propios de cada formato
+        self._lock = threading.Lock()
+
+    def _ruta_manifiesto(self):
+        return os.path.join(self.directorio, f"manifiesto_{self.formato}.json")
+
+    def _leer_manifiesto(self):
+        try:
+            with open(self._ruta_manifiesto(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_manifiesto(self, manifiesto):
+        # Se escribe en un temporal y se renombra: un corte nunca deja el manifiesto a medias
+        temporal = self._ruta_manifiesto() + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=1)
+        os.replace(temporal, self._ruta_manifiesto())
+
+    @staticmethod
+    def _firma(ruta):
+        info = os.stat(ruta)
+        return {'mtime_ns': info.st_mtime_ns, 'tamano': info.st_size}
+
+    def entrada(self, ruta):
+        """Entrada del manifiesto de `ruta` si su caché sigue vigente (misma fecha y tamaño), o None."""
+        if feather is None:
+            return None
+        ruta = os.path.abspath(ruta)
+        try:
+            firma = self._firma(ruta)
+        except OSError:
+            return None
+        with self._lock:
+            entrada = self._leer_manifiesto().get(ruta)
+        if entrada is None or any(entrada.get(k) != v for k, v in firma.items()):
+            return None
+        if not os.path.exists(os.path.join(self.directorio, entrada['archivo'])):
+            return None
+        return entrada
+
+    @staticmethod
+    def _tabla_arrow(df):
+        """Tabla Arrow de un solo bloque por columna; las columnas numéricas conservan NaN como valor para leerse sin copia."""
+        arrays = []
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'iuf':
+                arrays.append(pa.array(serie.to_numpy()))
+            else:
+                arrays.append(pa.array(serie, from_pandas=True))
+        return pa.table(arrays, names=list(df.columns))
+
+    def escribir(self, ruta, df, **metadatos):
+        """Guarda `df` como contenido de `ruta`. Devuelve False si el DataFrame no se puede almacenar."""
+        if feather is None:
+            return False
+        if not all(isinstance(col, str) for col in df.columns):
+            return False # Feather exige nombres de columna de texto; otros no volverían iguales
+        ruta = os.path.abspath(ruta)
+        try:
+            firma = self._firma(ruta)
+            archivo = hashlib.sha1(repr((self.formato, ruta, firma['mtime_ns'], firma['tamano'])).encode()).hexdigest() + ".feather"
+            os.makedirs(self.directorio, exist_ok=True)
+            destino = os.path.join(self.directorio, archivo)
+            # Un único lote: una columna troceada no pasa a pandas sin copiarse
+            feather.write_feather(self._tabla_arrow(df), destino + ".tmp", compression='uncompressed', chunksize=max(len(df), 1))
+            os.replace(destino + ".tmp", destino)
+            with self._lock:
+                manifiesto = self._leer_manifiesto()
+                anterior = manifiesto.get(ruta)
+                manifiesto[ruta] = dict(firma, archivo=archivo, filas=len(df), columnas=list(df.columns), **metadatos)
+                self._guardar_manifiesto(manifiesto)
+            if anterior and anterior.get('archivo') != archivo:
+                try:
+                    os.remove(os.path.join(self.directorio, anterior['archivo'])) # Caché de una versión anterior del archivo
+                except OSError:
+                    pass # Aún mapeado por un DataFrame abierto (Windows); se limpiará en otra ejecución
+            return True
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            return False
+
+    def leer(self, ruta, columnas=None):
+        """
+        Mapea en memoria el DataFrame guardado de `ruta`, o solo `columnas` (se omiten las que no existan).
+        Devuelve (DataFrame, entrada del manifiesto), o None si no hay caché vigente.
+        """
+        entrada = self.entrada(ruta)
+        if entrada is None:
+            return None
+        if columnas is not None:
+            columnas = [col for col in columnas if col in entrada['columnas']]
+        try:
+            tabla = feather.read_table(os.path.join(self.directorio, entrada['archivo']), columns=columnas, memory_map=True)
+            return tabla.to_pandas(split_blocks=True), entrada
+        except (OSError, pa.ArrowException):
+            return None # Caché ilegible: se vuelve a leer el original
+
+class SketchCuantiles:
+    """
+    Sketch de cuantiles aproximados al estilo KLL. Usa memoria acotada por k
+    y dos sketches de bloques distintos se pueden combinar.
+    """
+    def __init__(self, k=400):
+        self.k = k
+        self.niveles = [np.empty(0)] # Los elementos del nivel h pesan 2**h
+        self.n = 0
+        self._rng = np.random.default_rng()
+
+    def _capacidad(self, nivel):
+        profundidad = len(self.niveles) - nivel - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** profundidad)))
+
+    def _compactar(self):
+        """Compacta los niveles llenos: ordena y promueve uno de cada dos elementos."""
+        nivel = 0
+        while nivel < len(self.niveles):
+            items = self.niveles[nivel]
+            if items.size <= self._capacidad(nivel):
+                nivel += 1
+                continue
+            if nivel + 1 == len(self.niveles):
+                self.niveles.append(np.empty(0))
+            items = np.sort(items)
+            sobrante = items.size % 2 # Con tamaño impar, un elemento se queda en su nivel
+            promovidos = items[self._rng.integers(2):items.size - sobrante:2]
+            self.niveles[nivel] = items[items.size - sobrante:]
+            self.niveles[nivel + 1] = np.concatenate([self.niveles[nivel + 1], promovidos])
+            nivel = 0 # Al crecer la altura cambian las capacidades de los niveles inferiores
+
+    def actualizar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if valores.size == 0:
+            return
+        self.n += valores.size
+        self.niveles[0] = np.concatenate([self.niveles[0], valores])
+        self._compactar()
+
+    def combinar(self, otro):
+        for nivel, items in enumerate(otro.niveles):
+            if nivel == len(self.niveles):
+                self.niveles.append(np.empty(0))
+            self.niveles[nivel] = np.concatenate([self.niveles[nivel], items])
+        self.n += otro.n
+        self._compactar()
+        return self
+
+    def cuantiles(self, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if len(self.niveles) == 1:
+            # Sin compactaciones el sketch es exacto: interpolar igual que pandas
+            return np.quantile(self.niveles[0], qs)
+        items = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(l.size, 2.0 ** h) for h, l in enumerate(self.niveles)])
+        orden = np.argsort(items)
+        acumulado = np.cumsum(pesos[orden])
+        idx = np.searchsorted(acumulado, qs * acumulado[-1], side='left')
+        return items[orden][np.minimum(idx, items.size - 1)]
+
+class AcumuladorMomentos:
+    """
+    Acumula en una sola pasada count, media, M2, M3, M4, mínimo y máximo por
+    columna, más un sketch de cuantiles. Los estados parciales de distintos
+    bloques se combinan con las fórmulas de Chan/Pébay.
+    """
+    def __init__(self, columnas, k_sketch=400):
+        self.columnas = list(columnas)
+        m = len(self.columnas)
+        self.n = np.zeros(m)
+        self.media = np.zeros(m)
+        self.m2 = np.zeros(m)
+        self.m3 = np.zeros(m)
+        self.m4 = np.zeros(m)
+        self.minimo = np.full(m, np.inf)
+        self.maximo = np.full(m, -np.inf)
+        self.sketches = [SketchCuantiles(k_sketch) for _ in self.columnas]
+
+    def actualizar(self, bloque):
+        """Incorpora un bloque (DataFrame o matriz filas x columnas)."""
+        if isinstance(bloque, pd.DataFrame):
+            x = bloque[self.columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            x = np.asarray(bloque, dtype=np.float64)
+        validos = ~np.isnan(x)
+        n_b = validos.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_b = np.where(validos, x, 0.0).sum(axis=0) / n_b
+            d = np.where(validos, x - media_b, 0.0)
+        d2 = d * d
+        self._combinar_momentos(n_b, media_b, d2.sum(axis=0), (d2 * d).sum(axis=0), (d2 * d2).sum(axis=0))
+        if x.shape[0]:
+            self.minimo = np.minimum(self.minimo, np.where(validos, x, np.inf).min(axis=0))
+            self.maximo = np.maximum(self.maximo, np.where(validos, x, -np.inf).max(axis=0))
+        for j, sketch in enumerate(self.sketches):
+            sketch.actualizar(x[:, j])
+
+    def _combinar_momentos(self, n_b, media_b, m2_b, m3_b, m4_b):
+        n_a, media_a, m2_a, m3_a, m4_a = self.n, self.media, self.m2, self.m3, self.m4
+        n = n_a + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = media_b - media_a
+            media = media_a + delta * n_b / n
+            m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+            m3 = (m3_a + m3_b + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+                  + 3 * delta * (n_a * m2_b - n_b * m2_a) / n)
+            m4 = (m4_a + m4_b + delta ** 4 * n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2) / n ** 3
+                  + 6 * delta ** 2 * (n_a ** 2 * m2_b + n_b ** 2 * m2_a) / n ** 2
+                  + 4 * delta * (n_a * m3_b - n_b * m3_a) / n)
+        # Si uno de los lados está vacío, el resultado es el otro lado tal cual
+        vacio_a, vacio_b = n_a == 0, n_b == 0
+        self.n = n
+        self.media = np.where(vacio_a, media_b, np.where(vacio_b, media_a, media))
+        self.m2 = np.where(vacio_a, m2_b, np.where(vacio_b, m2_a, m2))
+        self.m3 = np.where(vacio_a, m3_b, np.where(vacio_b, m3_a, m3))
+        self.m4 = np.where(vacio_a, m4_b, np.where(vacio_b, m4_a, m4))
+
+    def combinar(self, otro):
+        """Combina el estado parcial de otro acumulador con las mismas columnas."""
+        self._combinar_momentos(otro.n, otro.media, otro.m2, otro.m3, otro.m4)
+        self.minimo = np.minimum(self.minimo, otro.minimo)
+        self.maximo = np.maximum(self.maximo, otro.maximo)
+        for sketch, sketch_otro in zip(self.sketches, otro.sketches):
+            sketch.combinar(sketch_otro)
+        return self
+
+    @classmethod
+    def desde_bloques(cls, bloques, columnas, n_hilos=None):
+        """
+        Procesa los bloques en un pool de hilos (NumPy libera el GIL) y combina
+        los parciales. Solo se mantienen en vuelo 2 bloques por hilo.
+        """
+        n_hilos = n_hilos or os.cpu_count() or 1
+        total = cls(columnas)
+
+        def parcial(bloque):
+            acumulador = cls(columnas)
+            acumulador.actualizar(bloque)
+            return acumulador
+
+        with ThreadPoolExecutor(max_workers=n_hilos) as pool:
+            pendientes = []
+            for bloque in bloques:
+                pendientes.append(pool.submit(parcial, bloque))
+                if len(pendientes) >= 2 * n_hilos:
+                    total.combinar(pendientes.pop(0).result())
+            for futuro in pendientes:
+                total.combinar(futuro.result())
+        return total
+
+    def resumen(self):
+        """Devuelve las estadísticas por columna con las mismas correcciones de sesgo que pandas."""
+        n, m2, m3, m4 = self.n, self.m2, self.m3, self.m4
+        with np.errstate(invalid='ignore', divide='ignore'):
+            varianza = np.where(n > 1, m2 / (n - 1), np.nan)
+            skew = np.where(n > 2, n * np.sqrt(n - 1) / (n - 2) * m3 / m2 ** 1.5, np.nan)
+            kurt = np.where(n > 3, n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2)
+                            - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)), np.nan)
+        # pandas devuelve 0 para columnas constantes
+        skew = np.where((n > 2) & (m2 == 0), 0.0, skew)
+        kurt = np.where((n > 3) & (m2 == 0), 0.0, kurt)
+        cuartiles = np.array([s.cuantiles([0.25, 0.5, 0.75]) for s in self.sketches]).reshape(-1, 3)
+        hay_datos = n > 0
+        return pd.DataFrame({
+            'count': n,
+            'mean': np.where(hay_datos, self.media, np.nan),
+            'std': np.sqrt(varianza),
+            'min': np.where(hay_datos, self.minimo, np.nan),
+            '25%': cuartiles[:, 0],
+            '50%': cuartiles[:, 1],
+            '75%': cuartiles[:, 2],
+            'max': np.where(hay_datos, self.maximo, np.nan),
+            'median': cuartiles[:, 1],
+            'variance': varianza,
+            'skew': skew,
+            'kurtosis': kurt,
+        }, index=self.columnas)
+
+class MotorCorrelacion:
+    """
+    Motor de correlación por bloques. Las columnas se estandarizan una sola vez
+    y la matriz se arma con productos matriciales (BLAS) por teselas repartidas
+    en un pool de hilos. Los valores faltantes se tratan por pares, como en
+    DataFrame.corr().
+    """
+    ELEMENTOS_POR_PASO = 2 ** 20 # Tamaño de los temporales n x columnas de un paso de Spearman por pares
+
+    def __init__(self, df, columnas, tamano_bloque=64, n_hilos=None):
+        self.df = df
+        self.columnas = list(columnas)
+        self.tamano_bloque = tamano_bloque
+        self.n_hilos = n_hilos or os.cpu_count() or 1
+        self._rangos = None # Rangos guardados para Spearman
+        self._orden = None # Orden de cada columna, para los rangos por pares de Spearman
+        self._inicio = self._fin = None # Límites del grupo de empates de cada posición ordenada
+
+    def _valores(self):
+        return self.df[self.columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _pares_de_bloques(self):
+        m = len(self.columnas)
+        bloques = [(i, min(i + self.tamano_bloque, m)) for i in range(0, m, self.tamano_bloque)]
+        return [(bi, bj) for a, bi in enumerate(bloques) for bj in bloques[a:]] # Solo las teselas superiores
+
+    def _pearson(self, x, progress_callback=None):
+        m = x.shape[1]
+        validos = ~np.isnan(x)
+        resultado = np.full((m, m), np.nan)
+
+        if validos.all():
+            # Estandarizar una vez: cada tesela es un único producto matricial
+            with np.errstate(invalid='ignore', divide='ignore'):
+                z = (x - x.mean(axis=0)) / (x.std(axis=0, ddof=1) * np.sqrt(x.shape[0] - 1))
+
+            def tesela(bi, bj):
+                (i0, i1), (j0, j1) = bi, bj
+                resultado[i0:i1, j0:j1] = z[:, i0:i1].T @ z[:, j0:j1]
+        else:
+            # Sumas por pares completos mediante productos con máscara, sobre datos centrados por estabilidad
+            mascara = validos.astype(np.float64)
+            x0 = np.where(validos, x - np.nanmean(x, axis=0), 0.0)
+            x0_2 = x0 * x0
+
+            def tesela(bi, bj):
+                (i0, i1), (j0, j1) = bi, bj
+                mi, mj = mascara[:, i0:i1], mascara[:, j0:j1]
+                xi, xj = x0[:, i0:i1], x0[:, j0:j1]
+                n = mi.T @ mj
+                sx, sy = xi.T @ mj, mi.T @ xj
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    cov = xi.T @ xj - sx * sy / n
+                    var_x = x0_2[:, i0:i1].T @ mj - sx ** 2 / n
+                    var_y = mi.T @ x0_2[:, j0:j1] - sy ** 2 / n
+                    r = cov / np.sqrt(var_x * var_y)
+                r[n < 2] = np.nan
+                resultado[i0:i1, j0:j1] = r
+
+        pares = self._pares_de_bloques()
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            for hechos, _ in enumerate(pool.map(lambda par: tesela(*par), pares), start=1):
+                if progress_callback:
+                    progress_callback(100.0 * hechos / len(pares))
+
+        # Copiar el triángulo superior calculado en el inferior
+        resultado = np.triu(resultado) + np.triu(resultado, 1).T
+        resultado = np.clip(resultado, -1.0, 1.0)
+        diagonal = np.diag(resultado).copy()
+        np.fill_diagonal(resultado, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return resultado
+
+    def _kendall(self, x, progress_callback=None):
+        m = x.shape[1]
+        resultado = np.eye(m)
+        validos = ~np.isnan(x)
+
+        def tau(par):
+            i, j = par
+            filas = validos[:, i] & validos[:, j]
+            if filas.sum() < 2:
+                return par, np.nan
+            return par, stats.kendalltau(x[filas, i], x[filas, j])[0]
+
+        pares = [(i, j) for i in range(m) for j in range(i + 1, m)]
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            for hechos, ((i, j), valor) in enumerate(pool.map(tau, pares), start=1):
+                resultado[i, j] = resultado[j, i] = valor
+                if progress_callback:
+                    progress_callback(100.0 * hechos / len(pares))
+        return resultado
+
+    @staticmethod
+    def _grupos_empate(ordenados):
+        """Primera y última posición ordenada del grupo de empates de cada valor, con columnas ordenadas en el eje 0."""
+        n = ordenados.shape[0]
+        posiciones = np.arange(n)[:, None]
+        nuevo = np.ones(ordenados.shape, dtype=bool)
+        nuevo[1:] = ordenados[1:] != ordenados[:-1]
+        ultimo = np.ones(ordenados.shape, dtype=bool)
+        ultimo[:-1] = nuevo[1:]
+        inicio = np.maximum.accumulate(np.where(nuevo, posiciones, 0), axis=0)
+        fin = np.minimum.accumulate(np.where(ultimo, posiciones, n - 1)[::-1], axis=0)[::-1]
+        return inicio, fin
+
+    @staticmethod
+    def _rangos_en(incluidas, inicio, fin):
+        """
+        Rangos promedio, en orden ordenado, de cada valor entre las filas marcadas en
+        `incluidas`: un conteo acumulado de esas filas leído en los extremos de su grupo de empates.
+        """
+        acumulado = np.cumsum(incluidas, axis=0)
+        menores = np.where(inicio > 0, np.take_along_axis(acumulado, np.maximum(inicio - 1, 0), axis=0), 0)
+        hasta = np.take_along_axis(acumulado, fin, axis=0)
+        return (menores + 1 + hasta) / 2
+
+    def _spearman(self, progress_callback=None):
+        """
+        Pearson sobre rangos. Cada columna se rankea y ordena una vez. Los pares con
+        una columna con faltantes necesitan rangos sobre sus filas comunes, como en
+        DataFrame.corr('spearman'): salen de conteos acumulados a lo largo del orden
+        de cada columna, una columna contra un bloque de otras en cada paso
+        vectorizado, sin volver a ordenar cada par.
+        """
+        if self._rangos is None:
+            self._rangos = self.df[self.columnas].rank(axis=0).to_numpy(dtype=np.float64, na_value=np.nan)
+        validos = ~np.isnan(self._rangos)
+        m = len(self.columnas)
+        con_nan = ~validos.all(axis=0)
+        escala = 50.0 if con_nan.any() else 100.0 # Con pares a rankear de nuevo, la mitad del avance es para ellos
+
+        def avance_pearson(pct):
+            if progress_callback:
+                progress_callback(escala * pct / 100.0)
+
+        resultado = self._pearson(self._rangos, avance_pearson)
+        if not con_nan.any():
+            return resultado
+        x = self._valores()
+        n = len(x)
+        if self._orden is None:
+            tipo = np.int32 if n < 2 ** 31 else np.int64
+            orden = np.argsort(x, axis=0, kind='stable') # NaN al final
+            inicio, fin = self._grupos_empate(np.take_along_axis(x, orden, axis=0))
+            self._orden, self._inicio, self._fin = orden.astype(tipo), inicio.astype(tipo), fin.astype(tipo)
+        ancho = max(1, min(m, self.ELEMENTOS_POR_PASO // max(n, 1))) # Columnas por paso, acota los temporales n x ancho
+        tareas = []
+        for i in range(m):
+            otras = np.arange(i + 1, m)
+            otras = otras if con_nan[i] else otras[con_nan[otras]]
+            tareas.extend((i, otras[k:k + ancho]) for k in range(0, len(otras), ancho))
+
+        def paso(tarea):
+            i, cols = tarea
+            # Todo se dispone en el orden de la columna i, donde sus rangos salen directamente
+            orden_i = self._orden[:, i]
+            validas_j = validos[orden_i[:, None], cols]
+            rangos_i = self._rangos_en(validas_j, self._inicio[:, [i]], self._fin[:, [i]]) # Sobre las filas comunes con cada columna
+            orden_j = self._orden[:, cols]
+            rangos_j = np.empty((n, len(cols))) # Rangos de cada columna sobre las filas que comparte con i
+            np.put_along_axis(rangos_j, orden_j, self._rangos_en(validos[orden_j, i], self._inicio[:, cols], self._fin[:, cols]), axis=0)
+            rangos_j = rangos_j[orden_i]
+            comunes = validas_j & validos[orden_i, i][:, None]
+            k = comunes.sum(axis=0)
+            centro = (k + 1) / 2 # Los rangos promedio 1..k siempre tienen esta media
+            a = np.where(comunes, rangos_i - centro, 0.0)
+            b = np.where(comunes, rangos_j - centro, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                r = (a * b).sum(axis=0) / np.sqrt((a * a).sum(axis=0) * (b * b).sum(axis=0))
+            r[k < 2] = np.nan
+            return i, cols, np.clip(r, -1.0, 1.0)
+
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            for hechos, (i, cols, r) in enumerate(pool.map(paso, tareas), start=1):
+                resultado[i, cols] = resultado[cols, i] = r
+                if progress_callback:
+                    progress_callback(50.0 + 50.0 * hechos / len(tareas))
+        return resultado
+
+    def matriz(self, metodo='pearson', progress_callback=None):
+        """
+        Devuelve la matriz de correlación ('pearson', 'spearman' o 'kendall') como DataFrame.
+        `progress_callback(pct)` recibe el avance (0-100) según se completan teselas o pares.
+        """
+        if metodo == 'pearson':
+            valores = self._pearson(self._valores(), progress_callback)
+        elif metodo == 'spearman':
+            valores = self._spearman(progress_callback)
+        elif metodo == 'kendall':
+            valores = self._kendall(self._valores(), progress_callback)
+        else:
+            raise ValueError(f"Método de correlación no soportado: '{metodo}'.")
+        return pd.DataFrame(valores, index=self.columnas, columns=self.columnas)
+
+    @staticmethod
+    def pares_fuertes(matriz, umbral=None, top_k=None):
+        """Lista los pares de variables ordenados por |r|, filtrando por `umbral` y/o los `top_k` más fuertes."""
+        valores = matriz.to_numpy()
+        i, j = np.triu_indices_from(valores, k=1)
+        r = valores[i, j]
+        seleccion = ~np.isnan(r)
+        if umbral is not None:
+            seleccion &= np.abs(r) >= umbral
+        i, j, r = i[seleccion], j[seleccion], r[seleccion]
+        orden = np.argsort(-np.abs(r), kind='stable')
+        if top_k is not None:
+            orden = orden[:top_k]
+        columnas = np.asarray(matriz.columns)
+        return pd.DataFrame({'Variable 1': columnas[i[orden]], 'Variable 2': columnas[j[orden]], 'Correlación': r[orden]})
+
+class ResultadoOutliers:
+    """
+    Resultado de la detección de outliers: una máscara por columna y método,
+    empaquetada en bits (1 bit por fila), más los conteos y los límites usados.
+    """
+    def __init__(self, df, columnas, bits, conteos, limites):
+        self.df = df
+        self.columnas = list(columnas)
+        self.n_filas = len(df)
+        self.bits = bits # metodo -> matriz uint8 (filas/8 x columnas)
+        self.conteos = pd.DataFrame(conteos, index=self.columnas)
+        self.limites = limites
+
+    def mascara(self, columna, metodo):
+        j = self.columnas.index(columna)
+        return np.unpackbits(self.bits[metodo][:, j], count=self.n_filas).astype(bool)
+
+    def conteo(self, columna, metodo):
+        return int(self.conteos.at[columna, metodo])
+
+    def filas(self, columna, metodo, inicio=0, cantidad=100):
+        """Devuelve una página de filas marcadas como outlier, sin materializar todas."""
+        posiciones = np.flatnonzero(self.mascara(columna, metodo))[inicio:inicio + cantidad]
+        return self.df[columna].iloc[posiciones].to_frame()
+
+class DetectorOutliers:
+    """
+    Detecta outliers en todas las columnas numéricas a la vez con IQR, z-score,
+    MAD (z-score modificado) y un puntaje de aislamiento estilo Isolation Forest.
+    Las columnas se procesan en bloques para acotar la memoria de las máscaras.
+    """
+    METODOS = ('iqr', 'zscore', 'mad', 'aislamiento')
+
+    def __init__(self, df, columnas, umbral_z=3.0, umbral_mad=3.5, umbral_aislamiento=0.7,
+                 n_arboles=25, tamano_muestra=128, tamano_bloque=32, semilla=0):
+        self.df = df
+        self.columnas = list(columnas)
+        self.umbral_z = umbral_z
+        self.umbral_mad = umbral_mad
+        self.umbral_aislamiento = umbral_aislamiento
+        self.n_arboles = n_arboles
+        self.tamano_muestra = tamano_muestra
+        self.tamano_bloque = tamano_bloque
+        self.semilla = semilla # Fija para que el resultado sea reproducible (y cacheable)
+
+    @staticmethod
+    def _c(n):
+        """Longitud media de camino de una búsqueda fallida en un árbol binario de n elementos."""
+        if n > 2:
+            return 2.0 * (np.log(n - 1) + 0.5772156649) - 2.0 * (n - 1) / n
+        return 1.0 if n == 2 else 0.0
+
+    def _arbol(self, muestra, rng, profundidad_max):
+        """Árbol de aislamiento 1-D como hojas ordenadas: (límite derecho, profundidad ajustada)."""
+        limites, profundidades = [], []
+
+        def construir(valores, derecha, profundidad):
+            if profundidad >= profundidad_max or valores.size <= 1 or valores.min() == valores.max():
+                limites.append(derecha)
+                profundidades.append(profundidad + self._c(valores.size))
+                return
+            corte = rng.uniform(valores.min(), valores.max())
+            construir(valores[valores < corte], corte, profundidad + 1)
+            construir(valores[valores >= corte], derecha, profundidad + 1)
+
+        construir(muestra, np.inf, 0)
+        return np.array(limites), np.array(profundidades)
+
+    def _puntaje_aislamiento(self, x, rng):
+        puntajes = np.zeros(x.shape)
+        for j in range(x.shape[1]):
+            columna = x[:, j]
+            valores = columna[~np.isnan(columna)]
+            if valores.size < 2:
+                continue
+            psi = min(self.tamano_muestra, valores.size)
+            profundidad_max = int(np.ceil(np.log2(psi)))
+            arboles = [self._arbol(rng.choice(valores, psi, replace=False), rng, profundidad_max)
+                       for _ in range(self.n_arboles)]
+            # La profundidad es constante entre cortes: se promedia sobre la rejilla de todos los cortes
+            # y luego cada fila se ubica con una sola búsqueda binaria
+            rejilla = np.unique(np.concatenate([limites[:-1] for limites, _ in arboles]))
+            representantes = np.concatenate([[-np.inf], rejilla])
+            profundidad_media = np.mean([prof[np.searchsorted(limites, representantes, side='right')]
+                                         for limites, prof in arboles], axis=0)
+            celdas = np.searchsorted(rejilla, columna, side='right')
+            puntajes[:, j] = np.where(np.isnan(columna), 0.0, 2.0 ** (-profundidad_media[celdas] / self._c(psi)))
+        return puntajes
+
+    def _mascaras_bloque(self, x, rng):
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning) # Columnas sin datos válidos
+            q1, mediana, q3 = np.nanpercentile(x, [25, 50, 75], axis=0)
+            iqr = q3 - q1
+            inferior, superior = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            media = np.nanmean(x, axis=0)
+            std = np.nanstd(x, axis=0, ddof=1)
+            desviacion = np.abs(x - mediana)
+            mad = np.nanmedian(desviacion, axis=0)
+            mascaras = {
+                'iqr': (x < inferior) | (x > superior),
+                'zscore': np.abs(x - media) > self.umbral_z * std,
+                'mad': (mad > 0) & (0.6745 * desviacion > self.umbral_mad * mad),
+                'aislamiento': self._puntaje_aislamiento(x, rng) > self.umbral_aislamiento,
+            }
+        limites = pd.DataFrame({'Q1': q1, 'Q3': q3, 'Límite inferior': inferior, 'Límite superior': superior,
+                                'Media': media, 'Desv. estándar': std, 'Mediana': mediana, 'MAD': mad})
+        return mascaras, limites
+
+    def detectar(self, progress_callback=None):
+        """Máscaras y límites de todas las columnas; `progress_callback(pct)` avanza por bloque de columnas."""
+        n, m = len(self.df), len(self.columnas)
+        rng = np.random.default_rng(self.semilla)
+        bits = {metodo: np.zeros(((n + 7) // 8, m), dtype=np.uint8) for metodo in self.METODOS}
+        conteos = {metodo: np.zeros(m, dtype=np.int64) for metodo in self.METODOS}
+        limites = []
+        for j0 in range(0, m, self.tamano_bloque):
+            columnas = self.columnas[j0:j0 + self.tamano_bloque]
+            x = self.df[columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+            mascaras, limites_bloque = self._mascaras_bloque(x, rng)
+            for metodo, mascara in mascaras.items():
+                bits[metodo][:, j0:j0 + len(columnas)] = np.packbits(mascara, axis=0)
+                conteos[metodo][j0:j0 + len(columnas)] = mascara.sum(axis=0)
+            limites_bloque.index = columnas
+            limites.append(limites_bloque)
+            if progress_callback:
+                progress_callback(100.0 * (j0 + len(columnas)) / m)
+        limites = pd.concat(limites) if limites else pd.DataFrame()
+        return ResultadoOutliers(self.df, self.columnas, bits, conteos, limites)
+
 class AnalizadorEstadisticoAvanzado:
     """
     Una clase mejorada para realizar análisis estadísticos completos de un DataFrame.
     """
-    def __init__(self, dataframe=None):
+    def __init__(self, dataframe=None, cargador=None):
 
         if not isinstance(dataframe, pd.DataFrame):
             raise ValueError("La entrada debe ser un DataFrame de pandas.")
-        self.df = dataframe.copy()
+        self.df = dataframe # Referencia de solo lectura: el análisis nunca modifica los datos, no hace falta copiarlos
+        self.cargador = cargador # Fuente de bloques para recorrer el archivo completo
+        self._motor_correlacion = None # Se crea al primer análisis de correlación
+        self._outliers = None # ResultadoOutliers de todas las columnas, se calcula una sola vez
         self.numeric_cols = self.df.select_dtypes(include=np.number).columns.tolist()
         self.categorical_cols = self.df.select_dtypes(include=['object', 'category']).columns.tolist()
 
-    def resumen_descriptivo(self):
-        """Genera estadísticas descriptivas para columnas numéricas."""
+    def resumen_descriptivo(self, tamano_bloque=100_000, progress_callback=None):
+        """Genera estadísticas descriptivas para columnas numéricas en una sola pasada."""
         if not self.numeric_cols:
             return "No hay columnas numéricas para analizar."
-        
-        # Uso de StringIO para capturar la salida de .info()
-        buffer = StringIO()
-        self.df.info(buf=buffer)
-        info_str = buffer.getvalue()
-
-        desc = self.df[self.numeric_cols].describe().T
-        desc['median'] = self.df[self.numeric_cols].median()
-        desc['mode'] = self.df[self.numeric_cols].mode().iloc[0]
-        desc['variance'] = self.df[self.numeric_cols].var()
-        desc['skew'] = self.df[self.numeric_cols].skew()
-        desc['kurtosis'] = self.df[self.numeric_cols].kurtosis()
-        
-        return f"Información General del DataFrame:\n{info_str}\n\nEstadísticas Descriptivas:\n{desc.to_string()}"
+
+        archivo_completo = self.cargador is not None and self.cargador.truncado
+        if archivo_completo:
+            # El DataFrame en memoria es parcial: recorrer el archivo completo por bloques
+            bloques = self.cargador.iter_bloques(progress_callback)
+        else:
+            bloques = self._bloques_en_memoria(tamano_bloque, progress_callback)
+        acumulador = AcumuladorMomentos.desde_bloques(bloques, self.numeric_cols)
+        if archivo_completo:
+            origen = f"archivo completo, {self.cargador.filas_leidas} filas leídas por bloques"
+        else:
+            origen = "datos en memoria"
+        desc = acumulador.resumen()
+
+        return (f"Información General del DataFrame:\n{self._info_general()}\n\n"
+                f"Estadísticas Descriptivas ({origen}, cuantiles aproximados):\n{desc.to_string()}")
+
+    def _bloques_en_memoria(self, tamano_bloque, progress_callback=None):
+        n = len(self.df)
+        for i in range(0, n, tamano_bloque):
+            yield self.df.iloc[i:i + tamano_bloque]
+            if progress_callback:
+                progress_callback(100.0 * min(i + tamano_bloque, n) / n)
+
+    def _info_general(self):
+        """Resumen compacto de columnas y tipos, sin pasar por df.info()."""
+        lineas = [f"{len(self.df)} filas, {len(self.df.columns)} columnas"]
+        no_nulos = self.df.count()
+        for col, dtype in self.df.dtypes.items():
+            lineas.append(f" {str(col):<30} {no_nulos[col]:>10} no nulos  {dtype}")
+        lineas.append(f"Memoria: {self.df.memory_usage(deep=False).sum() / 1024 ** 2:.1f} MB")
+        return "\n".join(lineas)
 
     def distribucion_frecuencias(self):
         """Genera tablas de distribución de frecuencias para columnas categóricas."""
@@ -65,34 +854,549 @@ class AnalizadorEstadisticoAvanzado:
             reporte += freq_table.to_string() + "\n\n"
         return reporte
 
-    def analisis_correlacion(self, metodo='pearson'):
+    def analisis_correlacion(self, metodo='pearson', progress_callback=None):
         """Calcula la matriz de correlación de las variables numéricas."""
         if len(self.numeric_cols) < 2:
             return None, "Se necesitan al menos dos columnas numéricas para el análisis de correlación."
         
-        matriz_corr = self.df[self.numeric_cols].corr(method=metodo)
+        matriz_corr = self.motor_correlacion().matriz(metodo, progress_callback)
         return matriz_corr, f"Matriz de Correlación (Método: {metodo})"
 
-    def detectar_outliers_iqr(self, columna):
+    def motor_correlacion(self):
+        if self._motor_correlacion is None:
+            self._motor_correlacion = MotorCorrelacion(self.df, self.numeric_cols)
+        return self._motor_correlacion
+
+    def pares_fuertes(self, matriz_corr, umbral=None, top_k=None):
+        """Pares de variables con correlación fuerte, para no mostrar matrices enormes."""
+        return MotorCorrelacion.pares_fuertes(matriz_corr, umbral=umbral, top_k=top_k)
+
+    def detectar_outliers(self, progress_callback=None):
+        """Detecta outliers en todas las columnas numéricas (IQR, z-score, MAD y aislamiento) en una pasada."""
+        if self._outliers is None:
+            self._outliers = DetectorOutliers(self.df, self.numeric_cols).detectar(progress_callback)
+        return self._outliers
+
+    def detectar_outliers_iqr(self, columna, max_filas=100, progress_callback=None):
         """Detecta outliers en una columna numérica usando el Rango Intercuartílico (IQR)."""
         if columna not in self.numeric_cols:
             return f"La columna '{columna}' no es numérica."
         
-        Q1 = self.df[columna].quantile(0.25)
-        Q3 = self.df[columna].quantile(0.75)
-        IQR = Q3 - Q1
-        limite_inferior = Q1 - 1.5 * IQR
-        limite_superior = Q3 + 1.5 * IQR
-        
-        outliers = self.df[(self.df[columna] < limite_inferior) | (self.df[columna] > limite_superior)]
-        
-        if outliers.empty:
+        resultado = self.detectar_outliers(progress_callback)
+        total = resultado.conteo(columna, 'iqr')
+        if total == 0:
             return f"No se detectaron outliers en '{columna}' usando el método IQR."
         
-        return f"Outliers detectados en '{columna}':\n{outliers[[columna]].to_string()}"
+        texto = f"Outliers detectados en '{columna}' ({total}):\n{resultado.filas(columna, 'iqr', 0, max_filas).to_string()}"
+        if total > max_filas:
+            texto += f"\n... y {total - max_filas} más."
+        return texto
+
+class ResumenDistribucion:
+    """
+    Bins del histograma y estadísticos del boxplot de una columna numérica,
+    calculados una sola vez con NumPy. Las figuras se construyen con estos
+    agregados, así su tamaño no crece con el número de filas; de los outliers
+    solo se guarda una muestra acotada.
+    """
+    def __init__(self, bordes, conteos, q1, mediana, q3, bigote_inf, bigote_sup, media, n, outliers, n_outliers):
+        self.bordes = bordes
+        self.conteos = conteos
+        self.q1 = q1
+        self.mediana = mediana
+        self.q3 = q3
+        self.bigote_inf = bigote_inf
+        self.bigote_sup = bigote_sup
+        self.media = media
+        self.n = n
+        self.outliers = outliers
+        self.n_outliers = n_outliers
+
+    @classmethod
+    def desde_serie(cls, serie, bins='auto', max_bins=200, max_outliers=2_000, semilla=0):
+        """Agrega una Serie numérica (ignora los NaN)."""
+        valores = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        valores = valores[np.isfinite(valores)]
+        if not len(valores):
+            raise ValueError("La variable no tiene valores numéricos válidos.")
+        bordes = np.histogram_bin_edges(valores, bins=bins)
+        if len(bordes) - 1 > max_bins: # "auto" puede pedir miles de bins en columnas enormes
+            bordes = np.linspace(bordes[0], bordes[-1], max_bins + 1)
+        conteos, bordes = np.histogram(valores, bins=bordes)
+
+        q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+        iqr = q3 - q1
+        # Vallas de Tukey; los bigotes llegan hasta los valores más extremos dentro de ellas
+        dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+        fuera = valores[(valores < q1 - 1.5 * iqr) | (valores > q3 + 1.5 * iqr)]
+        n_outliers = len(fuera)
+        if n_outliers > max_outliers: # Solo se dibuja una muestra de los outliers
+            fuera = np.random.default_rng(semilla).choice(fuera, max_outliers, replace=False)
+        return cls(bordes, conteos, q1, mediana, q3, dentro.min(), dentro.max(), valores.mean(), len(valores), fuera, n_outliers)
+
+    @property
+    def centros(self):
+        return (self.bordes[:-1] + self.bordes[1:]) / 2
+
+    @property
+    def anchos(self):
+        return np.diff(self.bordes)
+
+    def traza_histograma(self, **kwargs):
+        return go.Bar(x=self.centros, y=self.conteos, width=self.anchos, **kwargs)
+
+    def traza_box(self, **kwargs):
+        """Traza de caja con los cuartiles y vallas ya calculados (sin datos crudos)."""
+        return go.Box(q1=[self.q1], median=[self.mediana], q3=[self.q3], lowerfence=[self.bigote_inf],
+                      upperfence=[self.bigote_sup], mean=[self.media], y=[0], orientation='h', **kwargs)
+
+    def traza_outliers(self, **kwargs):
+        return go.Scatter(x=self.outliers, y=np.zeros(len(self.outliers)), mode='markers', **kwargs)
+
+class CacheResultados:
+    """
+    Caché LRU de resultados de análisis, indexada por la huella del contenido
+    del DataFrame, el tipo de análisis y sus parámetros.
+    """
+    def __init__(self, limite_memoria_mb=256, directorio=None):
+        self.limite_memoria = limite_memoria_mb * 1024 ** 2
+        self.directorio = directorio # Si se indica, los resultados persisten entre sesiones
+        self._entradas = OrderedDict() # clave -> (valor, tamaño en bytes), el más reciente al final
+        self._lock = threading.Lock()
+        self.memoria = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @staticmethod
+    def huella(df):
+        """Hash del contenido del DataFrame (valores, índice, nombres y tipos de columna)."""
+        h = hashlib.sha1()
+        h.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        return h.hexdigest()
+
+    @staticmethod
+    def clave(huella, tipo, **params):
+        return hashlib.sha1(repr((huella, tipo, sorted(params.items()))).encode()).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def obtener(self, clave):
+        """Devuelve el valor guardado o None, contando el acierto o el fallo."""
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return self._entradas[clave][0]
+        if self.directorio and os.path.exists(self._ruta(clave)):
+            try:
+                with open(self._ruta(clave), 'rb') as f:
+                    datos = f.read()
+                valor = pickle.loads(datos)
+                self._insertar(clave, valor, len(datos))
+                with self._lock:
+                    self.hits += 1
+                return valor
+            except Exception:
+                pass # Archivo de caché dañado o incompatible: se recalcula
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def guardar(self, clave, valor):
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return # Los resultados no serializables no se guardan
+        self._insertar(clave, valor, len(datos))
+        if self.directorio:
+            try:
+                os.makedirs(self.directorio, exist_ok=True)
+                with open(self._ruta(clave), 'wb') as f:
+                    f.write(datos)
+            except OSError:
+                pass
+
+    def _insertar(self, clave, valor, tamano):
+        with self._lock:
+            if clave in self._entradas:
+                self.memoria -= self._entradas.pop(clave)[1]
+            if tamano > self.limite_memoria:
+                return
+            self._entradas[clave] = (valor, tamano)
+            self.memoria += tamano
+            # Expulsar los menos usados recientemente hasta volver al presupuesto
+            while self.memoria > self.limite_memoria:
+                _, (_, tamano_viejo) = self._entradas.popitem(last=False)
+                self.memoria -= tamano_viejo
+
+class Tarea:
+    """
+    Manejador de un trabajo planificado. La función del trabajo lo recibe,
+    informa el progreso con `progreso()` desde cualquier hilo y llama a
+    `comprobar()` entre etapas: la cancelación es cooperativa.
+    """
+    def __init__(self, clave, raiz, al_progresar=None):
+        self.clave = clave
+        self.raiz = raiz # Ventana Tk; todo evento de interfaz pasa por raiz.after
+        self.al_progresar = al_progresar
+        self.cancel_event = threading.Event() # Para los motores que aceptan cancel_event
+        self.futuro = None
+        self._ultimo = None # Último (etapa, porcentaje entero) enviado, para no saturar Tk
+
+    @property
+    def cancelada(self):
+        return self.cancel_event.is_set()
+
+    def cancelar(self):
+        self.cancel_event.set()
+
+    def comprobar(self):
+        """Lanza InterruptedError si el trabajo fue cancelado."""
+        if self.cancel_event.is_set():
+            raise InterruptedError("Análisis cancelado.")
+
+    def progreso(self, pct, etapa=""):
+        """Envía (pct, etapa) al hilo de Tk, como mucho una vez por punto porcentual y etapa."""
+        pct = max(0.0, min(100.0, float(pct)))
+        if self.al_progresar is None or (etapa, int(pct)) == self._ultimo:
+            return
+        self._ultimo = (etapa, int(pct))
+        self.raiz.after(0, self.al_progresar, pct, etapa)
+
+    def subrango(self, inicio, fin, etapa=""):
+        """Callback que lleva el progreso de un motor (0-100) al tramo [inicio, fin]."""
+        def callback(pct):
+            self.progreso(inicio + (fin - inicio) * pct / 100, etapa)
+        return callback
+
+class PlanificadorTareas:
+    """
+    Ejecuta los análisis en un pool de hilos acotado. Si se envía una clave que
+    ya está en cola o en curso se devuelve ese trabajo en lugar de repetirlo, y
+    los callbacks de fin, error y cancelación se ejecutan siempre en el hilo de Tk.
+    """
+    def __init__(self, raiz, max_hilos=2):
+        self.raiz = raiz
+        self.executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="analisis")
+        self.activas = {} # clave -> Tarea en cola o en curso
+        self._lock = threading.Lock()
+
+    def enviar(self, clave, funcion, al_terminar=None, al_fallar=None, al_cancelar=None, al_progresar=None):
+        """
+        Planifica `funcion(tarea)`. Devuelve (tarea, nueva); `nueva` es False si la
+        misma clave ya estaba pendiente y la petición se unió a ese trabajo.
+        """
+        with self._lock:
+            tarea = self.activas.get(clave)
+            if tarea is not None:
+                return tarea, False
+            tarea = Tarea(clave, self.raiz, al_progresar)
+            self.activas[clave] = tarea
+        tarea.futuro = self.executor.submit(self._ejecutar, tarea, funcion, al_terminar, al_fallar, al_cancelar)
+        return tarea, True
+
+    def _ejecutar(self, tarea, funcion, al_terminar, al_fallar, al_cancelar):
+        try:
+            tarea.comprobar() # Cancelado mientras esperaba en la cola
+            callback, argumento = al_terminar, funcion(tarea)
+            tarea.comprobar()
+        except InterruptedError as e:
+            callback, argumento = al_cancelar, str(e)
+        except Exception as e:
+            callback, argumento = al_fallar, str(e)
+        # Salir del conjunto activo antes de avisar: una petición nueva nunca se une a un trabajo terminado
+        with self._lock:
+            self.activas.pop(tarea.clave, None)
+        if callback is not None:
+            self.raiz.after(0, callback, argumento)
+
+    def cancelar(self, clave=None):
+        """Cancela el trabajo con `clave`, o todos los pendientes si no se indica."""
+        with self._lock:
+            tareas = list(self.activas.values()) if clave is None else [self.activas[clave]] if clave in self.activas else []
+        for tarea in tareas:
+            tarea.cancelar()
+        return len(tareas)
+
+    def __len__(self):
+        with self._lock:
+            return len(self.activas)
+
+    def cerrar(self):
+        """Cancela todo y detiene el pool sin esperar a los trabajos en curso."""
+        self.cancelar()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 # --- Clases de Widgets Personalizados ---
 
+class DibujanteMatplotlib:
+    """
+    Dibuja figuras de Plotly con artistas de Matplotlib. La disposición de
+    subgráficos sale de los dominios de los ejes de Plotly; admite trazas de
+    dispersión, líneas, barras, histogramas, cajas y mapas de calor, y las
+    trazas ya agregadas (bins, estadísticos de caja) se dibujan tal cual, sin
+    recalcular nada sobre los datos crudos.
+    """
+    MARGENES = (0.08, 0.08, 0.95, 0.9) # izquierda, abajo, derecha, arriba del área de dibujo
+
+    def __init__(self, fondo="#1a1a2e", panel="#2d2d44", texto="white"):
+        self.fondo = fondo
+        self.panel = panel
+        self.texto = texto
+
+    def dibujar(self, figura, fig_plotly):
+        """Dibuja una figura de Plotly en una Figure de Matplotlib (también fuera de pantalla)."""
+        figura.clear()
+        figura.set_facecolor(self.fondo)
+        artistas = []
+        ejes = {}
+        layout = fig_plotly.layout
+        for traza in fig_plotly.data:
+            clave = (traza.xaxis or 'x', traza.yaxis or 'y')
+            if clave not in ejes:
+                ejes[clave] = self._crear_eje(figura, layout, clave, ejes)
+            artistas.extend(self._dibujar_traza(figura, ejes[clave], traza))
+
+        for forma in layout.shapes or ():
+            # Formas de add_hline: líneas horizontales a lo ancho de un eje
+            if forma.type == 'line' and forma.y0 == forma.y1 and str(forma.xref).endswith('domain'):
+                for (_, ynombre), ax in ejes.items():
+                    if ynombre == (forma.yref or 'y'):
+                        ax.axhline(forma.y0, color='gray', linestyle='--', linewidth=1)
+        izquierda, abajo, derecha, arriba = self.MARGENES
+        for anotacion in layout.annotations or ():
+            # Los títulos de make_subplots son anotaciones referidas al papel
+            if anotacion.xref == 'paper' and anotacion.yref == 'paper' and anotacion.text:
+                figura.text(izquierda + anotacion.x * (derecha - izquierda), abajo + anotacion.y * (arriba - abajo) + 0.01,
+                            anotacion.text, ha='center', va='bottom', color=self.texto, fontsize=9)
+        if layout.title.text:
+            figura.suptitle(layout.title.text, color=self.texto)
+        return artistas
+
+    def _crear_eje(self, figura, layout, clave, ejes):
+        xnombre, ynombre = clave
+        eje_x = layout[xnombre.replace('x', 'xaxis', 1)]
+        eje_y = layout[ynombre.replace('y', 'yaxis', 1)]
+        if eje_y.overlaying:
+            # Eje y secundario superpuesto a otro subgráfico
+            base = next(ax for (xn, yn), ax in ejes.items() if yn == eje_y.overlaying)
+            ax = base.twinx()
+        else:
+            x0, x1 = eje_x.domain or (0, 1)
+            y0, y1 = eje_y.domain or (0, 1)
+            izquierda, abajo, derecha, arriba = self.MARGENES
+            ancho, alto = derecha - izquierda, arriba - abajo
+            ax = figura.add_axes([izquierda + x0 * ancho, abajo + y0 * alto, (x1 - x0) * ancho * 0.92, (y1 - y0) * alto * 0.88])
+            ax.set_facecolor(self.panel)
+        ax.tick_params(colors=self.texto, labelsize=8)
+        for borde in ax.spines.values():
+            borde.set_color('gray')
+        if eje_x.title.text:
+            ax.set_xlabel(eje_x.title.text, color=self.texto)
+        if eje_y.title.text:
+            ax.set_ylabel(eje_y.title.text, color=self.texto)
+        if eje_y.showticklabels is False:
+            ax.set_yticks([])
+        return ax
+
+    @staticmethod
+    def _color(traza, defecto):
+        for origen in ('marker', 'line'):
+            color = getattr(getattr(traza, origen, None), 'color', None)
+            if isinstance(color, str):
+                return color
+        return defecto
+
+    def _dibujar_traza(self, figura, ax, traza):
+        """Dibuja una traza y devuelve pares (tipo, artista); 'fijo' marca trazas que solo pueden redibujarse."""
+        if isinstance(traza, go.Scatter):
+            y = np.asarray(traza.y)
+            x = np.asarray(traza.x) if traza.x is not None else np.arange(len(y))
+            color = self._color(traza, '#66fcf1')
+            if traza.fill == 'toself':
+                poligono, = ax.fill(x, y, color=color if color.startswith('#') else '#ffc107', alpha=0.2, linewidth=0)
+                return [('poligono', poligono)]
+            modo = traza.mode or 'lines'
+            estilo = dict(linestyle='-' if 'lines' in modo else 'none', marker='o' if 'markers' in modo else None,
+                          markersize=3, linewidth=1.2, color=color)
+            if traza.line.dash in ('dash', 'dot'):
+                estilo['linestyle'] = '--'
+            linea, = ax.plot(x, y, **estilo)
+            return [('linea', linea)]
+        if isinstance(traza, go.Bar):
+            ancho = np.asarray(traza.width) if traza.width is not None else 0.8
+            barras = ax.bar(np.asarray(traza.x), np.asarray(traza.y, dtype=np.float64), width=ancho,
+                            color=self._color(traza, '#45a29e'), edgecolor=self.fondo, linewidth=0.3)
+            if traza.x is not None and len(traza.x) and isinstance(traza.x[0], str):
+                ax.tick_params(axis='x', labelrotation=45)
+            return [('barras', barras)]
+        if isinstance(traza, go.Histogram):
+            conteos, bordes = np.histogram(np.asarray(traza.x, dtype=np.float64), bins=traza.nbinsx or 'auto')
+            barras = ax.bar(bordes[:-1], conteos, width=np.diff(bordes), align='edge', color=self._color(traza, '#45a29e'))
+            return [('fijo', None)]
+        if isinstance(traza, go.Box):
+            estilo = dict(vert=False, patch_artist=True,
+                          boxprops=dict(facecolor='#16537e', edgecolor=self.texto), whiskerprops=dict(color=self.texto),
+                          capprops=dict(color=self.texto), medianprops=dict(color='yellow'))
+            if traza.q1 is not None:
+                ax.bxp([{'q1': traza.q1[0], 'med': traza.median[0], 'q3': traza.q3[0], 'whislo': traza.lowerfence[0],
+                         'whishi': traza.upperfence[0], 'fliers': []}], positions=[0], showfliers=False, **estilo)
+            else:
+                ax.boxplot(np.asarray(traza.x if traza.x is not None else traza.y, dtype=np.float64), positions=[0], **estilo)
+            return [('fijo', None)]
+        if isinstance(traza, go.Heatmap):
+            z = np.asarray(traza.z, dtype=np.float64)
+            imagen = ax.imshow(z, cmap='viridis', aspect='auto', vmin=np.nanmin(z), vmax=np.nanmax(z))
+            for eje, etiquetas in (('x', traza.x), ('y', traza.y)):
+                if etiquetas is not None and len(etiquetas) <= 40:
+                    posiciones = np.arange(len(etiquetas))
+                    if eje == 'x':
+                        ax.set_xticks(posiciones, [str(e) for e in etiquetas], rotation=90, fontsize=7)
+                    else:
+                        ax.set_yticks(posiciones, [str(e) for e in etiquetas], fontsize=7)
+            barra = figura.colorbar(imagen, ax=ax)
+            barra.ax.tick_params(colors=self.texto, labelsize=7)
+            if traza.texttemplate and z.shape[0] <= 20:
+                for (i, j), valor in np.ndenumerate(z):
+                    ax.text(j, i, f"{valor:.2f}", ha='center', va='center', fontsize=6, color='white')
+                return [('imagen', imagen), ('fijo', None)] # Las etiquetas de las celdas son texto estático
+            return [('imagen', imagen)]
+        return [('fijo', None)]
+
+class LienzoGraficos(DibujanteMatplotlib):
+    """
+    Lienzo de Matplotlib persistente, incrustado en Tk, que dibuja figuras de
+    Plotly dentro de la aplicación. Si la figura nueva tiene la misma
+    estructura que la mostrada, se reutilizan los artistas con los datos
+    nuevos y solo ellos se redibujan (blitting) sobre el fondo guardado.
+    """
+    def __init__(self, master, fondo="#1a1a2e", panel="#2d2d44", texto="white"):
+        super().__init__(fondo, panel, texto)
+        self.figura = Figure(figsize=(8, 6), facecolor=fondo)
+        self.canvas = FigureCanvasTkAgg(self.figura, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.configure(bg=fondo, highlightthickness=0)
+        self._firma = None
+        self._artistas = [] # (tipo, artista) en el orden de las trazas, todos animados (se dibujan por blitting)
+        self._fondo_blit = None
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+
+    def limpiar(self):
+        self.figura.clear()
+        self._firma = None
+        self._artistas = []
+        self.canvas.draw_idle()
+
+    def mostrar(self, fig_plotly):
+        firma = self._firma_de(fig_plotly)
+        if firma == self._firma and self._actualizar(fig_plotly):
+            return
+        self._artistas = self.dibujar(self.figura, fig_plotly)
+        # Los artistas de datos son animados: el dibujo normal los omite y el blitting los pinta
+        for _, artista in self._artistas:
+            if artista is not None:
+                artista.set_animated(True)
+        self._firma = firma
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def _firma_de(fig_plotly):
+        """Estructura de la figura: tipos de traza, ejes, tamaños y títulos; si coincide, los artistas se reutilizan."""
+        def firma_traza(t):
+            if isinstance(t, go.Heatmap):
+                tamano = (np.shape(t.z), tuple(map(str, () if t.x is None else t.x)), tuple(map(str, () if t.y is None else t.y)))
+            elif isinstance(t, go.Bar):
+                # Mismo número de barras; las etiquetas de categoría son parte del fondo
+                tamano = tuple(map(str, t.x)) if t.x is not None and len(t.x) and isinstance(t.x[0], str) else len(t.y)
+            else:
+                tamano = None
+            return type(t).__name__, t.xaxis, t.yaxis, getattr(t, 'mode', None), getattr(t, 'fill', None), tamano
+        layout = fig_plotly.layout
+        return (tuple(firma_traza(t) for t in fig_plotly.data), layout.title.text, layout.xaxis.title.text,
+                layout.yaxis.title.text, tuple(a.text for a in layout.annotations or ()))
+
+    def _al_dibujar(self, evento):
+        # El fondo es todo salvo los artistas animados de datos
+        self._fondo_blit = self.canvas.copy_from_bbox(self.figura.bbox)
+        self._dibujar_animados()
+
+    def _dibujar_animados(self):
+        for _, artista in self._artistas:
+            if artista is not None:
+                self.figura.draw_artist(artista)
+
+    def _actualizar(self, fig_plotly):
+        """Pasa los datos nuevos a los artistas en pantalla. False si hay que redibujar la figura."""
+        if self._fondo_blit is None or len(self._artistas) != len(fig_plotly.data):
+            return False
+        for (tipo, artista), traza in zip(self._artistas, fig_plotly.data):
+            if tipo == 'linea':
+                artista.set_data(np.asarray(traza.x if traza.x is not None else np.arange(len(traza.y))), np.asarray(traza.y))
+            elif tipo == 'barras':
+                altos = np.asarray(traza.y, dtype=np.float64)
+                anchos = np.broadcast_to(np.asarray(traza.width if traza.width is not None else 0.8, dtype=np.float64), altos.shape)
+                centros = None if isinstance(traza.x[0], str) else np.asarray(traza.x, dtype=np.float64)
+                for k, rect in enumerate(artista.patches):
+                    rect.set_height(altos[k])
+                    if centros is not None:
+                        rect.set_width(anchos[k])
+                        rect.set_x(centros[k] - anchos[k] / 2)
+            elif tipo == 'poligono':
+                artista.set_xy(np.column_stack([np.asarray(traza.x), np.asarray(traza.y)]))
+            elif tipo == 'imagen':
+                z = np.asarray(traza.z, dtype=np.float64)
+                if artista.get_clim() != (np.nanmin(z), np.nanmax(z)):
+                    return False # La barra de color es parte del fondo
+                artista.set_data(z)
+            else:
+                return False
+        ejes = {artista.axes for _, artista in self._artistas if artista is not None}
+        limites = [(ax.get_xlim(), ax.get_ylim()) for ax in ejes]
+        for ax in ejes:
+            ax.relim()
+            ax.autoscale_view()
+        if limites != [(ax.get_xlim(), ax.get_ylim()) for ax in ejes]:
+            self.canvas.draw_idle() # Cambiaron los ejes: el fondo guardado ya no sirve
+            return True
+        self.canvas.restore_region(self._fondo_blit)
+        self._dibujar_animados()
+        self.canvas.blit(self.figura.bbox)
+        return True
+
+class ExportadorEstatico:
+    """
+    Exportación de imágenes estáticas, solo cuando el usuario la pide. Cada
+    exportación se dibuja en una Figure nueva fuera de pantalla con el backend
+    Agg y en un hilo aparte, así una imagen a dpi=300 no bloquea la interfaz.
+    """
+    def __init__(self, dibujante, dpi=300, tamano=(10, 7.5)):
+        self.dibujante = dibujante
+        self.dpi = dpi
+        self.tamano = tamano
+
+    def exportar(self, fig_plotly, ruta, al_terminar=None, al_fallar=None):
+        """Dibuja y guarda `fig_plotly` en segundo plano; las funciones de aviso se llaman desde el hilo."""
+        hilo = threading.Thread(target=self._renderizar, args=(fig_plotly, ruta, al_terminar, al_fallar), daemon=True)
+        hilo.start()
+        return hilo
+
+    def _renderizar(self, fig_plotly, ruta, al_terminar, al_fallar):
+        try:
+            figura = Figure(figsize=self.tamano)
+            FigureCanvasAgg(figura)
+            self.dibujante.dibujar(figura, fig_plotly)
+            figura.savefig(ruta, dpi=self.dpi, facecolor=figura.get_facecolor())
+            if al_terminar:
+                al_terminar(ruta)
+        except Exception as e:
+            if al_fallar:
+                al_fallar(str(e))
+
 class ModernScrollableFrame:
     """Frame scrollable moderno con efectos visuales"""
     def __init__(self, parent, bg_color="#1a1a2e"):
@@ -204,6 +1508,16 @@ class AnalizadorGUI(tk.Tk):
         self.configure(bg="#1a1a2e")
         self.data = None
         self.analizador = None
+        self.limite_memoria_mb = 4096 # La carga deja de crecer pasado este tamaño
+        self.max_columnas_heatmap = 40 # Por encima, el mapa de calor muestra solo los pares más fuertes
+        self.huella_datos = None # Hash del contenido de self.data, parte de cada clave de caché
+        self.current_plot_interactive = None
+        self.cache = CacheResultados(limite_memoria_mb=512)
+        self.cache_datos = CacheColumnar(os.path.join(os.getcwd(), "dataset_cache"), "bloques") # Copias tipadas de los CSV cargados
+        self.cancelar_carga = None # Evento para abandonar la carga en curso
+        self.exportador = ExportadorEstatico(DibujanteMatplotlib()) # Imagen estática solo al exportar
+        self.planificador = PlanificadorTareas(self, max_hilos=2) # Pool acotado; un clic repetido se une al trabajo en curso
+        self.protocol("WM_DELETE_WINDOW", self.al_cerrar)
 
         # --- Estilos y Fuentes ---
         self.font_title = tkFont.Font(family="Segoe UI", size=18, weight="bold")
@@ -279,7 +1593,19 @@ class AnalizadorGUI(tk.Tk):
 
         # Barra de Progreso
         self.progress_bar = ModernProgressBar(left_panel, width=330)
-        self.progress_bar.pack(pady=20)
+        self.progress_bar.pack(pady=(20, 5))
+        self.estado_label = tk.Label(left_panel, text="", fg="#a0a0a0", bg="#1a1a2e", font=self.font_text)
+        self.estado_label.pack()
+        AnimatedButton(left_panel, text="Cancelar Análisis", command=self.cancelar_analisis, width=150, height=30).pack(pady=(5, 10))
+
+        # Estado de la caché de resultados
+        self.cache_label = tk.Label(left_panel, text="", fg="#a0a0a0", bg="#1a1a2e", font=self.font_text, justify="left")
+        self.cache_label.pack(anchor="w", padx=10)
+        self.persistir_cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(left_panel, text="Guardar caché en disco", variable=self.persistir_cache_var, command=self.cambiar_persistencia_cache,
+                       fg="white", bg="#1a1a2e", selectcolor="#2d2d44", activebackground="#1a1a2e", activeforeground="white",
+                       font=self.font_text).pack(anchor="w", padx=10)
+        self.actualizar_estado_cache()
 
         # --- Columna Derecha (Resultados) ---
         right_panel = tk.Frame(main_content_frame, bg="#2d2d44", relief='solid', borderwidth=1)
@@ -298,13 +1624,34 @@ class AnalizadorGUI(tk.Tk):
         self.notebook.pack(expand=True, fill='both', padx=5, pady=5)
         
         # Contenido de la pestaña de resultados
+        # Paginador de outliers: muestra las filas por páginas en lugar de volcar todo el texto
+        # Solo se muestra mientras el resultado en pantalla es un listado de outliers
+        self.pager_frame = pager_frame = tk.Frame(self.results_tab, bg="#1a1a2e")
+        tk.Label(pager_frame, text="Método de outliers:", fg="white", bg="#1a1a2e", font=self.font_text).pack(side="left", padx=(0, 5))
+        self.metodo_outliers_combo = ttk.Combobox(pager_frame, state='readonly', width=12, values=DetectorOutliers.METODOS)
+        self.metodo_outliers_combo.set('iqr')
+        self.metodo_outliers_combo.bind("<<ComboboxSelected>>", lambda e: self.cambiar_pagina_outliers(reiniciar=True))
+        self.metodo_outliers_combo.pack(side="left")
+        AnimatedButton(pager_frame, text="Siguiente ▶", command=lambda: self.cambiar_pagina_outliers(1), width=110, height=30).pack(side="right", padx=5)
+        AnimatedButton(pager_frame, text="◀ Anterior", command=lambda: self.cambiar_pagina_outliers(-1), width=110, height=30).pack(side="right", padx=5)
+        self.pagina_outliers_label = tk.Label(pager_frame, text="", fg="#a0a0a0", bg="#1a1a2e", font=self.font_text)
+        self.pagina_outliers_label.pack(side="right", padx=10)
+        self.outliers_columna = None
+        self.outliers_pagina = 0
+        self.filas_por_pagina = 100
+
         self.results_text = scrolledtext.ScrolledText(self.results_tab, wrap=tk.WORD, bg="#101020", fg="white", font=self.font_text, relief='flat')
         self.results_text.pack(expand=True, fill='both', padx=5, pady=5)
         
         # Contenido de la pestaña de gráficos
         self.plot_canvas_frame = tk.Frame(self.plot_tab, bg="#1a1a2e")
         self.plot_canvas_frame.pack(expand=True, fill='both')
-        self.plot_canvas = None # Se creará dinámicamente
+        barra_navegador = tk.Frame(self.plot_canvas_frame, bg="#1a1a2e")
+        barra_navegador.pack(side="bottom", fill="x")
+        AnimatedButton(barra_navegador, text="Abrir en Navegador", command=self.abrir_grafico_navegador, width=180, height=30).pack(side="right", padx=5, pady=5)
+        # Un único lienzo persistente que reutilizan todos los análisis
+        self.plot_canvas = LienzoGraficos(self.plot_canvas_frame)
+        self.plot_canvas.widget.pack(expand=True, fill='both')
 
         # Botones de exportación
         export_frame = tk.Frame(left_panel, bg="#1a1a2e")
@@ -320,25 +1667,57 @@ class AnalizadorGUI(tk.Tk):
         if not file_path:
             return
 
+        self.progress_bar.set_progress(0)
+        self.file_label.config(text=f"Cargando {os.path.basename(file_path)}...")
+        cargador = CargadorCSVPorBloques(file_path, limite_memoria_mb=self.limite_memoria_mb, cache=self.cache_datos)
+        if self.cancelar_carga is not None:
+            self.cancelar_carga.set() # Un archivo nuevo reemplaza a la carga que sigue en curso
+        self.cancelar_carga = threading.Event()
+        # Leer en un hilo para no congelar la interfaz con archivos grandes
+        thread = threading.Thread(target=self.cargar_datos_thread, args=(cargador, self.cancelar_carga), daemon=True)
+        thread.start()
+
+    def cargar_datos_thread(self, cargador, cancelar):
         try:
-            self.data = pd.read_csv(file_path)
-            self.analizador = AnalizadorEstadisticoAvanzado(self.data)
-            self.file_label.config(text=os.path.basename(file_path))
-            
-            # Poblar comboboxes
-            self.numeric_var_combo['values'] = self.analizador.numeric_cols
-            self.categorical_var_combo['values'] = self.analizador.categorical_cols
-            if self.analizador.numeric_cols:
-                self.numeric_var_combo.set(self.analizador.numeric_cols[0])
-            if self.analizador.categorical_cols:
-                self.categorical_var_combo.set(self.analizador.categorical_cols[0])
-            
-            messagebox.showinfo("Éxito", f"Datos cargados correctamente.\nFilas: {self.data.shape[0]}, Columnas: {self.data.shape[1]}")
-            self.mostrar_dataframe_head()
+            data = cargador.cargar(progress_callback=lambda pct: self.after(0, self.progress_bar.set_progress, pct),
+                                   cancel_event=cancelar)
+            if cancelar.is_set():
+                return
+            huella = cargador.huella or CacheResultados.huella(data) # Guardada con la caché columnar, sin volver a calcularla
+            self.after(0, self.datos_cargados, cargador, data, huella)
         except Exception as e:
-            messagebox.showerror("Error al Cargar", f"No se pudo cargar el archivo.\nError: {e}")
-            self.data = None
-            self.analizador = None
+            if not cancelar.is_set(): # Una carga cancelada puede terminar sin filas; no hay nada que avisar
+                self.after(0, self.error_carga, str(e))
+
+    def datos_cargados(self, cargador, data, huella):
+        self.data = data
+        self.huella_datos = huella
+        self.analizador = AnalizadorEstadisticoAvanzado(self.data, cargador=cargador)
+        self.file_label.config(text=os.path.basename(cargador.file_path))
+
+        # Poblar comboboxes
+        self.numeric_var_combo['values'] = self.analizador.numeric_cols
+        self.categorical_var_combo['values'] = self.analizador.categorical_cols
+        if self.analizador.numeric_cols:
+            self.numeric_var_combo.set(self.analizador.numeric_cols[0])
+        if self.analizador.categorical_cols:
+            self.categorical_var_combo.set(self.analizador.categorical_cols[0])
+
+        mensaje = f"Datos cargados correctamente.\nFilas: {self.data.shape[0]}, Columnas: {self.data.shape[1]}"
+        if cargador.desde_cache:
+            mensaje += "\n(Abierto desde la caché columnar, mapeado en memoria)"
+        if cargador.truncado:
+            mensaje += f"\n\nSe alcanzó el límite de memoria ({self.limite_memoria_mb} MB): solo se cargaron las primeras filas."
+        messagebox.showinfo("Éxito", mensaje)
+        self.progress_bar.set_progress(0)
+        self.mostrar_dataframe_head()
+
+    def error_carga(self, error):
+        messagebox.showerror("Error al Cargar", f"No se pudo cargar el archivo.\nError: {error}")
+        self.file_label.config(text="Ningún archivo cargado")
+        self.progress_bar.set_progress(0)
+        self.data = None
+        self.analizador = None
 
     def mostrar_dataframe_head(self):
         self.results_text.delete(1.0, tk.END)
@@ -351,155 +1730,204 @@ class AnalizadorGUI(tk.Tk):
             messagebox.showwarning("Sin Datos", "Por favor, carga un archivo CSV primero.")
             return
 
-        # Deshabilitar botones para evitar múltiples clics
-        # (Implementación más robusta sería necesaria para una app compleja)
-        
+        # Leer las selecciones en el hilo principal; forman parte de la clave de caché
+        params = {}
+        if tipo_analisis in ('histograma_boxplot', 'outliers'):
+            params['var'] = self.numeric_var_combo.get()
+        elif tipo_analisis == 'barras':
+            params['var'] = self.categorical_var_combo.get()
+
+        # La clave de caché identifica el trabajo: varios clics sobre el mismo análisis lo ejecutan una vez
+        clave = CacheResultados.clave(self.huella_datos, tipo_analisis, **params)
+        _, nueva = self.planificador.enviar(
+            clave, lambda tarea: self.tarea_analisis(tarea, tipo_analisis, params, clave),
+            al_terminar=self.analisis_terminado, al_fallar=self.analisis_fallido,
+            al_cancelar=self.analisis_cancelado, al_progresar=self.actualizar_progreso)
+        if not nueva:
+            self.estado_label.config(text="Ese análisis ya está en curso.")
+            return
+
         self.progress_bar.set_progress(0)
+        self.estado_label.config(text="En cola...")
         self.results_text.delete(1.0, tk.END)
         self.results_text.insert(tk.END, f"Ejecutando '{tipo_analisis}'... por favor espera.\n")
-        self.update_idletasks()
 
-        # Usar un hilo para no bloquear la GUI
-        thread = threading.Thread(target=self.ejecutar_analisis_thread, args=(tipo_analisis,))
-        thread.start()
+    def tarea_analisis(self, tarea, tipo_analisis, params, clave):
+        """Se ejecuta en el pool del planificador: solo calcula, la interfaz se actualiza en analisis_terminado."""
+        tarea.progreso(0, "Buscando en caché...")
+        guardado = self.cache.obtener(clave)
+        if guardado is None:
+            guardado = self.calcular_analisis(tipo_analisis, params, tarea)
+            tarea.comprobar() # No guardar en caché un trabajo cancelado
+            self.cache.guardar(clave, guardado)
+        if tipo_analisis == 'outliers' and params['var'] in self.analizador.numeric_cols:
+            # Ya calculado salvo que el texto viniera de la caché en disco
+            self.analizador.detectar_outliers(tarea.subrango(0, 100, "Detectando outliers..."))
+        tarea.progreso(100, "Mostrando resultados...")
+        return tipo_analisis, params, guardado
 
-    def ejecutar_analisis_thread(self, tipo_analisis):
-        try:
-            resultado = None
-            self.current_plot = None # Para guardar la figura actual
-            self.current_plot_interactive = None # Para guardar el plot de Plotly
-
-            # Simular progreso
-            for i in range(1, 101):
-                self.progress_bar.set_progress(i)
-            
-            if tipo_analisis == 'resumen':
-                resultado = self.analizador.resumen_descriptivo()
-                self.notebook.select(self.results_tab)
-            elif tipo_analisis == 'frecuencias':
-                resultado = self.analizador.distribucion_frecuencias()
-                self.notebook.select(self.results_tab)
-            elif tipo_analisis == 'correlacion':
-                matriz_corr, titulo = self.analizador.analisis_correlacion()
-                if matriz_corr is not None:
-                    resultado = f"{titulo}\n\n{matriz_corr.to_string()}"
-                    # Usar Plotly para el mapa de calor interactivo
-                    fig = px.imshow(matriz_corr, text_auto=True, aspect="auto",
-                                    color_continuous_scale='viridis',
-                                    title="Mapa de Calor de Correlación Interactivo")
-                    self.current_plot_interactive = fig
-                    self.mostrar_grafico_interactivo(fig)
-                else:
-                    resultado = titulo
-                self.notebook.select(self.plot_tab)
-            elif tipo_analisis == 'histograma_boxplot':
-                var = self.numeric_var_combo.get()
-                if not var:
-                    raise ValueError("Selecciona una variable numérica.")
-                resultado = f"Mostrando Histograma y Boxplot para '{var}'."
-                # Usar Plotly para un gráfico combinado
-                fig = go.Figure()
-                fig.add_trace(go.Histogram(x=self.data[var], name='Histograma'))
-                fig.add_trace(go.Box(x=self.data[var], name='Boxplot', yaxis='y2'))
-                fig.update_layout(
-                    title_text=f"Distribución de {var}",
-                    xaxis_title=var,
-                    yaxis_title="Frecuencia",
-                    yaxis2=dict(title="Boxplot", overlaying='y', side='right', showticklabels=False),
-                    template="plotly_dark"
-                )
-                self.current_plot_interactive = fig
-                self.mostrar_grafico_interactivo(fig)
-                self.notebook.select(self.plot_tab)
-            elif tipo_analisis == 'barras':
-                var = self.categorical_var_combo.get()
-                if not var:
-                    raise ValueError("Selecciona una variable categórica.")
-                resultado = f"Mostrando Gráfico de Barras para '{var}'."
-                # Usar Plotly para el gráfico de barras interactivo
-                counts = self.data[var].value_counts()
-                fig = px.bar(x=counts.index, y=counts.values, title=f"Distribución de {var}",
-                             labels={'x': var, 'y': 'Conteo'}, text_auto=True,
-                             template="plotly_dark")
-                fig.update_traces(marker_color='#e94560')
-                self.current_plot_interactive = fig
-                self.mostrar_grafico_interactivo(fig)
-                self.notebook.select(self.plot_tab)
-            elif tipo_analisis == 'outliers':
-                var = self.numeric_var_combo.get()
-                if not var:
-                    raise ValueError("Selecciona una variable numérica.")
-                resultado = self.analizador.detectar_outliers_iqr(var)
-                self.notebook.select(self.results_tab)
-            else:
-                resultado = "Análisis no reconocido."
+    def analisis_terminado(self, salida):
+        tipo_analisis, params, (resultado, fig, pestana) = salida
+        self.current_plot_interactive = fig # Plot de Plotly del último análisis, o None
+        if fig is not None:
+            self.mostrar_grafico_interactivo(fig)
+        self.notebook.select(self.plot_tab if pestana == 'grafico' else self.results_tab)
+        if tipo_analisis == 'outliers' and params['var'] in self.analizador.numeric_cols:
+            self.iniciar_paginador_outliers(params['var'])
+        else:
+            self.actualizar_ui_resultados(resultado)
+        self.finalizar_progreso()
 
-            # Actualizar la GUI desde el hilo principal
-            self.after(0, self.actualizar_ui_resultados, resultado)
+    def analisis_fallido(self, error):
+        self.finalizar_progreso()
+        messagebox.showerror("Error en Análisis", error)
 
-        except Exception as e:
-            self.after(0, lambda: messagebox.showerror("Error en Análisis", str(e)))
-        finally:
-            # Resetear la barra de progreso
+    def analisis_cancelado(self, mensaje):
+        self.finalizar_progreso()
+        self.estado_label.config(text=mensaje)
+        self.results_text.insert(tk.END, f"{mensaje}\n")
+
+    def actualizar_progreso(self, pct, etapa):
+        self.progress_bar.set_progress(pct)
+        self.estado_label.config(text=etapa)
+
+    def finalizar_progreso(self):
+        # Con otro trabajo aún en el pool, su siguiente evento vuelve a llenar la barra
+        if not len(self.planificador):
             self.after(100, lambda: self.progress_bar.set_progress(0))
+            self.estado_label.config(text="")
+        self.actualizar_estado_cache()
+
+    def cancelar_analisis(self):
+        if not self.planificador.cancelar():
+            self.estado_label.config(text="No hay análisis en curso.")
+
+    def al_cerrar(self):
+        if self.cancelar_carga is not None:
+            self.cancelar_carga.set()
+        self.planificador.cerrar()
+        self.destroy()
+
+    def calcular_analisis(self, tipo_analisis, params, tarea=None):
+        """
+        Ejecuta un análisis y devuelve (texto, figura de Plotly o None, pestaña a mostrar).
+        Con `tarea`, los motores informan su avance real y se comprueba la cancelación entre etapas.
+        """
+        def etapa(inicio, fin, nombre):
+            return tarea.subrango(inicio, fin, nombre) if tarea else None
+
+        if tipo_analisis == 'resumen':
+            return self.analizador.resumen_descriptivo(progress_callback=etapa(0, 95, "Resumen por bloques...")), None, 'texto'
+        elif tipo_analisis == 'frecuencias':
+            return self.analizador.distribucion_frecuencias(), None, 'texto'
+        elif tipo_analisis == 'correlacion':
+            matriz_corr, titulo = self.analizador.analisis_correlacion(progress_callback=etapa(0, 80, "Matriz de correlación..."))
+            if tarea:
+                tarea.comprobar()
+                tarea.progreso(80, "Preparando mapa de calor...")
+            if matriz_corr is None:
+                return titulo, None, 'grafico'
+            if len(matriz_corr) <= self.max_columnas_heatmap:
+                texto = f"{titulo}\n\n{matriz_corr.to_string()}"
+            else:
+                # Con muchas columnas: listar los pares más fuertes y dibujar solo esas variables
+                pares = self.analizador.pares_fuertes(matriz_corr, top_k=self.max_columnas_heatmap)
+                columnas = pd.unique(pares[['Variable 1', 'Variable 2']].to_numpy().ravel())[:self.max_columnas_heatmap]
+                matriz_corr = matriz_corr.loc[columnas, columnas]
+                texto = f"{titulo}\n\nPares más correlacionados:\n{pares.to_string(index=False)}"
+            # Usar Plotly para el mapa de calor interactivo
+            fig = px.imshow(matriz_corr, text_auto=len(matriz_corr) <= 20, aspect="auto",
+                            color_continuous_scale='viridis',
+                            title="Mapa de Calor de Correlación Interactivo")
+            return texto, fig, 'grafico'
+        elif tipo_analisis == 'histograma_boxplot':
+            var = params['var']
+            if not var:
+                raise ValueError("Selecciona una variable numérica.")
+            # Histograma y caja a partir de agregados: la figura no incluye la columna completa
+            resumen = ResumenDistribucion.desde_serie(self.data[var])
+            fig = go.Figure()
+            fig.add_trace(resumen.traza_histograma(name='Histograma'))
+            fig.add_trace(resumen.traza_box(name='Boxplot', yaxis='y2'))
+            fig.add_trace(resumen.traza_outliers(name='Outliers', yaxis='y2', marker=dict(size=4)))
+            fig.update_layout(
+                bargap=0,
+                title_text=f"Distribución de {var}",
+                xaxis_title=var,
+                yaxis_title="Frecuencia",
+                yaxis2=dict(title="Boxplot", overlaying='y', side='right', showticklabels=False),
+                template="plotly_dark"
+            )
+            return f"Mostrando Histograma y Boxplot para '{var}'.", fig, 'grafico'
+        elif tipo_analisis == 'barras':
+            var = params['var']
+            if not var:
+                raise ValueError("Selecciona una variable categórica.")
+            # Usar Plotly para el gráfico de barras interactivo
+            counts = self.data[var].value_counts()
+            fig = px.bar(x=counts.index, y=counts.values, title=f"Distribución de {var}",
+                         labels={'x': var, 'y': 'Conteo'}, text_auto=True,
+                         template="plotly_dark")
+            fig.update_traces(marker_color='#e94560')
+            return f"Mostrando Gráfico de Barras para '{var}'.", fig, 'grafico'
+        elif tipo_analisis == 'outliers':
+            var = params['var']
+            if not var:
+                raise ValueError("Selecciona una variable numérica.")
+            return self.analizador.detectar_outliers_iqr(var, progress_callback=etapa(0, 95, "Detectando outliers...")), None, 'texto'
+        return "Análisis no reconocido.", None, 'texto'
+
+    def iniciar_paginador_outliers(self, columna):
+        self.outliers_columna = columna
+        self.pager_frame.pack(side="bottom", fill="x", padx=5, pady=(0, 5), before=self.results_text.frame)
+        self.cambiar_pagina_outliers(reiniciar=True)
+
+    def cambiar_pagina_outliers(self, paso=0, reiniciar=False):
+        if self.analizador is None or self.outliers_columna is None:
+            return
+        resultado = self.analizador.detectar_outliers()
+        metodo = self.metodo_outliers_combo.get()
+        total = resultado.conteo(self.outliers_columna, metodo)
+        paginas = max(1, -(-total // self.filas_por_pagina))
+        self.outliers_pagina = 0 if reiniciar else min(max(self.outliers_pagina + paso, 0), paginas - 1)
+
+        inicio = self.outliers_pagina * self.filas_por_pagina
+        filas = resultado.filas(self.outliers_columna, metodo, inicio, self.filas_por_pagina)
+        texto = (f"Outliers por columna y método:\n{resultado.conteos.to_string()}\n\n"
+                 f"Outliers en '{self.outliers_columna}' (método {metodo}): {total} filas\n")
+        texto += filas.to_string() if total else "No se detectaron outliers."
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, texto)
+        self.pagina_outliers_label.config(text=f"Página {self.outliers_pagina + 1} de {paginas}")
+
+    def actualizar_estado_cache(self):
+        self.cache_label.config(text=f"Caché: {self.cache.hits} aciertos / {self.cache.misses} fallos, "
+                                     f"{len(self.cache)} resultados ({self.cache.memoria / 1024 ** 2:.1f} MB)")
+
+    def cambiar_persistencia_cache(self):
+        directorio = os.path.join(os.getcwd(), "analysis_cache")
+        self.cache.directorio = directorio if self.persistir_cache_var.get() else None
 
     def actualizar_ui_resultados(self, resultado):
+        self.outliers_columna = None
+        self.pager_frame.pack_forget()
         self.results_text.delete(1.0, tk.END)
         self.results_text.insert(tk.END, resultado)
 
     def mostrar_grafico_interactivo(self, fig):
-        """Muestra un gráfico de Plotly guardándolo como HTML y abriéndolo en el navegador."""
-        if self.plot_canvas:
-            self.plot_canvas.get_tk_widget().destroy()
-        
-        # Guardar gráfico y abrir en navegador para interactividad completa
-        path = os.path.join(os.getcwd(), "interactive_plot.html")
-        fig.write_html(path)
-        
-        # Mostrar una notificación en la GUI
-        for widget in self.plot_canvas_frame.winfo_children():
-            widget.destroy()
-            
-        label = tk.Label(self.plot_canvas_frame,
-                         text="El gráfico interactivo se ha abierto en tu navegador web.\n\n"
-                              "Cierra esta ventana y selecciona otro análisis para continuar.",
-                         font=self.font_label, fg="white", bg="#1a1a2e", wraplength=400)
-        label.pack(expand=True)
-        
-        # Guardar la figura de Matplotlib para la exportación de imagen estática
-        self.current_plot = self.plotly_to_matplotlib(fig)
-        
-        webbrowser.open('file://' + path)
+        """Dibuja un gráfico de Plotly en el lienzo incrustado (sin escribir HTML ni abrir el navegador)."""
+        self.plot_canvas.mostrar(fig)
 
-    def plotly_to_matplotlib(self, fig_plotly):
-        """Convierte una figura de Plotly a una figura de Matplotlib para guardarla como imagen."""
-        # Esta es una conversión simple, puede no funcionar para todos los tipos de gráficos complejos
-        fig_matplotlib = plt.figure(facecolor="#1a1a2e")
-        ax = fig_matplotlib.add_subplot(111)
-        ax.set_facecolor("#2d2d44")
-        ax.tick_params(colors='white')
-        ax.xaxis.label.set_color('white')
-        ax.yaxis.label.set_color('white')
-        ax.title.set_color('white')
-
-        for trace in fig_plotly.data:
-            if isinstance(trace, go.Histogram):
-                counts, bins = np.histogram(trace.x, bins='auto')
-                ax.hist(trace.x, bins=bins, color='#00d4aa', alpha=0.7)
-            elif isinstance(trace, go.Bar):
-                ax.bar(trace.x, trace.y, color=trace.marker.color or '#e94560')
-            elif isinstance(trace, go.Box):
-                ax.boxplot(trace.x, vert=False, patch_artist=True,
-                           boxprops=dict(facecolor='#16537e', color='white'),
-                           whiskerprops=dict(color='white'),
-                           capprops=dict(color='white'),
-                           medianprops=dict(color='yellow'))
-        
-        ax.set_title(fig_plotly.layout.title.text if fig_plotly.layout.title else "")
-        ax.set_xlabel(fig_plotly.layout.xaxis.title.text if fig_plotly.layout.xaxis.title else "")
-        ax.set_ylabel(fig_plotly.layout.yaxis.title.text if fig_plotly.layout.yaxis.title else "")
-        plt.tight_layout()
-        return fig_matplotlib
+    def abrir_grafico_navegador(self):
+        """Escribe la versión interactiva solo cuando se pide; plotly.js se guarda una vez junto a la página."""
+        if self.current_plot_interactive is None:
+            messagebox.showwarning("Sin Gráfico", "No hay un gráfico generado para abrir.")
+            return
+        directorio = os.path.join(os.getcwd(), "temp_plots")
+        os.makedirs(directorio, exist_ok=True)
+        path = os.path.join(directorio, "interactive_plot.html")
+        self.current_plot_interactive.write_html(path, include_plotlyjs='directory')
+        webbrowser.open('file://' + path)
 
     def exportar_resultados(self):
         contenido = self.results_text.get(1.0, tk.END).strip()
@@ -546,13 +1974,15 @@ class AnalizadorGUI(tk.Tk):
 
         try:
             if file_path.endswith('.html'):
-                self.current_plot_interactive.write_html(file_path)
-            elif file_path.endswith('.png'):
-                # Usa la figura de Matplotlib guardada para exportar como PNG
-                if self.current_plot:
-                    self.current_plot.savefig(file_path, dpi=300, facecolor=self.current_plot.get_facecolor())
-                else: # Fallback si la conversión no fue posible
-                    self.current_plot_interactive.write_image(file_path)
+                # Referencia un plotly.min.js escrito una sola vez en la misma carpeta
+                self.current_plot_interactive.write_html(file_path, include_plotlyjs='directory')
+            else:
+                # La conversión a Matplotlib se hace ahora, en segundo plano, y no antes de que se pida
+                self.exportador.exportar(
+                    self.current_plot_interactive, file_path,
+                    al_terminar=lambda ruta: self.after(0, lambda: messagebox.showinfo("Éxito", f"Gráfico guardado en {os.path.basename(ruta)}")),
+                    al_fallar=lambda error: self.after(0, lambda: messagebox.showerror("Error al Guardar", f"No se pudo guardar el gráfico.\nError: {error}")))
+                return
 
             messagebox.showinfo("Éxito", f"Gráfico guardado en {os.path.basename(file_path)}")
         except Exception as e:
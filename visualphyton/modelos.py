@@ -1,38 +1,892 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError: # Optional: without pyarrow the columnar dataset cache is disabled
+    pa = feather = None
 import numpy as np
 import statsmodels.api as sm
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 from scipy import stats
-import matplotlib.pyplot as plt # Still needed for qqplot workaround
+from statsmodels.tsa.stattools import kpss
 import seaborn as sns # Not directly used in plotting, but often part of data science env
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import os
+import json
+import time
+import warnings
+import hashlib
+from functools import cached_property
+import pickle
+from collections import OrderedDict
 import webbrowser
 from PIL import Image, ImageTk, ImageDraw # Import ImageDraw
 import tkinter.font as tkFont
 
 # For PDF generation
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, TableStyle, LongTable, Preformatted
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 
+# =============================================================================
+# DATA LOADING
+# =============================================================================
+
+class CargadorCSVPorBloques:
+    """Reads large CSV files in chunks, downcasting dtypes inferred from the first chunk."""
+    def __init__(self, file_path, chunksize=100_000, max_categorias=1000, max_ratio_categorias=0.5, limite_memoria_mb=None, cache=None):
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.max_categorias = max_categorias # Upper bound of distinct values for a 'category' column
+        self.max_ratio_categorias = max_ratio_categorias # Distinct/total ratio below which strings become 'category'
+        self.limite_memoria_mb = limite_memoria_mb # None means no memory budget
+        self.dtypes = None # Inferred from the first chunk
+        self.filas_leidas = 0
+        self.truncado = False # True when the memory budget stopped the load early
+        self.cache = cache # CacheColumnar, or None to always parse the CSV
+        self.desde_cache = False # True when the last load was memory-mapped from the cache
+        self.huella = None # Content fingerprint stored with the cached copy
+
+    def _inferir_dtypes(self, bloque):
+        """Chooses the smallest dtype for each column based on the first chunk."""
+        dtypes = {}
+        for col in bloque.columns:
+            serie = bloque[col]
+            if pd.api.types.is_float_dtype(serie):
+                dtypes[col] = np.dtype(np.float32)
+            elif pd.api.types.is_integer_dtype(serie):
+                dtypes[col] = pd.to_numeric(serie, downcast='integer').dtype # int8/16/32/64
+            elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+                n_unicos = serie.nunique(dropna=True)
+                if n_unicos <= self.max_categorias and n_unicos <= self.max_ratio_categorias * max(len(serie), 1):
+                    dtypes[col] = 'category'
+        return dtypes
+
+    def _aplicar_dtypes(self, bloque):
+        """Casts a chunk to the inferred dtypes, widening when later chunks don't fit."""
+        for col, dtype in self.dtypes.items():
+            if col not in bloque.columns:
+                continue
+            serie = bloque[col]
+            if dtype == 'category':
+                if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+                    # A chunk with only numeric-looking values: keep categories as strings
+                    serie = serie.map(str, na_action='ignore')
+                bloque[col] = serie.astype('category')
+            elif not pd.api.types.is_numeric_dtype(serie):
+                continue # Column changed to text after the first chunk, leave it as parsed
+            elif np.issubdtype(dtype, np.integer) and pd.api.types.is_integer_dtype(serie):
+                info = np.iinfo(dtype)
+                if len(serie) and (serie.min() < info.min or serie.max() > info.max):
+                    bloque[col] = pd.to_numeric(serie, downcast='integer')
+                else:
+                    bloque[col] = serie.astype(dtype)
+            else:
+                # Floats, or integer columns that gained NaNs/decimals in this chunk
+                bloque[col] = pd.to_numeric(serie, downcast='float')
+        return bloque
+
+    def iter_bloques(self, progress_callback=None, cancel_event=None):
+        """Yields typed chunks, reporting progress (0-100) from the bytes consumed so far."""
+        tamano = os.path.getsize(self.file_path) or 1
+        self.filas_leidas = 0
+        with open(self.file_path, 'rb') as f:
+            with pd.read_csv(f, chunksize=self.chunksize) as lector:
+                for bloque in lector:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    if self.dtypes is None:
+                        self.dtypes = self._inferir_dtypes(bloque)
+                    bloque = self._aplicar_dtypes(bloque)
+                    self.filas_leidas += len(bloque)
+                    if progress_callback:
+                        progress_callback(min(100.0, 100.0 * f.tell() / tamano))
+                    yield bloque
+
+    def cargar(self, progress_callback=None, cancel_event=None):
+        """Loads the file into one compact DataFrame, stopping at the memory budget if any."""
+        if self.cache is not None:
+            guardado = self.cache.leer(self.file_path)
+            if guardado is not None:
+                # Memory-mapped, so the budget doesn't apply: pages are read only when a column is used
+                df, entrada = guardado
+                self.desde_cache, self.huella, self.truncado = True, entrada.get('huella'), False
+                self.filas_leidas = len(df)
+                if progress_callback:
+                    progress_callback(100.0)
+                return df
+        self.desde_cache = False
+        limite = self.limite_memoria_mb * 1024 ** 2 if self.limite_memoria_mb else None
+        self.truncado = False
+        bloques = []
+        memoria = 0
+        iterador = self.iter_bloques(progress_callback, cancel_event)
+        try:
+            for bloque in iterador:
+                bloques.append(bloque)
+                memoria += bloque.memory_usage(deep=True).sum()
+                if limite is not None and memoria >= limite:
+                    self.truncado = True
+                    break
+        finally:
+            iterador.close()
+
+        if not bloques:
+            raise ValueError("El archivo CSV está vacío o no contiene datos válidos.")
+        df = self._concatenar(bloques)
+        cancelado = cancel_event is not None and cancel_event.is_set()
+        if self.cache is not None and not self.truncado and not cancelado:
+            # Only complete loads are cached; the frame handed back is already the mapped copy
+            self.huella = CacheResultados.huella(df)
+            if self.cache.escribir(self.file_path, df, huella=self.huella):
+                guardado = self.cache.leer(self.file_path)
+                if guardado is not None:
+                    df = guardado[0]
+        return df
+
+    def _concatenar(self, bloques):
+        """Concatenates chunks, unifying categories so categorical columns stay categorical."""
+        for col, dtype in self.dtypes.items():
+            if dtype != 'category' or not all(isinstance(b[col].dtype, pd.CategoricalDtype) for b in bloques):
+                continue
+            categorias = union_categoricals([b[col] for b in bloques]).categories
+            for b in bloques:
+                b[col] = b[col].cat.set_categories(categorias)
+        return pd.concat(bloques, ignore_index=True)
+
+class CacheColumnar:
+    """
+    On-disk columnar copy of loaded datasets. The first complete load of a file
+    is written as uncompressed Feather (Arrow IPC) in a single record batch,
+    and a JSON manifest maps the source path, mtime and size to it. Later loads
+    memory-map that file: numeric columns come back as zero-copy views, so only
+    the pages of the columns an analysis actually reads are brought into memory.
+    Entries are keyed by a `formato` tag naming how the loader typed the frame,
+    so apps sharing the directory never read each other's differently typed copies.
+    """
+    def __init__(self, directorio, formato):
+        self.directorio = directorio
+        self.formato = formato # Manifest and file names are per format
+        self._lock = threading.Lock()
+
+    def _ruta_manifiesto(self):
+        return os.path.join(self.directorio, f"manifiesto_{self.formato}.json")
+
+    def _leer_manifiesto(self):
+        try:
+            with open(self._ruta_manifiesto(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_manifiesto(self, manifiesto):
+        # Written to a temporary file and renamed, so a crash never leaves a half-written manifest
+        temporal = self._ruta_manifiesto() + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=1)
+        os.replace(temporal, self._ruta_manifiesto())
+
+    @staticmethod
+    def _firma(ruta):
+        info = os.stat(ruta)
+        return {'mtime_ns': info.st_mtime_ns, 'tamano': info.st_size}
+
+    def entrada(self, ruta):
+        """Manifest entry for `ruta` if its cache is still valid (same mtime and size), else None."""
+        if feather is None:
+            return None
+        ruta = os.path.abspath(ruta)
+        try:
+            firma = self._firma(ruta)
+        except OSError:
+            return None
+        with self._lock:
+            entrada = self._leer_manifiesto().get(ruta)
+        if entrada is None or any(entrada.get(k) != v for k, v in firma.items()):
+            return None
+        if not os.path.exists(os.path.join(self.directorio, entrada['archivo'])):
+            return None
+        return entrada
+
+    @staticmethod
+    def _tabla_arrow(df):
+        """Arrow table with one chunk per column. NumPy numeric columns keep NaN as a value, so reads stay zero-copy."""
+        arrays = []
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'iuf':
+                arrays.append(pa.array(serie.to_numpy()))
+            else:
+                arrays.append(pa.array(serie, from_pandas=True))
+        return pa.table(arrays, names=list(df.columns))
+
+    def escribir(self, ruta, df, **metadatos):
+        """Caches `df` as the content of `ruta`. Returns False when the frame can't be stored."""
+        if feather is None:
+            return False
+        if not all(isinstance(col, str) for col in df.columns):
+            return False # Feather needs string column names; anything else would not round-trip
+        ruta = os.path.abspath(ruta)
+        try:
+            firma = self._firma(ruta)
+            archivo = hashlib.sha1(repr((self.formato, ruta, firma['mtime_ns'], firma['tamano'])).encode()).hexdigest() + ".feather"
+            os.makedirs(self.directorio, exist_ok=True)
+            destino = os.path.join(self.directorio, archivo)
+            # A single record batch: a chunked column can't be handed to pandas without a copy
+            feather.write_feather(self._tabla_arrow(df), destino + ".tmp", compression='uncompressed', chunksize=max(len(df), 1))
+            os.replace(destino + ".tmp", destino)
+            with self._lock:
+                manifiesto = self._leer_manifiesto()
+                anterior = manifiesto.get(ruta)
+                manifiesto[ruta] = dict(firma, archivo=archivo, filas=len(df), columnas=list(df.columns), **metadatos)
+                self._guardar_manifiesto(manifiesto)
+            if anterior and anterior.get('archivo') != archivo:
+                try:
+                    os.remove(os.path.join(self.directorio, anterior['archivo'])) # Cache of an older version of the file
+                except OSError:
+                    pass # Still mapped by an open frame (Windows); left for the next run
+            return True
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            return False
+
+    def leer(self, ruta, columnas=None):
+        """
+        Memory-maps the cached frame of `ruta`, or only `columnas` (unknown names are skipped).
+        Returns (DataFrame, manifest entry), or None when there is no valid cache.
+        """
+        entrada = self.entrada(ruta)
+        if entrada is None:
+            return None
+        if columnas is not None:
+            columnas = [col for col in columnas if col in entrada['columnas']]
+        try:
+            tabla = feather.read_table(os.path.join(self.directorio, entrada['archivo']), columns=columnas, memory_map=True)
+            return tabla.to_pandas(split_blocks=True), entrada
+        except (OSError, pa.ArrowException):
+            return None # Unreadable cache: fall back to parsing the source
+
+class DetectorFechas:
+    """
+    Finds datetime columns by testing a bounded random sample of each text
+    column against explicit formats, most recently successful first. Only
+    columns that pass are converted in full, once, with the detected format.
+    """
+    def __init__(self, tamano_muestra=200, semilla=0):
+        self.tamano_muestra = tamano_muestra
+        self.semilla = semilla
+        self.formatos = [] # Formats that matched earlier columns, most recent first
+        self._lock = threading.Lock()
+
+    def _muestra(self, serie):
+        rng = np.random.default_rng(self.semilla)
+        posiciones = rng.integers(0, len(serie), size=min(len(serie), 4 * self.tamano_muestra))
+        muestra = serie.iloc[posiciones].dropna()
+        if muestra.empty:
+            muestra = serie.dropna() # Mostly-null column: fall back to whatever values exist
+        return muestra.iloc[:self.tamano_muestra].astype(str)
+
+    def detectar_formato(self, serie):
+        """Explicit format matching every sampled value, or None when the column does not look like dates."""
+        if len(serie) == 0 or pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            return None
+        muestra = self._muestra(serie)
+        if muestra.empty or not muestra.str.contains(r'\d').all():
+            return None
+        with self._lock:
+            candidatos = list(self.formatos)
+        for dayfirst in (False, True):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore") # pandas warns when the guess contradicts `dayfirst`
+                guess = guess_datetime_format(muestra.iloc[0], dayfirst=dayfirst)
+            if guess and guess not in candidatos:
+                candidatos.append(guess)
+        candidatos.append('ISO8601')
+        for formato in candidatos:
+            if pd.to_datetime(muestra, format=formato, errors='coerce').notna().all():
+                with self._lock:
+                    if formato in self.formatos:
+                        self.formatos.remove(formato)
+                    self.formatos.insert(0, formato)
+                return formato
+        return None
+
+    @staticmethod
+    def convertir(serie, formato):
+        """Parses a column with an explicit format; categorical columns only parse their categories."""
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = pd.DatetimeIndex(pd.to_datetime(serie.cat.categories.astype(str), format=formato, errors='coerce'))
+            # Code -1 is a missing value: it must stay NaT, not take the last category's date
+            return pd.Series(categorias.take(serie.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT),
+                             index=serie.index, name=serie.name)
+        return pd.to_datetime(serie, format=formato, errors='coerce')
+
+class DatasetCompartido:
+    """Read-only handle on the loaded DataFrame, shared by every analyzer without copying."""
+    detector_fechas = DetectorFechas() # Shared, so formats learned on one file speed up the next
+
+    def __init__(self, df, cargador=None):
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("Se requiere un DataFrame de pandas.")
+        self._df = df
+        self.cargador = cargador # CargadorCSVPorBloques that produced the frame, if any
+        self._motores_correlacion = {} # Column tuple -> MotorCorrelacion, so cached ranks survive across clicks
+        self._gram_ols = None # GramOLS over every numeric column, shared by all models it covers
+        self._grams_ols = {} # Column set -> GramOLS, only for models whose missing rows differ
+        self._fechas = {} # Column -> parsed datetime Series, so ARIMA never re-parses
+        self._columnas_fecha = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def envolver(cls, datos, cargador=None):
+        """Accepts either a DatasetCompartido or a plain DataFrame."""
+        if isinstance(datos, cls):
+            return datos
+        return cls(datos, cargador=cargador)
+
+    @property
+    def df(self):
+        # Shared across analyzers: callers must never modify it in place
+        return self._df
+
+    def motor_correlacion(self, columnas):
+        clave = tuple(columnas)
+        with self._lock:
+            if clave not in self._motores_correlacion:
+                self._motores_correlacion[clave] = MotorCorrelacion(self._df, clave)
+            return self._motores_correlacion[clave]
+
+    def gram_ols(self, columnas):
+        """
+        Sums for an OLS model on `columnas`. One Gram over every numeric column is
+        built per dataset and reused whenever the rows it drops are exactly the
+        model's own incomplete rows; a model whose missing-value pattern differs
+        gets its own accumulation, cached by column set.
+        """
+        with self._lock:
+            if self._gram_ols is None:
+                numericas = self._df.select_dtypes(include=np.number).columns.tolist()
+                self._gram_ols = GramOLS.desde_bloques(self.bloques(), numericas)
+            if self._gram_ols.cubre(columnas):
+                return self._gram_ols
+            clave = frozenset(columnas)
+            if clave not in self._grams_ols:
+                self._grams_ols[clave] = GramOLS.desde_bloques(self.bloques(), list(columnas))
+            return self._grams_ols[clave]
+
+    def columnas_fecha(self):
+        """Columns whose every non-null value parses as a date; their parsed versions are kept."""
+        if self._columnas_fecha is not None:
+            return self._columnas_fecha
+        columnas = []
+        for col in self._df.columns:
+            serie = self._df[col]
+            if pd.api.types.is_datetime64_any_dtype(serie):
+                fechas = serie
+            else:
+                formato = self.detector_fechas.detectar_formato(serie)
+                if formato is None:
+                    continue
+                fechas = self.detector_fechas.convertir(serie, formato)
+                if (fechas.isna() != serie.isna()).any():
+                    continue # The sample passed but some other value does not parse, or a missing value got a date
+            with self._lock:
+                self._fechas[col] = fechas
+            columnas.append(col)
+        self._columnas_fecha = columnas
+        return columnas
+
+    def fechas(self, columna):
+        """Parsed datetime version of a column (unparseable values become NaT)."""
+        with self._lock:
+            if columna in self._fechas:
+                return self._fechas[columna]
+        serie = self._df[columna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            fechas = serie
+        else:
+            formato = self.detector_fechas.detectar_formato(serie)
+            fechas = (self.detector_fechas.convertir(serie, formato) if formato
+                      else pd.to_datetime(serie, errors='coerce'))
+        with self._lock:
+            self._fechas[columna] = fechas
+        return fechas
+
+    def bloques(self, tamano=200_000):
+        """Row chunks of the dataset: the whole file through the loader when the frame was truncated."""
+        if self.cargador is not None and self.cargador.truncado:
+            return self.cargador.iter_bloques()
+        return (self._df.iloc[i:i + tamano] for i in range(0, len(self._df), tamano))
+
+    def vista(self, columnas=None, reemplazos=None):
+        """
+        Builds a frame over the requested columns without copying them.
+        Columns in `reemplazos` (e.g. a parsed datetime version) live only in
+        this overlay, so per-analysis transforms never touch the shared data.
+        """
+        columnas = list(self._df.columns) if columnas is None else list(columnas)
+        reemplazos = reemplazos or {}
+        datos = {col: reemplazos[col] if col in reemplazos else self._df[col] for col in columnas}
+        for col, serie in reemplazos.items():
+            datos.setdefault(col, serie)
+        return pd.DataFrame(datos, index=self._df.index, copy=False)
+
+class CacheResultados:
+    """LRU cache of analysis results keyed by dataset fingerprint, analysis type and parameters."""
+    def __init__(self, limite_memoria_mb=256, directorio=None):
+        self.limite_memoria = limite_memoria_mb * 1024 ** 2
+        self.directorio = directorio # When set, results are also persisted there between sessions
+        self._entradas = OrderedDict() # clave -> (valor, tamaño en bytes), most recent last
+        self._lock = threading.Lock()
+        self.memoria = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @staticmethod
+    def huella(df):
+        """Content hash of a DataFrame (values, index, column names and dtypes)."""
+        h = hashlib.sha1()
+        h.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        return h.hexdigest()
+
+    @staticmethod
+    def clave(huella, tipo, **params):
+        return hashlib.sha1(repr((huella, tipo, sorted(params.items()))).encode()).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def obtener(self, clave):
+        """Returns the cached value or None, counting the hit or miss."""
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return self._entradas[clave][0]
+        if self.directorio and os.path.exists(self._ruta(clave)):
+            try:
+                with open(self._ruta(clave), 'rb') as f:
+                    datos = f.read()
+                valor = pickle.loads(datos)
+                self._insertar(clave, valor, len(datos))
+                with self._lock:
+                    self.hits += 1
+                return valor
+            except Exception:
+                pass # Corrupt or incompatible cache file: recompute
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def guardar(self, clave, valor):
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return # Results that can't be serialized are simply not cached
+        self._insertar(clave, valor, len(datos))
+        if self.directorio:
+            try:
+                os.makedirs(self.directorio, exist_ok=True)
+                with open(self._ruta(clave), 'wb') as f:
+                    f.write(datos)
+            except OSError:
+                pass
+
+    def _insertar(self, clave, valor, tamano):
+        with self._lock:
+            if clave in self._entradas:
+                self.memoria -= self._entradas.pop(clave)[1]
+            if tamano > self.limite_memoria:
+                return
+            self._entradas[clave] = (valor, tamano)
+            self.memoria += tamano
+            # Evict least recently used entries until we're back under budget
+            while self.memoria > self.limite_memoria:
+                _, (_, tamano_viejo) = self._entradas.popitem(last=False)
+                self.memoria -= tamano_viejo
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.memoria = 0
+
+class Tarea:
+    """
+    Handle of one scheduled job. The job function receives it, reports progress
+    with `progreso()` from any thread and calls `comprobar()` between stages,
+    so cancellation is cooperative.
+    """
+    def __init__(self, clave, raiz, al_progresar=None):
+        self.clave = clave
+        self.raiz = raiz # Tk root; every UI event goes through raiz.after
+        self.al_progresar = al_progresar
+        self.cancel_event = threading.Event() # Handed to engines that accept cancel_event
+        self.futuro = None
+        self._ultimo = None # Last (stage, whole percent) sent, to drop redundant Tk events
+
+    @property
+    def cancelada(self):
+        return self.cancel_event.is_set()
+
+    def cancelar(self):
+        self.cancel_event.set()
+
+    def comprobar(self):
+        """Raises InterruptedError once the job has been cancelled."""
+        if self.cancel_event.is_set():
+            raise InterruptedError("Análisis cancelado.")
+
+    def progreso(self, pct, etapa=""):
+        """Sends (pct, stage) to the Tk thread, at most once per whole percent and stage."""
+        pct = max(0.0, min(100.0, float(pct)))
+        if self.al_progresar is None or (etapa, int(pct)) == self._ultimo:
+            return
+        self._ultimo = (etapa, int(pct))
+        self.raiz.after(0, self.al_progresar, pct, etapa)
+
+    def subrango(self, inicio, fin, etapa=""):
+        """Callback mapping an engine's 0-100 progress onto [inicio, fin] percent."""
+        def callback(pct):
+            self.progreso(inicio + (fin - inicio) * pct / 100, etapa)
+        return callback
+
+class PlanificadorTareas:
+    """
+    Runs analysis jobs on a bounded thread pool. Submitting a key that is already
+    queued or running returns that job instead of starting it twice, and the
+    completion, error and cancellation callbacks always run on the Tk thread.
+    """
+    def __init__(self, raiz, max_hilos=2):
+        self.raiz = raiz
+        self.executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="analisis")
+        self.activas = {} # clave -> Tarea queued or running
+        self._lock = threading.Lock()
+
+    def enviar(self, clave, funcion, al_terminar=None, al_fallar=None, al_cancelar=None, al_progresar=None):
+        """
+        Schedules `funcion(tarea)`. Returns (tarea, nueva); `nueva` is False when the
+        same key was already pending and this request was coalesced into it.
+        """
+        with self._lock:
+            tarea = self.activas.get(clave)
+            if tarea is not None:
+                return tarea, False
+            tarea = Tarea(clave, self.raiz, al_progresar)
+            self.activas[clave] = tarea
+        tarea.futuro = self.executor.submit(self._ejecutar, tarea, funcion, al_terminar, al_fallar, al_cancelar)
+        return tarea, True
+
+    def _ejecutar(self, tarea, funcion, al_terminar, al_fallar, al_cancelar):
+        try:
+            tarea.comprobar() # Cancelled while still queued
+            callback, argumento = al_terminar, funcion(tarea)
+            tarea.comprobar()
+        except InterruptedError as e:
+            callback, argumento = al_cancelar, str(e)
+        except Exception as e:
+            callback, argumento = al_fallar, str(e)
+        # Leave the active set before notifying, so a new request is never coalesced into a finished job
+        with self._lock:
+            self.activas.pop(tarea.clave, None)
+        if callback is not None:
+            self.raiz.after(0, callback, argumento)
+
+    def cancelar(self, clave=None):
+        """Cancels the job with `clave`, or every pending job when no key is given."""
+        with self._lock:
+            tareas = list(self.activas.values()) if clave is None else [self.activas[clave]] if clave in self.activas else []
+        for tarea in tareas:
+            tarea.cancelar()
+        return len(tareas)
+
+    def __len__(self):
+        with self._lock:
+            return len(self.activas)
+
+    def cerrar(self):
+        """Cancels everything and stops the pool without waiting for running jobs."""
+        self.cancelar()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
 # =============================================================================
 # ANALYTICAL LOGIC (BACKEND)
 # =============================================================================
 
+class MotorCorrelacion:
+    """
+    Blocked correlation engine. Columns are standardised once and the matrix is
+    built from BLAS tile products spread over a thread pool. Missing values are
+    handled pairwise, like DataFrame.corr().
+    """
+    ELEMENTOS_POR_PASO = 2 ** 20 # Size of the n x columns temporaries of one pairwise Spearman step
+
+    def __init__(self, df, columnas, tamano_bloque=64, n_hilos=None):
+        self.df = df
+        self.columnas = list(columnas)
+        self.tamano_bloque = tamano_bloque
+        self.n_hilos = n_hilos or os.cpu_count() or 1
+        self._rangos = None # Ranks cached for Spearman
+        self._orden = None # Per-column sort order, for pairwise Spearman ranks
+        self._inicio = self._fin = None # Tie group bounds of each sorted position
+
+    def _valores(self):
+        return self.df[self.columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _pares_de_bloques(self):
+        m = len(self.columnas)
+        bloques = [(i, min(i + self.tamano_bloque, m)) for i in range(0, m, self.tamano_bloque)]
+        return [(bi, bj) for a, bi in enumerate(bloques) for bj in bloques[a:]] # Upper tiles only
+
+    def _pearson(self, x):
+        m = x.shape[1]
+        validos = ~np.isnan(x)
+        resultado = np.full((m, m), np.nan)
+
+        if validos.all():
+            # Standardise once: each tile is then a single matrix product
+            with np.errstate(invalid='ignore', divide='ignore'):
+                z = (x - x.mean(axis=0)) / (x.std(axis=0, ddof=1) * np.sqrt(x.shape[0] - 1))
+
+            def tesela(bi, bj):
+                (i0, i1), (j0, j1) = bi, bj
+                resultado[i0:i1, j0:j1] = z[:, i0:i1].T @ z[:, j0:j1]
+        else:
+            # Pairwise-complete sums via masked products, on mean-centred data for stability
+            mascara = validos.astype(np.float64)
+            x0 = np.where(validos, x - np.nanmean(x, axis=0), 0.0)
+            x0_2 = x0 * x0
+
+            def tesela(bi, bj):
+                (i0, i1), (j0, j1) = bi, bj
+                mi, mj = mascara[:, i0:i1], mascara[:, j0:j1]
+                xi, xj = x0[:, i0:i1], x0[:, j0:j1]
+                n = mi.T @ mj
+                sx, sy = xi.T @ mj, mi.T @ xj
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    cov = xi.T @ xj - sx * sy / n
+                    var_x = x0_2[:, i0:i1].T @ mj - sx ** 2 / n
+                    var_y = mi.T @ x0_2[:, j0:j1] - sy ** 2 / n
+                    r = cov / np.sqrt(var_x * var_y)
+                r[n < 2] = np.nan
+                resultado[i0:i1, j0:j1] = r
+
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            list(pool.map(lambda par: tesela(*par), self._pares_de_bloques()))
+
+        # Mirror the computed upper triangle into the lower one
+        resultado = np.triu(resultado) + np.triu(resultado, 1).T
+        resultado = np.clip(resultado, -1.0, 1.0)
+        diagonal = np.diag(resultado).copy()
+        np.fill_diagonal(resultado, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return resultado
+
+    def _kendall(self, x):
+        m = x.shape[1]
+        resultado = np.eye(m)
+        validos = ~np.isnan(x)
+
+        def tau(par):
+            i, j = par
+            filas = validos[:, i] & validos[:, j]
+            if filas.sum() < 2:
+                return par, np.nan
+            return par, stats.kendalltau(x[filas, i], x[filas, j])[0]
+
+        pares = [(i, j) for i in range(m) for j in range(i + 1, m)]
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            for (i, j), valor in pool.map(tau, pares):
+                resultado[i, j] = resultado[j, i] = valor
+        return resultado
+
+    @staticmethod
+    def _grupos_empate(ordenados):
+        """First and last sorted position of each value's tie group, for columns sorted along axis 0."""
+        n = ordenados.shape[0]
+        posiciones = np.arange(n)[:, None]
+        nuevo = np.ones(ordenados.shape, dtype=bool)
+        nuevo[1:] = ordenados[1:] != ordenados[:-1]
+        ultimo = np.ones(ordenados.shape, dtype=bool)
+        ultimo[:-1] = nuevo[1:]
+        inicio = np.maximum.accumulate(np.where(nuevo, posiciones, 0), axis=0)
+        fin = np.minimum.accumulate(np.where(ultimo, posiciones, n - 1)[::-1], axis=0)[::-1]
+        return inicio, fin
+
+    @staticmethod
+    def _rangos_en(incluidas, inicio, fin):
+        """
+        Average ranks, in sorted order, of each value among the rows flagged in
+        `incluidas`: a running count of flagged rows read at the ends of its tie group.
+        """
+        acumulado = np.cumsum(incluidas, axis=0)
+        menores = np.where(inicio > 0, np.take_along_axis(acumulado, np.maximum(inicio - 1, 0), axis=0), 0)
+        hasta = np.take_along_axis(acumulado, fin, axis=0)
+        return (menores + 1 + hasta) / 2
+
+    def _spearman(self):
+        """
+        Pearson on ranks. Each column is ranked and sorted once. Pairs that
+        involve a column with missing values need ranks over their own common
+        rows, as DataFrame.corr('spearman') does: those come from running counts
+        along each column's sort order, one column against a block of others
+        per vectorised step, instead of re-sorting every pair.
+        """
+        if self._rangos is None:
+            self._rangos = self.df[self.columnas].rank(axis=0).to_numpy(dtype=np.float64, na_value=np.nan)
+        resultado = self._pearson(self._rangos)
+        validos = ~np.isnan(self._rangos)
+        m = len(self.columnas)
+        con_nan = ~validos.all(axis=0)
+        if not con_nan.any():
+            return resultado
+        x = self._valores()
+        n = len(x)
+        if self._orden is None:
+            tipo = np.int32 if n < 2 ** 31 else np.int64
+            orden = np.argsort(x, axis=0, kind='stable') # NaN last
+            inicio, fin = self._grupos_empate(np.take_along_axis(x, orden, axis=0))
+            self._orden, self._inicio, self._fin = orden.astype(tipo), inicio.astype(tipo), fin.astype(tipo)
+        ancho = max(1, min(m, self.ELEMENTOS_POR_PASO // max(n, 1))) # Columns per step, bounding the n x ancho temporaries
+        tareas = []
+        for i in range(m):
+            otras = np.arange(i + 1, m)
+            otras = otras if con_nan[i] else otras[con_nan[otras]]
+            tareas.extend((i, otras[k:k + ancho]) for k in range(0, len(otras), ancho))
+
+        def paso(tarea):
+            i, cols = tarea
+            # Everything is laid out in column i's sort order, where its ranks come out directly
+            orden_i = self._orden[:, i]
+            validas_j = validos[orden_i[:, None], cols]
+            rangos_i = self._rangos_en(validas_j, self._inicio[:, [i]], self._fin[:, [i]]) # Over the rows shared with each column
+            orden_j = self._orden[:, cols]
+            rangos_j = np.empty((n, len(cols))) # Ranks of each column over the rows it shares with i
+            np.put_along_axis(rangos_j, orden_j, self._rangos_en(validos[orden_j, i], self._inicio[:, cols], self._fin[:, cols]), axis=0)
+            rangos_j = rangos_j[orden_i]
+            comunes = validas_j & validos[orden_i, i][:, None]
+            k = comunes.sum(axis=0)
+            centro = (k + 1) / 2 # Average ranks 1..k always have this mean
+            a = np.where(comunes, rangos_i - centro, 0.0)
+            b = np.where(comunes, rangos_j - centro, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                r = (a * b).sum(axis=0) / np.sqrt((a * a).sum(axis=0) * (b * b).sum(axis=0))
+            r[k < 2] = np.nan
+            return i, cols, np.clip(r, -1.0, 1.0)
+
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            for i, cols, r in pool.map(paso, tareas):
+                resultado[i, cols] = resultado[cols, i] = r
+        return resultado
+
+    def matriz(self, metodo='pearson'):
+        """Returns the correlation matrix as a DataFrame ('pearson', 'spearman' or 'kendall')."""
+        if metodo == 'pearson':
+            valores = self._pearson(self._valores())
+        elif metodo == 'spearman':
+            valores = self._spearman()
+        elif metodo == 'kendall':
+            valores = self._kendall(self._valores())
+        else:
+            raise ValueError(f"Método de correlación no soportado: '{metodo}'.")
+        return pd.DataFrame(valores, index=self.columnas, columns=self.columnas)
+
+    @staticmethod
+    def pares_fuertes(matriz, umbral=None, top_k=None):
+        """Lists variable pairs ordered by |r|, keeping those above `umbral` and/or the `top_k` strongest."""
+        valores = matriz.to_numpy()
+        i, j = np.triu_indices_from(valores, k=1)
+        r = valores[i, j]
+        seleccion = ~np.isnan(r)
+        if umbral is not None:
+            seleccion &= np.abs(r) >= umbral
+        i, j, r = i[seleccion], j[seleccion], r[seleccion]
+        orden = np.argsort(-np.abs(r), kind='stable')
+        if top_k is not None:
+            orden = orden[:top_k]
+        columnas = np.asarray(matriz.columns)
+        return pd.DataFrame({'Variable 1': columnas[i[orden]], 'Variable 2': columnas[j[orden]], 'Correlación': r[orden]})
+
+class ResumenDistribucion:
+    """
+    Histogram bins and box-plot statistics of a numeric column, computed once
+    with NumPy. Figures are built from these aggregates, so their size does
+    not grow with the number of rows; only a capped sample of outliers is kept.
+    """
+    def __init__(self, bordes, conteos, q1, mediana, q3, bigote_inf, bigote_sup, media, n, outliers, n_outliers):
+        self.bordes = bordes
+        self.conteos = conteos
+        self.q1 = q1
+        self.mediana = mediana
+        self.q3 = q3
+        self.bigote_inf = bigote_inf
+        self.bigote_sup = bigote_sup
+        self.media = media
+        self.n = n
+        self.outliers = outliers
+        self.n_outliers = n_outliers
+
+    @classmethod
+    def desde_serie(cls, serie, bins='auto', max_bins=200, max_outliers=2_000, semilla=0):
+        """Aggregates a numeric Series (NaNs ignored)."""
+        valores = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        valores = valores[np.isfinite(valores)]
+        if not len(valores):
+            raise ValueError("La variable no tiene valores numéricos válidos.")
+        bordes = np.histogram_bin_edges(valores, bins=bins)
+        if len(bordes) - 1 > max_bins: # "auto" can ask for thousands of bins on huge columns
+            bordes = np.linspace(bordes[0], bordes[-1], max_bins + 1)
+        conteos, bordes = np.histogram(valores, bins=bordes)
+
+        q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+        iqr = q3 - q1
+        # Tukey fences; the whiskers stop at the most extreme values inside them
+        dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+        fuera = valores[(valores < q1 - 1.5 * iqr) | (valores > q3 + 1.5 * iqr)]
+        n_outliers = len(fuera)
+        if n_outliers > max_outliers: # Only a sample of the outliers is drawn
+            fuera = np.random.default_rng(semilla).choice(fuera, max_outliers, replace=False)
+        return cls(bordes, conteos, q1, mediana, q3, dentro.min(), dentro.max(), valores.mean(), len(valores), fuera, n_outliers)
+
+    @property
+    def centros(self):
+        return (self.bordes[:-1] + self.bordes[1:]) / 2
+
+    @property
+    def anchos(self):
+        return np.diff(self.bordes)
+
+    def traza_histograma(self, **kwargs):
+        return go.Bar(x=self.centros, y=self.conteos, width=self.anchos, **kwargs)
+
+    def traza_box(self, **kwargs):
+        """Box trace from the precomputed quartiles and fences (no raw data)."""
+        return go.Box(q1=[self.q1], median=[self.mediana], q3=[self.q3], lowerfence=[self.bigote_inf],
+                      upperfence=[self.bigote_sup], mean=[self.media], y=[0], orientation='h', **kwargs)
+
+    def traza_outliers(self, **kwargs):
+        return go.Scatter(x=self.outliers, y=np.zeros(len(self.outliers)), mode='markers', **kwargs)
+
 class AnalizadorExploratorio:
     """Performs basic descriptive and exploratory analysis."""
-    def __init__(self, df):
-        if not isinstance(df, pd.DataFrame):
-            raise ValueError("Se requiere un DataFrame de pandas.")
-        self.df = df.copy() # Work with a copy to avoid modifying original
+    def __init__(self, df, cargador=None):
+        self.dataset = DatasetCompartido.envolver(df, cargador)
+        self.df = self.dataset.df # Shared, read-only reference (no copy)
+        self.cargador = self.dataset.cargador # Chunk source for full-file passes when the frame was truncated
         self.numeric_cols = self.df.select_dtypes(include=np.number).columns.tolist()
         # Ensure 'object' and 'category' dtypes are explicitly included for categorical
         self.categorical_cols = self.df.select_dtypes(include=['object', 'category']).columns.tolist()
@@ -61,25 +915,48 @@ class AnalizadorExploratorio:
             return f"📊 Distribución Binned para '{var}' (bins automáticos):\n\n{freq_table.to_string()}", freq_table
 
 
-    def plot_correlacion(self):
+    def plot_correlacion(self, metodo='pearson', umbral=None, top_k=None, max_columnas_heatmap=40):
         if not self.numeric_cols:
             return None, "No hay columnas numéricas para calcular la correlación."
-        corr_matrix = self.df[self.numeric_cols].corr()
-        fig = px.imshow(corr_matrix, text_auto=True, aspect="auto",
+        motor = self.dataset.motor_correlacion(self.numeric_cols)
+        corr_matrix = motor.matriz(metodo)
+
+        if umbral is None and top_k is None and len(self.numeric_cols) <= max_columnas_heatmap:
+            heatmap_matrix = corr_matrix
+            text = f"Matriz de Correlación ({metodo}):\n\n{corr_matrix.to_string()}"
+        else:
+            # Only the strong pairs are reported; the heatmap shows the columns involved in them
+            pares = motor.pares_fuertes(corr_matrix, umbral=umbral, top_k=top_k if top_k is not None else max_columnas_heatmap)
+            if pares.empty:
+                criterio = f"|r| >= {umbral}" if umbral is not None else f"top {top_k}"
+                return None, f"Ningún par de variables alcanza {criterio} ({metodo})."
+            columnas = pd.unique(pares[['Variable 1', 'Variable 2']].to_numpy().ravel())[:max_columnas_heatmap]
+            heatmap_matrix = corr_matrix.loc[columnas, columnas]
+            criterio = f"|r| >= {umbral}" if umbral is not None else f"top {len(pares)}"
+            text = f"Pares más correlacionados ({metodo}, {criterio}):\n\n{pares.to_string(index=False)}"
+
+        fig = px.imshow(heatmap_matrix, text_auto=len(heatmap_matrix) <= 20, aspect="auto",
                         color_continuous_scale='RdYlBu',
                         title="Mapa de Calor de Correlación Interactivo")
         fig.update_layout(template="plotly_dark", title_x=0.5, font=dict(color="white", size=12)) # Consistent font
-        return fig, f"Matriz de Correlación:\n\n{corr_matrix.to_string()}"
+        return fig, text
 
     def plot_distribucion(self, var):
         if var not in self.df.columns:
             return None, "Variable no encontrada."
         
         # Use more descriptive titles
-        if self.df[var].dtype in np.number:
-            fig = px.histogram(self.df, x=var, marginal="box",
-                               title=f"Distribución y Boxplot de '{var}'",
-                               color_discrete_sequence=['#45a29e'])
+        if pd.api.types.is_numeric_dtype(self.df[var]):
+            # Bins and box statistics are aggregated here; the figure never carries the raw column
+            resumen = ResumenDistribucion.desde_serie(self.df[var])
+            fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+            fig.add_trace(resumen.traza_box(name=var, marker=dict(color='#45a29e')), row=1, col=1)
+            fig.add_trace(resumen.traza_outliers(name='Outliers', marker=dict(color='#45a29e', size=4)), row=1, col=1)
+            fig.add_trace(resumen.traza_histograma(name=var, marker=dict(color='#45a29e')), row=2, col=1)
+            fig.update_yaxes(showticklabels=False, row=1, col=1)
+            fig.update_xaxes(title_text=var, row=2, col=1)
+            fig.update_yaxes(title_text="count", row=2, col=1)
+            fig.update_layout(title_text=f"Distribución y Boxplot de '{var}'", showlegend=False, bargap=0)
         else: # Categorical or object type
             counts = self.df[var].value_counts().reset_index()
             counts.columns = ['Category', 'Count'] # Renaming for clarity
@@ -91,37 +968,573 @@ class AnalizadorExploratorio:
         return fig, f"Gráfico de Distribución para '{var}' generado."
 
 
+class CalculadorVIF:
+    """
+    Variance inflation factors from the predictor correlation matrix R:
+    VIF_j = [R^-1]_jj, so every VIF comes out of one factorisation instead
+    of one auxiliary regression per predictor.
+    """
+    LIMITE_CONDICION = 1e12 # Above this VIF the Cholesky inverse is no longer trusted
+
+    @classmethod
+    def desde_correlacion(cls, correlacion):
+        corr = np.array(correlacion, dtype=np.float64)
+        vif = np.full(corr.shape[0], np.inf)
+        # Zero-variance predictors are collinear with the intercept
+        validas = np.isfinite(np.diag(corr)) & (np.abs(np.diag(corr) - 1) < 1e-8)
+        if not validas.any():
+            return vif
+        sub = corr[np.ix_(validas, validas)]
+        try:
+            l_inv = np.linalg.inv(np.linalg.cholesky(sub))
+            valores = (l_inv ** 2).sum(axis=0) # diag(R^-1) = column sums of (L^-1)^2
+            if np.isfinite(valores).all() and valores.max() < cls.LIMITE_CONDICION:
+                vif[validas] = valores
+                return vif
+        except np.linalg.LinAlgError:
+            pass
+        vif[validas] = cls._desde_autovalores(sub)
+        return vif
+
+    @staticmethod
+    def _desde_autovalores(corr):
+        """Near-singular fallback: predictors loading on a null direction of R get an infinite VIF."""
+        autovalores, autovectores = np.linalg.eigh(corr)
+        nulos = autovalores <= autovalores.max() * 1e-10
+        cargas = autovectores ** 2
+        vif = (cargas[:, ~nulos] / autovalores[~nulos]).sum(axis=1)
+        vif[cargas[:, nulos].sum(axis=1) > 1e-8] = np.inf
+        return vif
+
+    @classmethod
+    def comparar_con_statsmodels(cls, n_filas=20_000, n_predictores=50, semilla=0):
+        """Benchmark against the variance_inflation_factor loop on correlated synthetic data."""
+        rng = np.random.default_rng(semilla)
+        latentes = rng.normal(size=(n_filas, max(n_predictores // 5, 1)))
+        mezcla = rng.normal(size=(latentes.shape[1], n_predictores))
+        x = latentes @ mezcla + rng.normal(size=(n_filas, n_predictores))
+        exog = np.column_stack([np.ones(n_filas), x])
+
+        inicio = time.perf_counter()
+        referencia = np.array([variance_inflation_factor(exog, i) for i in range(1, exog.shape[1])])
+        tiempo_statsmodels = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        rapido = cls.desde_correlacion(np.corrcoef(x, rowvar=False))
+        tiempo_matriz = time.perf_counter() - inicio
+
+        return {
+            'filas': n_filas,
+            'predictores': n_predictores,
+            'segundos_statsmodels': tiempo_statsmodels,
+            'segundos_correlacion': tiempo_matriz,
+            'aceleracion': tiempo_statsmodels / tiempo_matriz if tiempo_matriz else np.inf,
+            'max_error_relativo': float(np.max(np.abs(rapido - referencia) / referencia)),
+        }
+
+class GramOLS:
+    """
+    Sufficient statistics for OLS: the cross-product matrix of [1, columns]
+    (X'X, X'y and y'y for every column at once), accumulated over the row
+    chunks that are complete in all of `columnas`. Any model on a subset of the
+    columns is solved without touching the rows again, as long as the subset
+    drops the same rows (see cubre()).
+    """
+    MAX_PATRONES = 4_096 # Distinct missing-value patterns kept before falling back to per-column counts
+
+    def __init__(self, columnas):
+        self.columnas = list(columnas)
+        self._pos = {col: i + 1 for i, col in enumerate(self.columnas)} # 0 is the intercept
+        k = len(self.columnas) + 1
+        self.gram = np.zeros((k, k))
+        self.desplazamiento = None # Column shift (first chunk means) that keeps the sums well conditioned
+        self.n = 0
+        self.descartadas = 0 # Rows dropped for a missing value in any of the columns
+        self.faltantes = np.zeros(len(self.columnas), dtype=np.int64) # NaN count per column
+        self._patrones = np.zeros((0, len(self.columnas)), dtype=bool) # Distinct NaN masks of dropped rows, None once too many
+
+    def actualizar(self, bloque):
+        """Adds the rows of a chunk that are complete in every column."""
+        x = bloque[self.columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+        nulos = np.isnan(x)
+        incompletas = nulos.any(axis=1)
+        if incompletas.any():
+            self.descartadas += int(incompletas.sum())
+            self.faltantes += nulos.sum(axis=0)
+            if self._patrones is not None:
+                patrones = np.unique(np.vstack([self._patrones, nulos[incompletas]]), axis=0)
+                self._patrones = patrones if len(patrones) <= self.MAX_PATRONES else None
+            x = x[~incompletas]
+        if not len(x):
+            return
+        if self.desplazamiento is None:
+            self.desplazamiento = x.mean(axis=0)
+        z = np.column_stack([np.ones(len(x)), x - self.desplazamiento])
+        self.gram += z.T @ z
+        self.n += len(x)
+
+    @classmethod
+    def desde_bloques(cls, bloques, columnas):
+        gram = cls(columnas)
+        for bloque in bloques:
+            gram.actualizar(bloque)
+        return gram
+
+    def cubre(self, columnas):
+        """True when every dropped row has a NaN in `columnas`, so their model sees exactly the summed rows."""
+        if any(col not in self._pos for col in columnas):
+            return False
+        if not self.descartadas:
+            return True
+        idx = [self._pos[col] - 1 for col in columnas]
+        if self._patrones is not None:
+            return bool(self._patrones[:, idx].any(axis=1).all())
+        # Too many patterns kept: only sure when every column that has a NaN is in the model
+        return not np.delete(self.faltantes, idx).any()
+
+    def resolver(self, y_var, x_vars, obtener_bloques=None, max_muestra=None):
+        """
+        Solves y ~ const + x_vars from the cached sums alone. `obtener_bloques()` yields
+        the row chunks again when residual diagnostics are first asked for.
+        """
+        if self.n == 0:
+            raise ValueError("No quedan datos válidos después de eliminar filas con valores faltantes.")
+        idx = [0] + [self._pos[col] for col in x_vars]
+        iy = self._pos[y_var]
+        xtx = self.gram[np.ix_(idx, idx)]
+        xty = self.gram[idx, iy]
+        yty = self.gram[iy, iy]
+        k = len(idx)
+
+        xtx_inv = np.linalg.pinv(xtx)
+        beta = xtx_inv @ xty
+        ssr = max(yty - beta @ xty, 0.0)
+        tss = yty - self.gram[0, iy] ** 2 / self.n # Centred total sum of squares
+        df_resid = self.n - k
+        sigma2 = ssr / df_resid if df_resid > 0 else np.nan
+        cov = xtx_inv * sigma2
+
+        # Undo the column shift: slopes are unchanged, the intercept absorbs the shifts
+        c_x = self.desplazamiento[[i - 1 for i in idx[1:]]]
+        c_y = self.desplazamiento[iy - 1]
+        t = np.eye(k)
+        t[0, 1:] = -c_x
+        beta = t @ beta
+        beta[0] += c_y
+        cov = t @ cov @ t.T
+        return ResultadosOLS(y_var, x_vars, beta, cov, self.n, ssr, tss, obtener_bloques, max_muestra,
+                             correlacion_exog=self.correlacion(x_vars))
+
+    def correlacion(self, columnas):
+        """Pearson correlation of the given columns over the summed rows."""
+        idx = [self._pos[col] for col in columnas]
+        cov = self.gram[np.ix_(idx, idx)] - np.outer(self.gram[0, idx], self.gram[0, idx]) / self.n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            desv = np.sqrt(np.diag(cov))
+            return cov / np.outer(desv, desv)
+
+class ResumenResiduos:
+    """
+    Residual statistics streamed chunk by chunk: power sums for the moment
+    tests (omnibus, Jarque-Bera), lag-one differences for Durbin-Watson and
+    X'X, X'e^2 for Breusch-Pagan. Only a reservoir sample of at most
+    `max_muestra` residuals (all of them when None) is kept for the plots
+    and the rank-based tests.
+    """
+    def __init__(self, params, max_muestra=None, semilla=0):
+        self.params = np.asarray(params, dtype=np.float64)
+        self.max_muestra = max_muestra
+        self._rng = np.random.default_rng(semilla)
+        k = len(self.params)
+        self.n = 0
+        self.potencias = np.zeros(4) # Sums of e, e^2, e^3, e^4
+        self.suma_dif2 = 0.0 # Sum of (e_t - e_t-1)^2, across chunk boundaries
+        self._ultimo = None
+        self.xtx = np.zeros((k, k))
+        self.xtu2 = np.zeros(k)
+        self._posiciones, self._ajustados, self._resid = [], [], [] # Chunks while filling, then reservoir arrays
+
+    def actualizar(self, y, x):
+        """Adds the residuals of a chunk of complete rows (y, predictors without the constant)."""
+        if not len(y):
+            return
+        exog = np.column_stack([np.ones(len(y)), x])
+        ajustados = exog @ self.params
+        e = y - ajustados
+        e2 = e * e
+        self.potencias += [e.sum(), e2.sum(), (e2 * e).sum(), (e2 * e2).sum()]
+        dif = np.diff(e, prepend=e[0] if self._ultimo is None else self._ultimo)
+        self.suma_dif2 += dif @ dif
+        self._ultimo = e[-1]
+        self.xtx += exog.T @ exog
+        self.xtu2 += exog.T @ e2
+        self._muestrear(np.arange(self.n, self.n + len(e)), ajustados, e)
+        self.n += len(e)
+
+    def _muestrear(self, posiciones, ajustados, e):
+        """Algorithm R, vectorised over the chunk: row t replaces a random slot with probability max_muestra / (t + 1)."""
+        if isinstance(self._resid, list):
+            libres = len(e) if self.max_muestra is None else max(self.max_muestra - posiciones[0], 0)
+            self._posiciones.append(posiciones[:libres])
+            self._ajustados.append(ajustados[:libres])
+            self._resid.append(e[:libres])
+            if self.max_muestra is None or posiciones[-1] + 1 < self.max_muestra:
+                return
+            self._posiciones = np.concatenate(self._posiciones)
+            self._ajustados = np.concatenate(self._ajustados)
+            self._resid = np.concatenate(self._resid)
+            posiciones, ajustados, e = posiciones[libres:], ajustados[libres:], e[libres:]
+            if not len(e):
+                return
+        ranuras = self._rng.integers(0, posiciones + 1)
+        entran = ranuras < self.max_muestra
+        # Fancy assignment keeps the last write to a repeated slot, as the sequential algorithm would
+        self._posiciones[ranuras[entran]] = posiciones[entran]
+        self._ajustados[ranuras[entran]] = ajustados[entran]
+        self._resid[ranuras[entran]] = e[entran]
+
+    @property
+    def muestreado(self):
+        return self.max_muestra is not None and self.n > self.max_muestra
+
+    def muestra(self):
+        """(positions, fitted values, residuals) of the kept rows, in row order."""
+        if isinstance(self._resid, list):
+            partes = [np.concatenate(p) if p else np.zeros(0) for p in (self._posiciones, self._ajustados, self._resid)]
+            return partes[0].astype(np.int64), partes[1], partes[2]
+        orden = np.argsort(self._posiciones)
+        return self._posiciones[orden], self._ajustados[orden], self._resid[orden]
+
+    def momentos(self):
+        """Biased skewness and (non-excess) kurtosis from the central moments."""
+        s1, s2, s3, s4 = self.potencias / self.n
+        m2 = s2 - s1 ** 2
+        m3 = s3 - 3 * s1 * s2 + 2 * s1 ** 3
+        m4 = s4 - 4 * s1 * s3 + 6 * s1 ** 2 * s2 - 3 * s1 ** 4
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return m3 / m2 ** 1.5, m4 / m2 ** 2
+
+    def jarque_bera(self):
+        asimetria, curtosis = self.momentos()
+        jb = self.n / 6 * (asimetria ** 2 + (curtosis - 3) ** 2 / 4)
+        return jb, stats.chi2.sf(jb, 2)
+
+    def omnibus(self):
+        """D'Agostino-Pearson K^2 (what stats.normaltest computes), from the moments alone."""
+        n = self.n
+        if n < 8:
+            return np.nan, np.nan
+        asimetria, curtosis = self.momentos()
+        # Skewness z-score (D'Agostino 1970)
+        y = asimetria * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+        beta2 = 3.0 * (n ** 2 + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alfa = np.sqrt(2.0 / (w2 - 1))
+        y = 1.0 if y == 0 else y
+        z_asimetria = delta * np.log(y / alfa + np.sqrt((y / alfa) ** 2 + 1))
+        # Kurtosis z-score (Anscombe & Glynn 1983)
+        media = 3.0 * (n - 1) / (n + 1)
+        varianza = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+        x = (curtosis - media) / np.sqrt(varianza)
+        raiz_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+        a = 6.0 + 8.0 / raiz_beta1 * (2.0 / raiz_beta1 + np.sqrt(1 + 4.0 / raiz_beta1 ** 2))
+        denominador = 1 + x * np.sqrt(2 / (a - 4.0))
+        termino = np.nan if denominador == 0 else np.sign(denominador) * ((1 - 2.0 / a) / abs(denominador)) ** (1 / 3.0)
+        z_curtosis = (1 - 2 / (9.0 * a) - termino) / np.sqrt(2 / (9.0 * a))
+        k2 = z_asimetria ** 2 + z_curtosis ** 2
+        return k2, stats.chi2.sf(k2, 2)
+
+    def durbin_watson(self):
+        return self.suma_dif2 / self.potencias[1]
+
+    def breusch_pagan(self):
+        """Koenker's studentised LM = n * R^2 of e^2 on the regressors (statsmodels' default)."""
+        beta = np.linalg.pinv(self.xtx) @ self.xtu2
+        suma, suma_cuadrados = self.potencias[1], self.potencias[3] # Sums of u = e^2 and u^2
+        tss = suma_cuadrados - suma ** 2 / self.n
+        ess = beta @ self.xtu2 - suma ** 2 / self.n
+        lm = self.n * ess / tss
+        gl = len(self.params) - 1
+        return lm, stats.chi2.sf(lm, gl)
+
+    def numero_condicion(self):
+        """sqrt of the largest over the smallest eigenvalue of X'X, as statsmodels reports it."""
+        autovalores = np.linalg.eigvalsh(self.xtx)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(autovalores[-1] / autovalores[0])
+
+class ResultadosOLS:
+    """OLS results derived from sufficient statistics; residual statistics are only streamed when first needed."""
+    def __init__(self, y_var, x_vars, params, cov_params, nobs, ssr, tss, obtener_bloques=None, max_muestra=None,
+                 correlacion_exog=None):
+        self.y_var = y_var
+        self.exog_names = ['const'] + list(x_vars)
+        self.params = pd.Series(params, index=self.exog_names)
+        self.cov_params = pd.DataFrame(cov_params, index=self.exog_names, columns=self.exog_names)
+        self.bse = pd.Series(np.sqrt(np.diag(cov_params)), index=self.exog_names)
+        self.nobs = nobs
+        self.df_model = len(x_vars)
+        self.df_resid = nobs - len(self.exog_names)
+        self.ssr = ssr
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.rsquared = 1 - ssr / tss
+            self.rsquared_adj = 1 - (nobs - 1) / self.df_resid * (1 - self.rsquared)
+            self.fvalue = (self.rsquared / self.df_model) / ((1 - self.rsquared) / self.df_resid)
+            self.tvalues = self.params / self.bse
+        self.f_pvalue = stats.f.sf(self.fvalue, self.df_model, self.df_resid)
+        self.pvalues = pd.Series(2 * stats.t.sf(np.abs(self.tvalues), self.df_resid), index=self.exog_names)
+        mitad = nobs / 2
+        self.llf = -mitad * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1) if ssr > 0 else np.inf
+        self.aic = -2 * self.llf + 2 * (self.df_model + 1)
+        self.bic = -2 * self.llf + np.log(nobs) * (self.df_model + 1)
+        self._obtener_bloques = obtener_bloques # Callable yielding the row chunks the sums came from
+        self._max_muestra = max_muestra # Residuals kept for the plots and rank-based tests (None: all)
+        self.correlacion_exog = correlacion_exog # Predictor correlation matrix, enough for the VIFs
+
+    def conf_int(self, alpha=0.05):
+        q = stats.t.ppf(1 - alpha / 2, self.df_resid)
+        return pd.DataFrame({0: self.params - q * self.bse, 1: self.params + q * self.bse})
+
+    @cached_property
+    def residuos(self):
+        """One pass over the chunks, keeping the rows complete in the model's columns (the rows that were summed)."""
+        if self._obtener_bloques is None:
+            raise ValueError("Los residuos no están disponibles: el modelo se ajustó solo con estadísticos suficientes.")
+        resumen = ResumenResiduos(self.params.to_numpy(), self._max_muestra)
+        columnas = [self.y_var] + self.exog_names[1:]
+        for bloque in self._obtener_bloques():
+            datos = bloque[columnas].to_numpy(dtype=np.float64, na_value=np.nan)
+            datos = datos[~np.isnan(datos).any(axis=1)]
+            resumen.actualizar(datos[:, 0], datos[:, 1:])
+        return resumen
+
+    def summary(self):
+        conf = self.conf_int()
+        tabla = pd.DataFrame({
+            'coef': self.params, 'std err': self.bse, 't': self.tvalues, 'P>|t|': self.pvalues,
+            '[0.025': conf[0], '0.975]': conf[1],
+        })
+        texto = (
+            f"Resultados de Regresión OLS\n"
+            f"Variable dependiente: {self.y_var}\n"
+            f"Observaciones: {self.nobs}    Gl. modelo: {self.df_model}    Gl. residuos: {self.df_resid}\n"
+            f"R-cuadrado: {self.rsquared:.4f}    R-cuadrado ajustado: {self.rsquared_adj:.4f}\n"
+            f"Estadístico F: {self.fvalue:.4f}    Prob (F-estadístico): {self.f_pvalue:.4g}\n"
+            f"Log-verosimilitud: {self.llf:.4f}    AIC: {self.aic:.4f}    BIC: {self.bic:.4f}\n\n"
+            f"{tabla.to_string(float_format=lambda v: f'{v:.4f}')}"
+        )
+        if self._obtener_bloques is None:
+            return texto
+        residuos = self.residuos
+        omnibus, p_omnibus = residuos.omnibus()
+        jb, p_jb = residuos.jarque_bera()
+        asimetria, curtosis = residuos.momentos()
+        return (
+            f"{texto}\n\n"
+            f"Omnibus: {omnibus:.4f}    Prob(Omnibus): {p_omnibus:.4f}    Asimetría: {asimetria:.4f}    Curtosis: {curtosis:.4f}\n"
+            f"Jarque-Bera (JB): {jb:.4f}    Prob(JB): {p_jb:.4g}    Durbin-Watson: {residuos.durbin_watson():.4f}    "
+            f"Núm. condición: {residuos.numero_condicion():.4g}"
+        )
+
+class DiagnosticosRegresion:
+    """
+    Residual assumption tests that stay fast and meaningful on millions of
+    rows. They read the sums a ResumenResiduos streamed over the data, so
+    no full residual vector is needed: the normality test is chosen by
+    sample size, Breusch-Pagan and Durbin-Watson come straight from the
+    sums, and the three run concurrently on a thread pool, each one timed.
+    """
+    MAX_ANDERSON = 5_000 # Anderson-Darling up to here (the kept sample never holds fewer residuals)
+    MAX_DAGOSTINO = 100_000 # D'Agostino K^2 up to here, beyond: Jarque-Bera + K-S on a sample
+
+    def __init__(self, residuos, tamano_muestra=5_000, n_hilos=None, semilla=0):
+        self.residuos = residuos
+        self.tamano_muestra = tamano_muestra
+        self.n_hilos = n_hilos or min(3, os.cpu_count() or 1)
+        self.semilla = semilla
+
+    def _muestra(self):
+        """Uniform subsample without replacement of the kept residuals."""
+        resid = self.residuos.muestra()[2]
+        if len(resid) <= self.tamano_muestra:
+            return resid
+        rng = np.random.default_rng(self.semilla)
+        return resid[rng.choice(len(resid), self.tamano_muestra, replace=False)]
+
+    @staticmethod
+    def _pvalor_anderson(a2, n):
+        """D'Agostino & Stephens (1986) p-value approximation, mean and variance estimated."""
+        a = a2 * (1 + 0.75 / n + 2.25 / n ** 2)
+        if a >= 0.6:
+            return np.exp(1.2937 - 5.709 * a + 0.0186 * a ** 2)
+        if a >= 0.34:
+            return np.exp(0.9177 - 4.279 * a - 1.38 * a ** 2)
+        if a >= 0.2:
+            return 1 - np.exp(-8.318 + 42.796 * a - 59.938 * a ** 2)
+        return 1 - np.exp(-13.436 + 101.14 * a - 223.73 * a ** 2)
+
+    def normalidad(self):
+        n = self.residuos.n
+        if n < 8:
+            raise ValueError(f"Se necesitan al menos 8 residuos (hay {n}).")
+        if n <= self.MAX_ANDERSON:
+            resid = self.residuos.muestra()[2]
+            z = np.sort((resid - resid.mean()) / resid.std(ddof=1))
+            pesos = 2 * np.arange(1, n + 1) - 1
+            a2 = -n - (pesos * (stats.norm.logcdf(z) + stats.norm.logsf(z[::-1]))).sum() / n
+            return {'prueba': "Anderson-Darling", 'estadistico': a2, 'p_valor': self._pvalor_anderson(a2, n)}
+        if n <= self.MAX_DAGOSTINO:
+            k2, p_valor = self.residuos.omnibus()
+            return {'prueba': "D'Agostino K²", 'estadistico': k2, 'p_valor': p_valor}
+        # With millions of rows any deviation is "significant": report the moment-based JB on all
+        # residuals plus a K-S test on a sample whose p-value still carries information
+        jb, p_valor = self.residuos.jarque_bera()
+        muestra = self._muestra()
+        ks = stats.kstest((muestra - muestra.mean()) / muestra.std(ddof=1), 'norm')
+        return {'prueba': "Jarque-Bera + Kolmogorov-Smirnov", 'estadistico': jb, 'p_valor': p_valor,
+                'ks_estadistico': ks.statistic, 'ks_p_valor': ks.pvalue, 'ks_muestra': len(muestra)}
+
+    def breusch_pagan(self):
+        lm, p_valor = self.residuos.breusch_pagan()
+        return {'estadistico': lm, 'p_valor': p_valor}
+
+    def durbin_watson(self):
+        return {'estadistico': self.residuos.durbin_watson()}
+
+    def ejecutar(self, progress_callback=None):
+        """
+        Runs every test concurrently. Each entry holds the result or the error, plus its
+        time in seconds. `progress_callback(hechos, total)` is called as each test finishes.
+        """
+        pruebas = {'normalidad': self.normalidad, 'breusch_pagan': self.breusch_pagan,
+                   'durbin_watson': self.durbin_watson}
+
+        def cronometrar(funcion):
+            inicio = time.perf_counter()
+            try:
+                return funcion(), None, time.perf_counter() - inicio
+            except Exception as e:
+                return None, str(e), time.perf_counter() - inicio
+
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            futuros = {nombre: pool.submit(cronometrar, funcion) for nombre, funcion in pruebas.items()}
+            if progress_callback:
+                for hechos, _ in enumerate(as_completed(futuros.values()), start=1):
+                    progress_callback(hechos, len(futuros))
+            return {nombre: dict(zip(('resultado', 'error', 'segundos'), futuro.result()))
+                    for nombre, futuro in futuros.items()}
+
+class DatosDiagnosticos:
+    """
+    Trace data for the four regression diagnostic panels computed directly
+    with NumPy. Point traces are downsampled to `max_puntos` so the figure
+    stays small no matter how many residuals there are. `posiciones` are the
+    row numbers of a sampled residual vector, used on the order panel.
+    """
+    def __init__(self, resid, ajustados, max_puntos=4_000, n_bins=30, posiciones=None):
+        self.resid = np.asarray(resid, dtype=np.float64)
+        self.ajustados = np.asarray(ajustados, dtype=np.float64)
+        self.posiciones = posiciones
+        self.max_puntos = max_puntos
+        self.n_bins = n_bins
+
+    @staticmethod
+    def lttb(x, y, n_salida):
+        """Largest-Triangle-Three-Buckets: indices of the points that best keep the shape of an ordered line."""
+        n = len(x)
+        if n <= n_salida or n_salida < 3:
+            return np.arange(n)
+        bordes = np.linspace(1, n - 1, n_salida - 1).astype(np.int64)
+        elegidos = np.empty(n_salida, dtype=np.int64)
+        elegidos[0], elegidos[-1] = 0, n - 1
+        a = 0
+        for i in range(n_salida - 2):
+            inicio, fin = bordes[i], bordes[i + 1]
+            sig_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+            media_x = x[fin:sig_fin].mean()
+            media_y = y[fin:sig_fin].mean()
+            areas = np.abs((x[a] - media_x) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (media_y - y[a]))
+            a = inicio + int(np.argmax(areas))
+            elegidos[i + 1] = a
+        return elegidos
+
+    @staticmethod
+    def min_max(x, y, n_salida):
+        """Indices of the lowest and highest y in each of n_salida/2 equal-width x bins (for scatter clouds)."""
+        n = len(x)
+        if n <= n_salida:
+            return np.arange(n)
+        n_bins = max(n_salida // 2, 1)
+        rango = x.max() - x.min()
+        bins = np.zeros(n, dtype=np.int64) if rango == 0 else np.minimum(((x - x.min()) / rango * n_bins).astype(np.int64), n_bins - 1)
+        minimos = np.full(n_bins, np.inf)
+        maximos = np.full(n_bins, -np.inf)
+        np.minimum.at(minimos, bins, y)
+        np.maximum.at(maximos, bins, y)
+        # First row of each bin that attains the bin's extreme (no sort needed)
+        en_minimo = np.flatnonzero(y == minimos[bins])
+        en_maximo = np.flatnonzero(y == maximos[bins])
+        _, pos_min = np.unique(bins[en_minimo], return_index=True)
+        _, pos_max = np.unique(bins[en_maximo], return_index=True)
+        return np.unique(np.concatenate([en_minimo[pos_min], en_maximo[pos_max]]))
+
+    def dispersion(self):
+        idx = self.min_max(self.ajustados, self.resid, self.max_puntos)
+        return self.ajustados[idx], self.resid[idx]
+
+    def qq(self):
+        """Sample vs normal quantiles (positions i/(n+1)) and the standardised reference line."""
+        n = len(self.resid)
+        muestral = np.sort(self.resid)
+        teorico = stats.norm.ppf(np.arange(1, n + 1) / (n + 1))
+        idx = self.lttb(teorico, muestral, self.max_puntos)
+        linea_x = np.array([teorico[0], teorico[-1]])
+        linea_y = self.resid.mean() + self.resid.std() * linea_x
+        return teorico[idx], muestral[idx], linea_x, linea_y
+
+    def histograma(self):
+        conteos, bordes = np.histogram(self.resid, bins=self.n_bins)
+        return (bordes[:-1] + bordes[1:]) / 2, conteos, np.diff(bordes)
+
+    def orden(self):
+        x = np.arange(len(self.resid), dtype=np.float64) if self.posiciones is None else np.asarray(self.posiciones, dtype=np.float64)
+        idx = self.lttb(x, self.resid, self.max_puntos)
+        return x[idx], self.resid[idx]
+
 class AnalizadorRegresion:
     """Performs a complete multiple linear regression analysis."""
     def __init__(self, df):
-        self.df = df.copy() # Work with a copy
+        self.dataset = DatasetCompartido.envolver(df)
+        self.df = self.dataset.df # Shared, read-only reference (no copy)
         self.modelo = None
         self.resultados = None
 
-    def ejecutar_regresion(self, y_var, x_vars):
+    def ejecutar_regresion(self, y_var, x_vars, progress_callback=None):
+        """`progress_callback(hechos, total)` is called after the fit, the summary and each diagnostic test."""
         if not all(col in self.df.columns for col in [y_var] + x_vars):
             raise ValueError("Una o más variables seleccionadas no existen en el DataFrame.")
-        if self.df[[y_var] + x_vars].isnull().any().any():
+        numeric_cols = self.df.select_dtypes(include=np.number).columns.tolist()
+        if not all(col in numeric_cols for col in [y_var] + x_vars):
+            raise ValueError("Las variables independientes deben ser numéricas.")
+
+        # X'X, X'y and y'y of every numeric column are built once per dataset and reused
+        columnas = [y_var] + x_vars
+        gram = self.dataset.gram_ols(columnas)
+        if gram.descartadas:
             messagebox.showwarning("Datos Faltantes", "Se detectaron valores faltantes en las variables seleccionadas. Las filas con valores nulos serán omitidas para el análisis de regresión.")
-            df_cleaned = self.df[[y_var] + x_vars].dropna()
-            if df_cleaned.empty:
-                raise ValueError("No quedan datos válidos después de eliminar filas con valores faltantes.")
-        else:
-            df_cleaned = self.df[[y_var] + x_vars]
-
-        y = df_cleaned[y_var]
-        X = df_cleaned[x_vars]
-        
-        # Check for non-numeric types in X before adding constant
-        if not X.select_dtypes(include=np.number).columns.tolist() == X.columns.tolist():
-             raise ValueError("Las variables independientes deben ser numéricas.")
 
-        X = sm.add_constant(X) # Ensure 'const' is added only once
-        
-        self.modelo = sm.OLS(y, X).fit()
+        # Residual statistics are streamed over the same chunks as the sums (the whole file when the
+        # frame was truncated); only a sample as large as the in-memory frame is kept for the plots
+        self.modelo = gram.resolver(y_var, x_vars, obtener_bloques=self.dataset.bloques,
+                                    max_muestra=max(len(self.df), DiagnosticosRegresion.MAX_ANDERSON))
         self.resultados = self.modelo
+        if progress_callback:
+            progress_callback(1, 5)
         
         spss_summary = str(self.resultados.summary())
+        if progress_callback:
+            progress_callback(2, 5)
         
         r_squared = self.resultados.rsquared
         adj_r_squared = self.resultados.rsquared_adj
@@ -136,7 +1549,8 @@ class AnalizadorRegresion:
             f"Prob (F-estadístico): {f_pvalue:.4f}\n\n"
         )
         
-        texto_supuestos = self._generar_texto_supuestos()
+        texto_supuestos = self._generar_texto_supuestos(
+            progress_callback=(lambda hechos, total: progress_callback(2 + hechos, 2 + total)) if progress_callback else None)
         ecuacion = self._generar_ecuacion(y_var, x_vars)
         
         full_text_report = (
@@ -152,8 +1566,9 @@ class AnalizadorRegresion:
         if self.resultados is None:
             return None
         
-        fitted_vals = self.resultados.fittedvalues
-        residuals = self.resultados.resid
+        residuos = self.resultados.residuos
+        posiciones, ajustados, resid = residuos.muestra()
+        datos = DatosDiagnosticos(resid, ajustados, posiciones=posiciones)
         
         fig = make_subplots(rows=2, cols=2, 
                             subplot_titles=("Residuos vs. Valores Ajustados", "Gráfico Q-Q de Residuos",
@@ -162,6 +1577,7 @@ class AnalizadorRegresion:
                                    [{}, {}]])
 
         # 1. Residuos vs. Valores Ajustados
+        fitted_vals, residuals = datos.dispersion()
         fig.add_trace(go.Scatter(x=fitted_vals, y=residuals, mode='markers', 
                                  marker=dict(color='#17a2b8', opacity=0.7), name='Residuos'), row=1, col=1)
         fig.add_hline(y=0, line_dash="dash", line_color="gray", row=1, col=1) # Add a zero line
@@ -169,78 +1585,94 @@ class AnalizadorRegresion:
         fig.update_yaxes(title_text="Residuos", row=1, col=1)
 
         # 2. Gráfico Q-Q
-        qq_data = sm.ProbPlot(residuals).qqplot(ax=None, line='s')
-        qq_x = qq_data.get_axes()[0].get_lines()[0].get_xdata()
-        qq_y = qq_data.get_axes()[0].get_lines()[0].get_ydata()
-        line_x = qq_data.get_axes()[0].get_lines()[1].get_xdata()
-        line_y = qq_data.get_axes()[0].get_lines()[1].get_ydata()
-        plt.close(qq_data) # Close matplotlib figure to prevent memory issues
-        
+        qq_x, qq_y, line_x, line_y = datos.qq()
         fig.add_trace(go.Scatter(x=qq_x, y=qq_y, mode='markers', marker=dict(color='#ffc107'), name='Cuantiles'), row=1, col=2)
         fig.add_trace(go.Scatter(x=line_x, y=line_y, mode='lines', line=dict(color='#dc3545'), name='Línea teórica'), row=1, col=2)
         fig.update_xaxes(title_text="Cuantiles Teóricos", row=1, col=2)
         fig.update_yaxes(title_text="Cuantiles Muestrales", row=1, col=2)
 
-        # 3. Histograma de Residuos
-        hist_trace = px.histogram(x=residuals, color_discrete_sequence=['#45a29e'], nbins=30).data[0] # Add nbins
-        fig.add_trace(hist_trace, row=2, col=1)
+        # 3. Histograma de Residuos (bins counted with NumPy, drawn as bars)
+        centros, conteos, anchos = datos.histograma()
+        fig.add_trace(go.Bar(x=centros, y=conteos, width=anchos, marker=dict(color='#45a29e'), name='Residuos'), row=2, col=1)
         fig.update_xaxes(title_text="Residuos", row=2, col=1)
         fig.update_yaxes(title_text="Frecuencia", row=2, col=1)
 
         # 4. Residuos vs. Orden de Observación (for visual autocorrelation detection)
-        fig.add_trace(go.Scatter(y=residuals, mode='lines+markers', 
+        orden_x, orden_y = datos.orden()
+        fig.add_trace(go.Scatter(x=orden_x, y=orden_y, mode='lines+markers', 
                                  marker=dict(color='#66fcf1', opacity=0.7, size=4), name='Residuos por Orden'), row=2, col=2)
         fig.add_hline(y=0, line_dash="dash", line_color="gray", row=2, col=2)
         fig.update_xaxes(title_text="Orden de Observación", row=2, col=2)
         fig.update_yaxes(title_text="Residuos", row=2, col=2)
 
         fig.update_layout(height=800, width=1000, showlegend=False, template="plotly_dark", title_x=0.5, font=dict(color="white", size=12))
+        if residuos.muestreado:
+            fig.update_layout(title_text=f"Diagnósticos sobre una muestra aleatoria de {len(resid):,} de {residuos.n:,} residuos",
+                              margin=dict(t=100))
         return fig
 
-    def _generar_texto_supuestos(self):
-        x_vars = self.resultados.model.exog
-        exog_names = self.resultados.model.exog_names
+    def _generar_texto_supuestos(self, progress_callback=None):
+        exog_names = self.resultados.exog_names
         
         vif_data = pd.DataFrame()
         vif_data["Variable"] = [name for name in exog_names if name != 'const']
-        vif_values = []
-        # Calculate VIF only for independent variables
-        for i, name in enumerate(exog_names):
-            if name != 'const':
-                # Ensure the column is numeric for VIF calculation
-                if self.df[name].dtype in np.number:
-                    vif_values.append(variance_inflation_factor(x_vars, i))
-                else:
-                    vif_values.append(np.nan) # Handle non-numeric if somehow passed
-        vif_data["VIF"] = vif_values
+        # All VIFs at once from the inverse predictor correlation matrix
+        correlacion = self.resultados.correlacion_exog
+        if correlacion is None:
+            xtx = self.resultados.residuos.xtx
+            n = xtx[0, 0]
+            cov = xtx[1:, 1:] - np.outer(xtx[0, 1:], xtx[0, 1:]) / n
+            desv = np.sqrt(np.diag(cov))
+            correlacion = cov / np.outer(desv, desv)
+        vif_data["VIF"] = CalculadorVIF.desde_correlacion(np.atleast_2d(correlacion))
         
-        # Normality test
-        try:
-            shapiro = stats.shapiro(self.resultados.resid)
-            shapiro_text = f"Estadístico: {shapiro.statistic:.4f}, p-valor: {shapiro.pvalue:.4f}\n(p > 0.05 sugiere normalidad. Considerar muestra grande: K-S test o visualización Q-Q)"
-        except Exception as e:
-            shapiro_text = f"Error al calcular Shapiro-Wilk: {e} (posiblemente pocos datos o residuos constantes)."
+        residuos = self.resultados.residuos
+        diagnosticos = DiagnosticosRegresion(residuos).ejecutar(progress_callback)
+
+        # Normality test, chosen by sample size
+        normalidad = diagnosticos['normalidad']
+        if normalidad['error']:
+            normal_title = "Normalidad de Residuos"
+            normal_text = f"Error al calcular la prueba de normalidad: {normalidad['error']} (posiblemente pocos datos o residuos constantes)."
+        else:
+            res = normalidad['resultado']
+            normal_title = f"Normalidad de Residuos ({res['prueba']})"
+            normal_text = f"Estadístico: {res['estadistico']:.4f}, p-valor: {res['p_valor']:.4f}"
+            if 'ks_p_valor' in res:
+                normal_text += (f"\nK-S sobre muestra aleatoria de {res['ks_muestra']}: "
+                                f"estadístico {res['ks_estadistico']:.4f}, p-valor: {res['ks_p_valor']:.4f}")
+            normal_text += "\n(p > 0.05 sugiere normalidad. Con muestras grandes, apoyarse también en el gráfico Q-Q)"
 
         # Homoscedasticity test
-        try:
-            bp_test = sm.stats.het_breuschpagan(self.resultados.resid, self.resultados.model.exog)
-            bp_text = f"Estadístico: {bp_test[0]:.4f}, p-valor: {bp_test[1]:.4f}\n(p > 0.05 sugiere homocedasticidad)"
-        except Exception as e:
-            bp_text = f"Error al calcular Breusch-Pagan: {e} (posiblemente pocos datos o problemas de rango)."
+        bp = diagnosticos['breusch_pagan']
+        if bp['error']:
+            bp_text = f"Error al calcular Breusch-Pagan: {bp['error']} (posiblemente pocos datos o problemas de rango)."
+        else:
+            bp_text = f"Estadístico: {bp['resultado']['estadistico']:.4f}, p-valor: {bp['resultado']['p_valor']:.4f}\n(p > 0.05 sugiere homocedasticidad)"
 
         # Autocorrelation test
-        dw_test = sm.stats.durbin_watson(self.resultados.resid)
+        dw = diagnosticos['durbin_watson']
+        if dw['error']:
+            dw_text = f"Error al calcular Durbin-Watson: {dw['error']}"
+        else:
+            dw_text = f"Estadístico: {dw['resultado']['estadistico']:.4f}\n(Valores cercanos a 2 son ideales, 0 indica positiva, 4 negativa)"
+
+        tiempos = ", ".join(f"{nombre}: {d['segundos'] * 1000:.1f} ms" for nombre, d in diagnosticos.items())
 
         reporte = (
             f"--- No Multicolinealidad (VIF) ---\n"
             f"(Valores > 5-10 sugieren posible problema)\n{vif_data.to_string(index=False)}\n\n"
-            f"--- Normalidad de Residuos (Shapiro-Wilk) ---\n"
-            f"{shapiro_text}\n\n"
+            f"--- {normal_title} ---\n"
+            f"{normal_text}\n\n"
             f"--- Homocedasticidad (Breusch-Pagan) ---\n"
             f"{bp_text}\n\n"
             f"--- No Autocorrelación (Durbin-Watson) ---\n"
-            f"Estadístico: {dw_test:.4f}\n(Valores cercanos a 2 son ideales, 0 indica positiva, 4 negativa)\n"
+            f"{dw_text}\n\n"
+            f"(Tiempos de diagnóstico: {tiempos})\n"
         )
+        if residuos.muestreado:
+            reporte += (f"(Estadísticos calculados sobre los {residuos.n:,} residuos; gráficos y K-S sobre una muestra "
+                        f"aleatoria de {len(residuos.muestra()[2]):,})\n")
         return reporte
 
     def _generar_ecuacion(self, y_var, x_vars):
@@ -254,13 +1686,154 @@ class AnalizadorRegresion:
         return "".join(equation_parts) + "$"
 
 
+class BuscadorOrdenARIMA:
+    """
+    Auto-ARIMA order search. The differencing order d is picked first with
+    KPSS tests on the successively differenced series; the (p, q) grid is
+    then fitted on that already-differenced series in a process pool, in
+    rings of increasing p+q, and ranked by AIC or BIC. The search stops
+    early once a whole ring fails to improve the best model.
+    """
+    _serie_trabajador = None # Differenced series, set once per worker process by the pool initializer
+
+    def __init__(self, serie, p_max=3, d_max=2, q_max=3, criterio='aic', n_procesos=None):
+        self.serie = np.asarray(serie, dtype=np.float64)
+        self.p_max = p_max
+        self.d_max = d_max
+        self.q_max = q_max
+        self.criterio = criterio.lower()
+        self.n_procesos = n_procesos or os.cpu_count() or 1
+        self.diferencias = {0: self.serie} # d -> differenced series, computed once
+        self.resultados = pd.DataFrame(columns=['p', 'd', 'q', 'AIC', 'BIC'])
+
+    def serie_diferenciada(self, d):
+        if d not in self.diferencias:
+            self.diferencias[d] = np.diff(self.serie_diferenciada(d - 1))
+        return self.diferencias[d]
+
+    def elegir_d(self, alfa=0.05):
+        """Smallest d whose differenced series KPSS does not reject as stationary."""
+        for d in range(self.d_max + 1):
+            serie = self.serie_diferenciada(d)
+            if len(serie) < 10:
+                return max(d - 1, 0)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore") # KPSS warns when the p-value is outside its lookup table
+                p_valor = kpss(serie, regression='c', nlags='auto')[1]
+            if p_valor >= alfa:
+                return d
+        return self.d_max
+
+    @classmethod
+    def _iniciar_trabajador(cls, serie):
+        cls._serie_trabajador = serie
+
+    @classmethod
+    def _ajustar_candidato(cls, p, q, con_constante):
+        """Runs in a worker process: fits ARMA(p, q) on the shared differenced series."""
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                ajuste = sm.tsa.ARIMA(cls._serie_trabajador, order=(p, 0, q), trend='c' if con_constante else 'n').fit()
+            return p, q, ajuste.aic, ajuste.bic
+        except Exception:
+            return p, q, np.nan, np.nan
+
+    def buscar(self, progress_callback=None, cancel_event=None):
+        """
+        Returns the best (p, d, q). `progress_callback(hechos, total, mejor_orden)` is called
+        as each candidate finishes; setting `cancel_event` stops the search with InterruptedError.
+        """
+        d = self.elegir_d()
+        serie = self.serie_diferenciada(d)
+        anillos = [[(p, suma - p) for p in range(self.p_max + 1) if 0 <= suma - p <= self.q_max]
+                   for suma in range(self.p_max + self.q_max + 1)]
+        total = sum(len(anillo) for anillo in anillos)
+        filas = []
+        mejor = (np.inf, None)
+        with ProcessPoolExecutor(max_workers=min(self.n_procesos, total), initializer=self._iniciar_trabajador,
+                                 initargs=(serie,)) as pool:
+            for anillo in anillos:
+                mejor_previo = mejor[0]
+                futuros = [pool.submit(self._ajustar_candidato, p, q, d == 0) for p, q in anillo]
+                for futuro in as_completed(futuros):
+                    if cancel_event is not None and cancel_event.is_set():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        raise InterruptedError("Búsqueda de orden ARIMA cancelada.")
+                    p, q, aic, bic = futuro.result()
+                    filas.append({'p': p, 'd': d, 'q': q, 'AIC': aic, 'BIC': bic})
+                    valor = aic if self.criterio == 'aic' else bic
+                    if np.isfinite(valor) and valor < mejor[0]:
+                        mejor = (valor, (p, d, q))
+                    if progress_callback:
+                        progress_callback(len(filas), total, mejor[1])
+                if mejor[1] is not None and mejor[0] >= mejor_previo:
+                    break # A whole ring of larger models did not help
+
+        self.resultados = pd.DataFrame(filas).sort_values(self.criterio.upper(), na_position='last').reset_index(drop=True)
+        if mejor[1] is None:
+            raise ValueError("Ningún modelo candidato pudo ajustarse a la serie.")
+        return mejor[1]
+
+class CacheAjustesARIMA:
+    """
+    Fitted ARIMA results kept per (time column, target column, order). When the
+    same series comes back with rows appended, the new observations are fed
+    through the state-space `append` path instead of refitting from scratch.
+    """
+    MAX_PROPORCION_APPEND = 0.1 # Beyond this share of new rows the parameters are re-estimated (warm start)
+
+    def __init__(self, max_entradas=8):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict() # clave -> (index, values, model_fit), LRU order
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _es_prefijo(indice, valores, ts_data):
+        m = len(indice)
+        return (len(ts_data) >= m and ts_data.index[:m].equals(indice)
+                and np.array_equal(ts_data.to_numpy()[:m], valores, equal_nan=True))
+
+    def ajustar(self, clave, ts_data, order):
+        """Returns (model_fit, how it was obtained: 'reutilizado', 'append', 'warm' or 'nuevo')."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        modo = 'nuevo'
+        model_fit = None
+        if entrada is not None and self._es_prefijo(entrada[0], entrada[1], ts_data):
+            indice, _, previo = entrada
+            nuevas = ts_data.iloc[len(indice):]
+            if nuevas.empty:
+                model_fit, modo = previo, 'reutilizado'
+            elif len(nuevas) <= self.MAX_PROPORCION_APPEND * len(indice):
+                try:
+                    model_fit, modo = previo.append(nuevas, refit=False), 'append'
+                except Exception:
+                    model_fit = None # Index could not be extended: fall through to a warm refit
+            if model_fit is None:
+                model_fit = sm.tsa.ARIMA(ts_data, order=order).fit(start_params=previo.params)
+                modo = 'warm'
+        if model_fit is None:
+            model_fit = sm.tsa.ARIMA(ts_data, order=order).fit()
+
+        with self._lock:
+            self._entradas[clave] = (ts_data.index, ts_data.to_numpy(), model_fit)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return model_fit, modo
+
 class AnalizadorSeriesTiempo:
     """Performs time series forecasting using ARIMA."""
+    ajustes = CacheAjustesARIMA() # Shared by every analyzer instance, so fits outlive a reload of the file
+
     def __init__(self, df):
-        self.df = df.copy() # Work with a copy
+        self.dataset = DatasetCompartido.envolver(df)
+        self.df = self.dataset.df # Shared, read-only reference (no copy)
         self.model_fit = None
 
-    def ejecutar_arima(self, time_var, target_var, order=(5,1,0), steps=10):
+    def ejecutar_arima(self, time_var, target_var, order=(5,1,0), steps=10, auto=False, criterio='aic',
+                       progress_callback=None, cancel_event=None):
         if time_var not in self.df.columns or target_var not in self.df.columns:
             raise ValueError("Las columnas de tiempo o objetivo no existen en el DataFrame.")
         if not pd.api.types.is_numeric_dtype(self.df[target_var]):
@@ -269,8 +1842,10 @@ class AnalizadorSeriesTiempo:
         # Ensure time_var is datetime indexed for time series
         try:
             # Attempt to convert to datetime and handle potential errors
-            self.df[time_var] = pd.to_datetime(self.df[time_var], errors='coerce')
-            df_ts = self.df.dropna(subset=[time_var, target_var]) # Drop rows where time or target is null after conversion
+            # The parsed dates go into an overlay so the shared frame is never rewritten
+            fechas = self.dataset.fechas(time_var) # Parsed once per dataset, at load time for detected columns
+            df_ts = self.dataset.vista([time_var, target_var], reemplazos={time_var: fechas})
+            df_ts = df_ts.dropna(subset=[time_var, target_var]) # Drop rows where time or target is null after conversion
             if df_ts.empty:
                 raise ValueError("No quedan datos válidos de serie de tiempo después de limpiar valores nulos o fechas inválidas.")
             df_ts = df_ts.set_index(time_var).sort_index()
@@ -287,42 +1862,43 @@ class AnalizadorSeriesTiempo:
         # if pd.infer_freq(ts_data.index) is None:
         #     messagebox.showwarning("Frecuencia no inferida", "La frecuencia de la serie de tiempo no pudo ser inferida automáticamente. Esto puede afectar la precisión del modelo ARIMA.")
 
+        busqueda_text = ""
+        if auto:
+            buscador = BuscadorOrdenARIMA(ts_data.to_numpy(), criterio=criterio)
+            order = buscador.buscar(progress_callback, cancel_event)
+            busqueda_text = (
+                f"--- Búsqueda Automática de Orden (criterio {criterio.upper()}, {len(buscador.resultados)} modelos evaluados) ---\n"
+                f"{buscador.resultados.head(10).to_string(index=False, float_format=lambda v: f'{v:.2f}')}\n\n"
+            )
+
         try:
-            model = sm.tsa.ARIMA(ts_data, order=order)
-            self.model_fit = model.fit()
+            self.model_fit, fit_mode = self.ajustes.ajustar((time_var, target_var, tuple(order)), ts_data, order)
         except Exception as e:
             raise ValueError(f"Error al ajustar el modelo ARIMA: {e}. Verifique el orden (p,d,q) y la estacionalidad de la serie.")
 
-        forecast_results = self.model_fit.forecast(steps=steps)
+        # One forecast call serves both the point forecast and the intervals (report and plot)
+        forecast = self.model_fit.get_forecast(steps=steps)
+        forecast_ci = np.asarray(forecast.conf_int())
         
-        # Create a DataFrame for the forecast
-        last_date = ts_data.index[-1]
-        
-        # Generate future dates based on inferred frequency
-        # If infer_freq fails, fall back to a simple daily or hourly increment if the original data is consistent.
-        inferred_freq = pd.infer_freq(ts_data.index)
-        if inferred_freq:
-            forecast_index = pd.date_range(start=last_date, periods=steps + 1, freq=inferred_freq)[1:]
-        else:
-            # Fallback for when frequency can't be inferred (e.g., irregular data, very short series)
-            # This is a heuristic, better to ensure regular time series data.
-            # Assuming daily if dates are distinct, or hourly if timestamps are distinct.
-            if len(ts_data.index) > 1:
-                time_diff = ts_data.index.to_series().diff().dropna().mode()[0]
-                if time_diff == pd.Timedelta(days=1):
-                    forecast_index = pd.date_range(start=last_date, periods=steps + 1, freq='D')[1:]
-                elif time_diff == pd.Timedelta(hours=1):
-                    forecast_index = pd.date_range(start=last_date, periods=steps + 1, freq='H')[1:]
-                else:
-                    messagebox.showwarning("Frecuencia no inferida", "La frecuencia de la serie de tiempo no pudo ser inferida automáticamente. El pronóstico se basará en un incremento simple desde la última fecha, lo cual puede no ser preciso.")
-                    forecast_index = [last_date + (i * time_diff) for i in range(1, steps + 1)]
-            else:
-                raise ValueError("No hay suficientes puntos de datos para inferir la frecuencia y generar el pronóstico. Necesita al menos dos puntos de tiempo para inferir una frecuencia.")
-
-
-        forecast_df = pd.DataFrame({'Fecha': forecast_index, 'Pronóstico': forecast_results}).set_index('Fecha')
-
+        forecast_index, approximate = self._fechas_futuras(ts_data.index, steps)
+        if approximate:
+            messagebox.showwarning("Frecuencia no inferida", "La frecuencia de la serie de tiempo no pudo ser inferida automáticamente. El pronóstico se basará en un incremento simple desde la última fecha, lo cual puede no ser preciso.")
+
+        forecast_df = pd.DataFrame({
+            'Fecha': forecast_index,
+            'Pronóstico': np.asarray(forecast.predicted_mean),
+            'Límite Inferior': forecast_ci[:, 0],
+            'Límite Superior': forecast_ci[:, 1],
+        }).set_index('Fecha')
+
+        fit_notes = {
+            'reutilizado': "Modelo reutilizado del ajuste anterior (la serie no cambió).\n\n",
+            'append': "Modelo actualizado con las observaciones nuevas, conservando los parámetros del ajuste anterior.\n\n",
+            'warm': "Modelo reajustado partiendo de los parámetros del ajuste anterior.\n\n",
+        }
         report = (
+            f"{busqueda_text}"
+            f"{fit_notes.get(fit_mode, '')}"
             f"--- Resumen del Modelo ARIMA (p={order[0]}, d={order[1]}, q={order[2]})---\n"
             f"{self.model_fit.summary().as_text()}\n\n"
             f"--- Pronóstico para los Próximos {steps} Pasos ---\n"
@@ -330,6 +1906,117 @@ class AnalizadorSeriesTiempo:
         )
         return report, ts_data, forecast_df
 
+    @staticmethod
+    def _fechas_futuras(indice, steps):
+        """Future dates after `indice`; the flag is True when only a plain increment could be used."""
+        last_date = indice[-1]
+        # Generate future dates based on inferred frequency
+        # If infer_freq fails, fall back to a simple daily or hourly increment if the original data is consistent.
+        inferred_freq = pd.infer_freq(indice) if len(indice) >= 3 else None
+        if inferred_freq:
+            return pd.date_range(start=last_date, periods=steps + 1, freq=inferred_freq)[1:], False
+        # Fallback for when frequency can't be inferred (e.g., irregular data, very short series)
+        # This is a heuristic, better to ensure regular time series data.
+        # Assuming daily if dates are distinct, or hourly if timestamps are distinct.
+        if len(indice) > 1:
+            time_diff = indice.to_series().diff().dropna().mode()[0]
+            if time_diff == pd.Timedelta(days=1):
+                return pd.date_range(start=last_date, periods=steps + 1, freq='D')[1:], False
+            if time_diff == pd.Timedelta(hours=1):
+                return pd.date_range(start=last_date, periods=steps + 1, freq='h')[1:], False
+            return pd.DatetimeIndex([last_date + (i * time_diff) for i in range(1, steps + 1)]), True
+        raise ValueError("No hay suficientes puntos de datos para inferir la frecuencia y generar el pronóstico. Necesita al menos dos puntos de tiempo para inferir una frecuencia.")
+
+    @staticmethod
+    def _pronosticar_lote(lote, order, steps, alpha=0.05):
+        """Runs in a worker process: fits one ARIMA per (key, dates, values) series and forecasts it."""
+        tablas, fallos = [], []
+        for clave, fechas, valores in lote:
+            try:
+                serie = pd.Series(valores, index=pd.DatetimeIndex(fechas))
+                if not serie.index.is_unique:
+                    serie = serie.groupby(level=0).sum()
+                if len(serie) < sum(order) + 3:
+                    raise ValueError(f"solo {len(serie)} observaciones")
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    # Plain arrays: the dates are rebuilt below, so statsmodels need not infer a frequency
+                    ajuste = sm.tsa.ARIMA(serie.to_numpy(), order=order).fit()
+                pronostico = ajuste.get_forecast(steps=steps)
+                intervalo = pronostico.conf_int(alpha=alpha)
+                fechas_futuras, _ = AnalizadorSeriesTiempo._fechas_futuras(serie.index, steps)
+                tablas.append(pd.DataFrame({
+                    'ID': clave, 'Fecha': fechas_futuras, 'Pronóstico': pronostico.predicted_mean,
+                    'Límite Inferior': intervalo[:, 0], 'Límite Superior': intervalo[:, 1],
+                }))
+            except Exception as e:
+                fallos.append((clave, str(e)))
+        return tablas, fallos
+
+    def pronosticar_por_grupo(self, time_var, target_var, id_var, order=(1,1,1), steps=10, n_procesos=None,
+                              tamano_lote=16, progress_callback=None, cancel_event=None):
+        """
+        Fits one ARIMA per value of `id_var` (long-format data) across a process pool and
+        gathers every forecast with its 95% interval into a single table, as batches finish.
+        Returns (forecast table, list of (id, error) for the series that could not be fitted).
+        """
+        for col in (time_var, target_var, id_var):
+            if col not in self.df.columns:
+                raise ValueError(f"La columna '{col}' no existe en el DataFrame.")
+        if not pd.api.types.is_numeric_dtype(self.df[target_var]):
+            raise ValueError(f"La columna objetivo '{target_var}' debe ser numérica.")
+
+        fechas = self.dataset.fechas(time_var)
+        df_ts = self.dataset.vista([id_var, time_var, target_var], reemplazos={time_var: fechas}).dropna()
+        if df_ts.empty:
+            raise ValueError("No quedan datos válidos de serie de tiempo después de limpiar valores nulos o fechas inválidas.")
+
+        # One sort, then each series is a contiguous slice (cheaper than iterating a groupby)
+        df_ts = df_ts.sort_values([id_var, time_var], kind='stable')
+        claves = df_ts[id_var].to_numpy()
+        fechas_arr = df_ts[time_var].to_numpy()
+        valores = df_ts[target_var].to_numpy(dtype=np.float64)
+        inicios = np.flatnonzero(np.r_[True, claves[1:] != claves[:-1]])
+        finales = np.r_[inicios[1:], len(claves)]
+        series = [(claves[i], fechas_arr[i:j], valores[i:j]) for i, j in zip(inicios, finales)]
+        lotes = [series[i:i + tamano_lote] for i in range(0, len(series), tamano_lote)]
+
+        tablas, fallos = [], []
+        hechos = 0
+        with ProcessPoolExecutor(max_workers=min(n_procesos or os.cpu_count() or 1, len(lotes))) as pool:
+            futuros = [pool.submit(self._pronosticar_lote, lote, order, steps) for lote in lotes]
+            for futuro in as_completed(futuros):
+                if cancel_event is not None and cancel_event.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise InterruptedError("Pronóstico por grupos cancelado.")
+                tablas_lote, fallos_lote = futuro.result()
+                tablas.extend(tablas_lote)
+                fallos.extend(fallos_lote)
+                hechos += len(tablas_lote) + len(fallos_lote)
+                if progress_callback:
+                    progress_callback(hechos, len(series))
+
+        if not tablas:
+            raise ValueError("Ninguna serie pudo ajustarse. Revise el orden ARIMA y la longitud de las series.")
+        pronosticos = pd.concat(tablas, ignore_index=True).sort_values(['ID', 'Fecha'], kind='stable')
+        return pronosticos.set_index(['ID', 'Fecha']), fallos
+
+    def plot_pronosticos_grupos(self, pronosticos, max_series=5, title="Pronóstico por Grupos"):
+        """Forecast bands of the first few series of a batch run."""
+        fig = go.Figure()
+        for clave in pronosticos.index.get_level_values('ID').unique()[:max_series]:
+            grupo = pronosticos.xs(clave, level='ID')
+            fechas = grupo.index.tolist()
+            fig.add_trace(go.Scatter(x=fechas, y=grupo['Pronóstico'], mode='lines', name=str(clave)))
+            fig.add_trace(go.Scatter(
+                x=fechas + fechas[::-1],
+                y=grupo['Límite Inferior'].tolist() + grupo['Límite Superior'].tolist()[::-1],
+                fill='toself', opacity=0.2, line=dict(color='rgba(255,255,255,0)'), showlegend=False,
+            ))
+        fig.update_layout(title_text=title, xaxis_title="Fecha", yaxis_title="Valor", template="plotly_dark",
+                          title_x=0.5, font=dict(color="white", size=12), hovermode="x unified")
+        return fig
+
     def plot_arima_forecast(self, ts_data, forecast_df, title="Pronóstico ARIMA"):
         fig = go.Figure()
 
@@ -339,24 +2026,17 @@ class AnalizadorSeriesTiempo:
         # Forecasted data
         fig.add_trace(go.Scatter(x=forecast_df.index, y=forecast_df['Pronóstico'], mode='lines', name='Pronóstico', line=dict(color='#ffc107', dash='dash')))
 
-        # Add shaded area for confidence intervals if available (ARIMA results usually have them)
-        try:
-            if hasattr(self.model_fit, 'conf_int'):
-                # Get confidence intervals from the forecast method or manually from model_fit.get_forecast
-                forecast_ci = self.model_fit.get_forecast(steps=len(forecast_df)).conf_int()
-                
-                fig.add_trace(go.Scatter(
-                    x=forecast_df.index.tolist() + forecast_df.index.tolist()[::-1], # x, then x reversed
-                    y=forecast_ci.iloc[:, 0].tolist() + forecast_ci.iloc[:, 1].tolist()[::-1], # lower, then upper reversed
-                    fill='toself',
-                    fillcolor='rgba(255,193,7,0.2)', # Semi-transparent yellow
-                    line=dict(color='rgba(255,255,255,0)'),
-                    name='Intervalo de Confianza 95%',
-                    showlegend=True
-                ))
-        except Exception as e:
-            print(f"No se pudo añadir el intervalo de confianza: {e}")
-            pass # Silently fail if CI cannot be generated/added
+        # Shaded 95% interval, already computed with the forecast by ejecutar_arima
+        if {'Límite Inferior', 'Límite Superior'} <= set(forecast_df.columns):
+            fig.add_trace(go.Scatter(
+                x=forecast_df.index.tolist() + forecast_df.index.tolist()[::-1], # x, then x reversed
+                y=forecast_df['Límite Inferior'].tolist() + forecast_df['Límite Superior'].tolist()[::-1], # lower, then upper reversed
+                fill='toself',
+                fillcolor='rgba(255,193,7,0.2)', # Semi-transparent yellow
+                line=dict(color='rgba(255,255,255,0)'),
+                name='Intervalo de Confianza 95%',
+                showlegend=True
+            ))
 
         fig.update_layout(
             title_text=title,
@@ -373,6 +2053,379 @@ class AnalizadorSeriesTiempo:
 # CUSTOM WIDGETS
 # =============================================================================
 
+class DibujanteMatplotlib:
+    """
+    Draws Plotly figures with Matplotlib artists. Subplot layout comes from
+    the Plotly axis domains; scatter, line, bar, histogram, box and heatmap
+    traces are supported, and pre-aggregated traces (bins, box statistics)
+    are drawn as they are, never recomputed from raw data.
+    """
+    MARGENES = (0.08, 0.08, 0.95, 0.9) # left, bottom, right, top of the plotting area
+
+    def __init__(self, fondo="#1f2833", panel="#2c3e50", texto="white"):
+        self.fondo = fondo
+        self.panel = panel
+        self.texto = texto
+
+    def dibujar(self, figura, fig_plotly):
+        """Draws a Plotly figure onto a Matplotlib Figure (also used with off-screen figures)."""
+        figura.clear()
+        figura.set_facecolor(self.fondo)
+        artistas = []
+        ejes = {}
+        layout = fig_plotly.layout
+        for traza in fig_plotly.data:
+            clave = (traza.xaxis or 'x', traza.yaxis or 'y')
+            if clave not in ejes:
+                ejes[clave] = self._crear_eje(figura, layout, clave, ejes)
+            artistas.extend(self._dibujar_traza(figura, ejes[clave], traza))
+
+        for forma in layout.shapes or ():
+            # add_hline shapes: horizontal lines across an axis domain
+            if forma.type == 'line' and forma.y0 == forma.y1 and str(forma.xref).endswith('domain'):
+                for (_, ynombre), ax in ejes.items():
+                    if ynombre == (forma.yref or 'y'):
+                        ax.axhline(forma.y0, color='gray', linestyle='--', linewidth=1)
+        izquierda, abajo, derecha, arriba = self.MARGENES
+        for anotacion in layout.annotations or ():
+            # make_subplots titles are paper-referenced annotations
+            if anotacion.xref == 'paper' and anotacion.yref == 'paper' and anotacion.text:
+                figura.text(izquierda + anotacion.x * (derecha - izquierda), abajo + anotacion.y * (arriba - abajo) + 0.01,
+                            anotacion.text, ha='center', va='bottom', color=self.texto, fontsize=9)
+        if layout.title.text:
+            figura.suptitle(layout.title.text, color=self.texto)
+        return artistas
+
+    def _crear_eje(self, figura, layout, clave, ejes):
+        xnombre, ynombre = clave
+        eje_x = layout[xnombre.replace('x', 'xaxis', 1)]
+        eje_y = layout[ynombre.replace('y', 'yaxis', 1)]
+        if eje_y.overlaying:
+            # Secondary y axis drawn over another subplot
+            base = next(ax for (xn, yn), ax in ejes.items() if yn == eje_y.overlaying)
+            ax = base.twinx()
+        else:
+            x0, x1 = eje_x.domain or (0, 1)
+            y0, y1 = eje_y.domain or (0, 1)
+            izquierda, abajo, derecha, arriba = self.MARGENES
+            ancho, alto = derecha - izquierda, arriba - abajo
+            ax = figura.add_axes([izquierda + x0 * ancho, abajo + y0 * alto, (x1 - x0) * ancho * 0.92, (y1 - y0) * alto * 0.88])
+            ax.set_facecolor(self.panel)
+        ax.tick_params(colors=self.texto, labelsize=8)
+        for borde in ax.spines.values():
+            borde.set_color('gray')
+        if eje_x.title.text:
+            ax.set_xlabel(eje_x.title.text, color=self.texto)
+        if eje_y.title.text:
+            ax.set_ylabel(eje_y.title.text, color=self.texto)
+        if eje_y.showticklabels is False:
+            ax.set_yticks([])
+        return ax
+
+    @staticmethod
+    def _color(traza, defecto):
+        for origen in ('marker', 'line'):
+            color = getattr(getattr(traza, origen, None), 'color', None)
+            if isinstance(color, str):
+                return color
+        return defecto
+
+    def _dibujar_traza(self, figura, ax, traza):
+        """Draws one trace and returns (kind, artist) pairs; kind 'fijo' marks traces that can only be redrawn."""
+        if isinstance(traza, go.Scatter):
+            y = np.asarray(traza.y)
+            x = np.asarray(traza.x) if traza.x is not None else np.arange(len(y))
+            color = self._color(traza, '#66fcf1')
+            if traza.fill == 'toself':
+                poligono, = ax.fill(x, y, color=color if color.startswith('#') else '#ffc107', alpha=0.2, linewidth=0)
+                return [('poligono', poligono)]
+            modo = traza.mode or 'lines'
+            estilo = dict(linestyle='-' if 'lines' in modo else 'none', marker='o' if 'markers' in modo else None,
+                          markersize=3, linewidth=1.2, color=color)
+            if traza.line.dash in ('dash', 'dot'):
+                estilo['linestyle'] = '--'
+            linea, = ax.plot(x, y, **estilo)
+            return [('linea', linea)]
+        if isinstance(traza, go.Bar):
+            ancho = np.asarray(traza.width) if traza.width is not None else 0.8
+            barras = ax.bar(np.asarray(traza.x), np.asarray(traza.y, dtype=np.float64), width=ancho,
+                            color=self._color(traza, '#45a29e'), edgecolor=self.fondo, linewidth=0.3)
+            if traza.x is not None and len(traza.x) and isinstance(traza.x[0], str):
+                ax.tick_params(axis='x', labelrotation=45)
+            return [('barras', barras)]
+        if isinstance(traza, go.Histogram):
+            conteos, bordes = np.histogram(np.asarray(traza.x, dtype=np.float64), bins=traza.nbinsx or 'auto')
+            barras = ax.bar(bordes[:-1], conteos, width=np.diff(bordes), align='edge', color=self._color(traza, '#45a29e'))
+            return [('fijo', None)]
+        if isinstance(traza, go.Box):
+            estilo = dict(vert=False, patch_artist=True,
+                          boxprops=dict(facecolor='#16537e', edgecolor=self.texto), whiskerprops=dict(color=self.texto),
+                          capprops=dict(color=self.texto), medianprops=dict(color='yellow'))
+            if traza.q1 is not None:
+                ax.bxp([{'q1': traza.q1[0], 'med': traza.median[0], 'q3': traza.q3[0], 'whislo': traza.lowerfence[0],
+                         'whishi': traza.upperfence[0], 'fliers': []}], positions=[0], showfliers=False, **estilo)
+            else:
+                ax.boxplot(np.asarray(traza.x if traza.x is not None else traza.y, dtype=np.float64), positions=[0], **estilo)
+            return [('fijo', None)]
+        if isinstance(traza, go.Heatmap):
+            z = np.asarray(traza.z, dtype=np.float64)
+            if z.size == 0:
+                return [('fijo', None)] # Nothing to draw; nanmin/nanmax would fail on an empty matrix
+            imagen = ax.imshow(z, cmap='viridis', aspect='auto', vmin=np.nanmin(z), vmax=np.nanmax(z))
+            for eje, etiquetas in (('x', traza.x), ('y', traza.y)):
+                if etiquetas is not None and len(etiquetas) <= 40:
+                    posiciones = np.arange(len(etiquetas))
+                    if eje == 'x':
+                        ax.set_xticks(posiciones, [str(e) for e in etiquetas], rotation=90, fontsize=7)
+                    else:
+                        ax.set_yticks(posiciones, [str(e) for e in etiquetas], fontsize=7)
+            barra = figura.colorbar(imagen, ax=ax)
+            barra.ax.tick_params(colors=self.texto, labelsize=7)
+            if traza.texttemplate and z.shape[0] <= 20:
+                for (i, j), valor in np.ndenumerate(z):
+                    ax.text(j, i, f"{valor:.2f}", ha='center', va='center', fontsize=6, color='white')
+                return [('imagen', imagen), ('fijo', None)] # The cell labels are static text
+            return [('imagen', imagen)]
+        return [('fijo', None)]
+
+class LienzoGraficos(DibujanteMatplotlib):
+    """
+    One persistent Matplotlib canvas embedded in Tk that draws Plotly figures
+    in-app. When a new figure has the same structure as the one on screen,
+    the existing artists get the new data and only they are re-blitted over
+    the cached background.
+    """
+    def __init__(self, master, fondo="#1f2833", panel="#2c3e50", texto="white"):
+        super().__init__(fondo, panel, texto)
+        self.figura = Figure(figsize=(8, 6), facecolor=fondo)
+        self.canvas = FigureCanvasTkAgg(self.figura, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.configure(bg=fondo, highlightthickness=0)
+        self._firma = None
+        self._artistas = [] # (trace type, artist) in trace order, all animated (drawn by blitting)
+        self._fondo_blit = None
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+
+    def limpiar(self):
+        self.figura.clear()
+        self._firma = None
+        self._artistas = []
+        self.canvas.draw_idle()
+
+    def mostrar(self, fig_plotly):
+        firma = self._firma_de(fig_plotly)
+        if firma == self._firma and self._actualizar(fig_plotly):
+            return
+        self._artistas = self.dibujar(self.figura, fig_plotly)
+        # Data artists are animated: normal draws skip them and blitting paints them
+        for _, artista in self._artistas:
+            if artista is not None:
+                artista.set_animated(True)
+        self._firma = firma
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def _firma_de(fig_plotly):
+        """Structure of a figure: trace kinds, axes, sizes and titles; equal structure means artists can be reused."""
+        def firma_traza(t):
+            if isinstance(t, go.Heatmap):
+                tamano = (np.shape(t.z), tuple(map(str, () if t.x is None else t.x)), tuple(map(str, () if t.y is None else t.y)))
+            elif isinstance(t, go.Bar):
+                # Same number of bars; category labels are part of the background
+                tamano = tuple(map(str, t.x)) if t.x is not None and len(t.x) and isinstance(t.x[0], str) else len(t.y)
+            else:
+                tamano = None
+            return type(t).__name__, t.xaxis, t.yaxis, getattr(t, 'mode', None), getattr(t, 'fill', None), tamano
+        layout = fig_plotly.layout
+        return (tuple(firma_traza(t) for t in fig_plotly.data), layout.title.text, layout.xaxis.title.text,
+                layout.yaxis.title.text, tuple(a.text for a in layout.annotations or ()))
+
+    def _al_dibujar(self, evento):
+        # The background is everything except the animated data artists
+        self._fondo_blit = self.canvas.copy_from_bbox(self.figura.bbox)
+        self._dibujar_animados()
+
+    def _dibujar_animados(self):
+        for _, artista in self._artistas:
+            if artista is not None:
+                self.figura.draw_artist(artista)
+
+    def _actualizar(self, fig_plotly):
+        """Feeds new data into the artists on screen. False when the figure must be redrawn instead."""
+        if self._fondo_blit is None or len(self._artistas) != len(fig_plotly.data):
+            return False
+        for (tipo, artista), traza in zip(self._artistas, fig_plotly.data):
+            if tipo == 'linea':
+                artista.set_data(np.asarray(traza.x if traza.x is not None else np.arange(len(traza.y))), np.asarray(traza.y))
+            elif tipo == 'barras':
+                altos = np.asarray(traza.y, dtype=np.float64)
+                anchos = np.broadcast_to(np.asarray(traza.width if traza.width is not None else 0.8, dtype=np.float64), altos.shape)
+                centros = None if isinstance(traza.x[0], str) else np.asarray(traza.x, dtype=np.float64)
+                for k, rect in enumerate(artista.patches):
+                    rect.set_height(altos[k])
+                    if centros is not None:
+                        rect.set_width(anchos[k])
+                        rect.set_x(centros[k] - anchos[k] / 2)
+            elif tipo == 'poligono':
+                artista.set_xy(np.column_stack([np.asarray(traza.x), np.asarray(traza.y)]))
+            elif tipo == 'imagen':
+                z = np.asarray(traza.z, dtype=np.float64)
+                if artista.get_clim() != (np.nanmin(z), np.nanmax(z)):
+                    return False # The colour bar is part of the background
+                artista.set_data(z)
+            else:
+                return False
+        ejes = {artista.axes for _, artista in self._artistas if artista is not None}
+        limites = [(ax.get_xlim(), ax.get_ylim()) for ax in ejes]
+        for ax in ejes:
+            ax.relim()
+            ax.autoscale_view()
+        if limites != [(ax.get_xlim(), ax.get_ylim()) for ax in ejes]:
+            self.canvas.draw_idle() # Ticks changed: the cached background is stale
+            return True
+        self.canvas.restore_region(self._fondo_blit)
+        self._dibujar_animados()
+        self.canvas.blit(self.figura.bbox)
+        return True
+
+class ExportadorEstatico:
+    """
+    Static image export, done only when the user asks for it. Each export
+    renders on a fresh off-screen Figure with the Agg backend in a worker
+    thread, so a dpi=300 image never blocks the UI.
+    """
+    def __init__(self, dibujante, dpi=300, tamano=(10, 7.5)):
+        self.dibujante = dibujante
+        self.dpi = dpi
+        self.tamano = tamano
+
+    def exportar(self, fig_plotly, ruta, al_terminar=None, al_fallar=None):
+        """Renders and saves `fig_plotly` in the background; callbacks run on the worker thread."""
+        hilo = threading.Thread(target=self._renderizar, args=(fig_plotly, ruta, al_terminar, al_fallar), daemon=True)
+        hilo.start()
+        return hilo
+
+    def _renderizar(self, fig_plotly, ruta, al_terminar, al_fallar):
+        try:
+            figura = Figure(figsize=self.tamano)
+            FigureCanvasAgg(figura)
+            self.dibujante.dibujar(figura, fig_plotly)
+            figura.savefig(ruta, dpi=self.dpi, facecolor=figura.get_facecolor())
+            if al_terminar:
+                al_terminar(ruta)
+        except Exception as e:
+            if al_fallar:
+                al_fallar(str(e))
+
+class ReportePDF:
+    """
+    Streaming PDF report writer. Table cells are formatted column by column with
+    NumPy instead of row by row, the table is split into LongTable chunks that
+    repeat the header on every page, and the text result is laid out as many
+    small preformatted blocks so layout stays linear in the size of the output.
+    """
+    ESTILO_TABLA = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#45a29e")), # Header background
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke), # Header text color
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'), # Header text alignment
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor("#34495e")), # Body background
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#1f2833")), # Grid lines
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.white), # Body text color
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('LEFTPADDING', (0, 0), (-1, -1), 3),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (0, 1), (0, -1), 'LEFT'), # Align index column left
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'), # Align numeric data right
+    ]
+
+    def __init__(self, pagesize=A4, margen=72, filas_por_bloque=500, lineas_por_bloque=60):
+        self.pagesize = pagesize
+        self.margen = margen
+        self.filas_por_bloque = filas_por_bloque # Rows per LongTable chunk
+        self.lineas_por_bloque = lineas_por_bloque # Text lines per Preformatted block
+        styles = getSampleStyleSheet()
+        self.styles = styles
+        # Own copy so the shared sample 'Code' style is not mutated
+        self.estilo_codigo = ParagraphStyle('CodigoReporte', parent=styles['Code'], fontSize=8, leading=9)
+
+    @staticmethod
+    def formatear_tabla(df):
+        """Returns (header, rows) as strings; floats get 4 decimals. One vectorised pass per column."""
+        # One column per index level, so a MultiIndex (e.g. ID, Fecha of batch forecasts) reads like reset_index()
+        niveles = [df.index.get_level_values(i) for i in range(df.index.nlevels)]
+        encabezado = [str(nivel.name) if nivel.name is not None else 'Index' for nivel in niveles] + [str(c) for c in df.columns]
+        columnas = [nivel.astype(str).to_numpy(dtype=str) for nivel in niveles]
+        for i in range(df.shape[1]):
+            serie = df.iloc[:, i]
+            if pd.api.types.is_float_dtype(serie.dtype):
+                columnas.append(np.char.mod('%.4f', serie.to_numpy(dtype=np.float64)))
+            else:
+                columnas.append(serie.astype(str).to_numpy(dtype=str))
+        filas = np.column_stack(columnas).tolist() if len(df) else []
+        return encabezado, filas
+
+    def _anchos_columna(self, encabezado, filas, muestra=2000):
+        """Column widths from the longest string in a sample, scaled down to fit the page."""
+        largos = np.array([len(h) for h in encabezado], dtype=float)
+        if filas:
+            cuerpo = np.array(filas[:muestra], dtype=str)
+            largos = np.maximum(largos, np.char.str_len(cuerpo).max(axis=0))
+        anchos = largos * 4.2 + 8 # ~7pt Helvetica plus padding
+        disponible = self.pagesize[0] - 2 * self.margen
+        if anchos.sum() > disponible:
+            anchos *= disponible / anchos.sum()
+        return anchos.tolist()
+
+    def _bloques_texto(self, texto):
+        """Splits the text into paragraphs (blank lines), long paragraphs into fixed-size blocks."""
+        bloques = []
+        for parrafo in texto.split('\n\n'):
+            lineas = parrafo.split('\n')
+            for i in range(0, len(lineas), self.lineas_por_bloque):
+                bloque = '\n'.join(lineas[i:i + self.lineas_por_bloque])
+                if bloque.strip():
+                    bloques.append(Preformatted(bloque, self.estilo_codigo))
+            bloques.append(Spacer(1, 4))
+        return bloques
+
+    def _historia(self, titulo, texto, tabla):
+        story = [Paragraph(f"<b>Reporte de Análisis: {titulo}</b>", self.styles['h1']), Spacer(1, 0.2 * inch)]
+        if texto:
+            story.append(Paragraph("<b>Resultados Detallados y Resumen:</b>", self.styles['h2']))
+            story.extend(self._bloques_texto(texto))
+            story.append(Spacer(1, 0.2 * inch))
+        if tabla is not None and not tabla.empty:
+            story.append(Paragraph("<b>Tabla de Datos Adicional:</b>", self.styles['h2']))
+            encabezado, filas = self.formatear_tabla(tabla)
+            anchos = self._anchos_columna(encabezado, filas)
+            estilo = TableStyle(self.ESTILO_TABLA)
+            for i in range(0, len(filas), self.filas_por_bloque):
+                # Fixed widths spare LongTable from measuring every cell
+                story.append(LongTable([encabezado] + filas[i:i + self.filas_por_bloque], colWidths=anchos, repeatRows=1, style=estilo))
+            story.append(Spacer(1, 0.2 * inch))
+        return story
+
+    def construir(self, ruta, titulo, texto=None, tabla=None, progress_callback=None):
+        """Builds the PDF at `ruta`. Meant for a worker thread; `progress_callback(pct)` gets 0-100."""
+        doc = SimpleDocTemplate(ruta, pagesize=self.pagesize, rightMargin=self.margen, leftMargin=self.margen,
+                                topMargin=self.margen, bottomMargin=self.margen)
+        story = self._historia(titulo, texto, tabla)
+        if progress_callback:
+            total = [max(len(story), 1)]
+            def _al_progresar(tipo, valor):
+                if tipo == 'SIZE_EST':
+                    total[0] = max(valor, 1)
+                elif tipo == 'PROGRESS':
+                    progress_callback(min(100.0, 100.0 * valor / total[0]))
+            doc.setProgressCallBack(_al_progresar)
+        doc.build(story)
+        return ruta
+
 class AnimatedButton(tk.Canvas):
     def __init__(self, parent, text="", command=None, width=200, height=40, bg_color="#2c3e50", hover_color="#34495e", text_color="white", icon=None):
         super().__init__(parent, width=width, height=height, bg=parent['bg'], highlightthickness=0)
@@ -413,6 +2466,18 @@ class DataSuiteApp(tk.Tk):
         self.configure(bg="#1f2833")
 
         self.data = None
+        self.data_loader = None # CargadorCSVPorBloques that produced self.data
+        self.dataset = None # DatasetCompartido wrapping self.data, handed to every analyzer
+        self.data_fingerprint = None # Content hash of self.data, part of every cache key
+        self.cache_dir = os.path.join(os.getcwd(), "analysis_cache")
+        self.dataset_cache = CacheColumnar(os.path.join(os.getcwd(), "dataset_cache"), "bloques") # Typed copies of loaded CSVs
+        self.load_cancel_event = None # Set to abandon the load in progress
+        self.result_cache = CacheResultados(limite_memoria_mb=512)
+        self.static_exporter = ExportadorEstatico(DibujanteMatplotlib()) # PNG/JPEG rendered only on export
+        self.pdf_report = ReportePDF()
+        self.scheduler = PlanificadorTareas(self, max_hilos=2) # Bounded pool; repeated clicks join the running job
+        self.protocol("WM_DELETE_WINDOW", self.on_closing) # Cancel queued jobs instead of waiting on them at exit
+        self.memory_budget_mb = 4096 # Loads stop growing past this many MB of typed data
         self.current_plot = None # Store plotly figure for export
         self.current_text_result = "" # Store text for export
         self.current_data_table = None # Store data frame for PDF table export (e.g., descriptive stats, freq tables)
@@ -429,6 +2494,7 @@ class DataSuiteApp(tk.Tk):
         self.icons = self._create_icons()
 
         self._create_widgets()
+        self._update_cache_label()
         self._show_welcome_view()
     
 
@@ -537,12 +2603,31 @@ class DataSuiteApp(tk.Tk):
         tk.Label(self.sidebar, text="DATA SUITE", font=self.heading2_font, fg="#66fcf1", bg="#2c3e50").pack(pady=20)
         
         AnimatedButton(self.sidebar, text="Cargar Datos", command=self.load_csv, icon=self.icons["upload"]).pack(pady=5, padx=10)
+        self.load_progress = ttk.Progressbar(self.sidebar, orient=tk.HORIZONTAL, mode='determinate', maximum=100, length=200)
+        self.load_progress.pack(pady=(5, 0), padx=10)
+        self.load_status_label = tk.Label(self.sidebar, text="", font=self.label_font, fg="white", bg="#2c3e50")
+        self.load_status_label.pack(padx=10)
         tk.Frame(self.sidebar, height=2, bg="#45a29e").pack(fill=tk.X, padx=20, pady=15)
 
         AnimatedButton(self.sidebar, text="Análisis Exploratorio", command=lambda: self.show_view("exploratory"), icon=self.icons["explore"]).pack(pady=5, padx=10)
         AnimatedButton(self.sidebar, text="Análisis de Regresión", command=lambda: self.show_view("regression"), icon=self.icons["regression"]).pack(pady=5, padx=10)
         AnimatedButton(self.sidebar, text="Análisis de Series de Tiempo", command=lambda: self.show_view("time_series"), icon=self.icons["forecast"]).pack(pady=5, padx=10)
 
+        # Running analyses: real progress and cancellation
+        self.analysis_progress = ttk.Progressbar(self.sidebar, orient=tk.HORIZONTAL, mode='determinate', maximum=100, length=200)
+        self.analysis_progress.pack(pady=(15, 0), padx=10)
+        self.analysis_status_label = tk.Label(self.sidebar, text="", font=self.label_font, fg="white", bg="#2c3e50", wraplength=200)
+        self.analysis_status_label.pack(padx=10)
+        ttk.Button(self.sidebar, text="Cancelar análisis", command=self.cancel_analysis).pack(pady=5, padx=10)
+
+        # Result cache status
+        tk.Frame(self.sidebar, height=2, bg="#45a29e").pack(fill=tk.X, padx=20, pady=15)
+        self.cache_label = tk.Label(self.sidebar, text="", font=self.label_font, fg="white", bg="#2c3e50", justify=tk.LEFT)
+        self.cache_label.pack(padx=10, anchor="w")
+        self.persist_cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.sidebar, text="Guardar caché en disco", variable=self.persist_cache_var, command=self._toggle_cache_persistence,
+                       font=self.label_font, fg="white", bg="#2c3e50", selectcolor="#1f2833", activebackground="#2c3e50", activeforeground="white").pack(padx=10, anchor="w")
+
         # 2. Content Area
         self.content_area = tk.Frame(self.main_frame, bg="#1f2833")
         self.content_area.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
@@ -572,6 +2657,14 @@ class DataSuiteApp(tk.Tk):
         
         tk.Label(controls, text="Análisis Exploratorio", font=self.subheading_font, fg="white", bg="#2c3e50").pack(pady=10)
         AnimatedButton(controls, text="Resumen Descriptivo", command=lambda: self.run_analysis("desc")).pack(pady=5, padx=5)
+        tk.Label(controls, text="Método / Umbral |r| (opcional):", fg="white", bg="#2c3e50", font=self.label_font).pack(pady=(10,0))
+        corr_options = tk.Frame(controls, bg="#2c3e50")
+        corr_options.pack(pady=5, padx=5)
+        self.corr_method_combo = ttk.Combobox(corr_options, state="readonly", values=["pearson", "spearman", "kendall"], width=10, font=self.label_font)
+        self.corr_method_combo.set("pearson")
+        self.corr_method_combo.pack(side=tk.LEFT, padx=2)
+        self.corr_threshold_entry = ttk.Entry(corr_options, width=6, font=self.label_font, justify='center')
+        self.corr_threshold_entry.pack(side=tk.LEFT, padx=2)
         AnimatedButton(controls, text="Mapa de Correlación", command=lambda: self.run_analysis("corr")).pack(pady=5, padx=5)
         
         tk.Label(controls, text="Distribución de Variable", fg="white", bg="#2c3e50", font=self.label_font).pack(pady=(10,0))
@@ -634,6 +2727,10 @@ class DataSuiteApp(tk.Tk):
         self.ts_target_combo = ttk.Combobox(controls, state="readonly", font=self.label_font)
         self.ts_target_combo.pack(pady=5, padx=5)
 
+        tk.Label(controls, text="Columna ID (pronóstico por grupos):", fg="white", bg="#2c3e50", font=self.label_font).pack(pady=(10,0))
+        self.ts_id_combo = ttk.Combobox(controls, state="readonly", font=self.label_font)
+        self.ts_id_combo.pack(pady=5, padx=5)
+
         tk.Label(controls, text="Orden ARIMA (p,d,q):", fg="white", bg="#2c3e50", font=self.label_font).pack(pady=(10,0))
         order_frame = tk.Frame(controls, bg="#2c3e50")
         order_frame.pack(pady=5, padx=5)
@@ -649,12 +2746,22 @@ class DataSuiteApp(tk.Tk):
         self.q_entry.insert(0, "0")
         self.q_entry.pack(side=tk.LEFT, padx=2)
 
+        self.auto_arima_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(controls, text="Buscar orden automáticamente", variable=self.auto_arima_var,
+                       fg="white", bg="#2c3e50", selectcolor="#1f2833", activebackground="#2c3e50",
+                       font=self.label_font).pack(pady=(5, 0), padx=5)
+        self.arima_criterion_combo = ttk.Combobox(controls, state="readonly", values=["aic", "bic"], width=6, font=self.label_font)
+        self.arima_criterion_combo.set("aic")
+        self.arima_criterion_combo.pack(pady=5, padx=5)
+
         tk.Label(controls, text="Pasos de Pronóstico:", fg="white", bg="#2c3e50", font=self.label_font).pack(pady=(10,0))
         self.forecast_steps_entry = ttk.Entry(controls, width=10, font=self.label_font, justify='center')
         self.forecast_steps_entry.insert(0, "10")
         self.forecast_steps_entry.pack(pady=5, padx=5)
 
         AnimatedButton(controls, text="Ejecutar ARIMA", command=lambda: self.run_analysis("arima")).pack(pady=10, padx=5)
+        AnimatedButton(controls, text="Pronóstico por Grupos", command=lambda: self.run_analysis("arima_batch")).pack(pady=(0, 10), padx=5)
+        ttk.Button(controls, text="Cancelar búsqueda", command=self.cancel_analysis).pack(pady=(0, 10), padx=5)
         
         # Results Area
         results_frame = tk.Frame(frame, bg="#1f2833")
@@ -682,6 +2789,8 @@ class DataSuiteApp(tk.Tk):
         style.configure("TNotebook", background="#1f2833", borderwidth=0)
         style.configure("TNotebook.Tab", background="#2c3e50", foreground="white", padding=[10, 5], font=self.label_font)
         style.map("TNotebook.Tab", background=[("selected", "#45a29e")], foreground=[("selected", "white")])
+        style.configure("TButton", font=self.button_font, background="#45a29e", foreground="white", borderwidth=0, relief="flat", padding=10)
+        style.map("TButton", background=[("active", "#66fcf1")], foreground=[("active", "black")])
         
         notebook = ttk.Notebook(parent_frame)
         notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -692,12 +2801,20 @@ class DataSuiteApp(tk.Tk):
         notebook.add(text_tab, text="📄 Resumen de Texto")
         notebook.add(plot_tab, text="📈 Gráfico Interactivo")
         
-        # Store references to be able to access them
-        parent_frame.text_widget = scrolledtext.ScrolledText(text_tab, wrap=tk.WORD, bg="#0b0c10", fg="white", font=self.monospace_font, relief='flat', insertbackground='white')
-        parent_frame.text_widget.pack(expand=True, fill='both')
+        # Store references on the view frame, which is what self.views holds
+        view_frame = parent_frame.master
+        view_frame.text_widget = scrolledtext.ScrolledText(text_tab, wrap=tk.WORD, bg="#0b0c10", fg="white", font=self.monospace_font, relief='flat', insertbackground='white')
+        view_frame.text_widget.pack(expand=True, fill='both')
         
-        parent_frame.plot_widget_frame = tk.Frame(plot_tab, bg="#1f2833")
-        parent_frame.plot_widget_frame.pack(expand=True, fill='both')
+        view_frame.plot_widget_frame = tk.Frame(plot_tab, bg="#1f2833")
+        view_frame.plot_widget_frame.pack(expand=True, fill='both')
+
+        # One persistent canvas per view, reused by every analysis shown in it
+        browser_bar = tk.Frame(view_frame.plot_widget_frame, bg="#1f2833")
+        browser_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        ttk.Button(browser_bar, text="Abrir Gráfico en Navegador", command=self.open_plot_in_browser, style="TButton").pack(side=tk.RIGHT, padx=5, pady=5)
+        view_frame.plot_canvas = LienzoGraficos(view_frame.plot_widget_frame)
+        view_frame.plot_canvas.widget.pack(expand=True, fill='both')
 
     def show_view(self, view_name):
         if self.current_view:
@@ -715,22 +2832,64 @@ class DataSuiteApp(tk.Tk):
         file_path = filedialog.askopenfilename(filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")])
         if not file_path:
             return
+        self.load_progress['value'] = 0
+        self.load_status_label.config(text=f"Cargando {os.path.basename(file_path)}...")
+        loader = CargadorCSVPorBloques(file_path, limite_memoria_mb=self.memory_budget_mb, cache=self.dataset_cache)
+        if self.load_cancel_event is not None:
+            self.load_cancel_event.set() # A newer file supersedes the load still running
+        self.load_cancel_event = threading.Event()
+        # Parse in a worker so large files don't freeze the UI
+        thread = threading.Thread(target=self._load_csv_worker, args=(loader, self.load_cancel_event), daemon=True)
+        thread.start()
+
+    def _load_csv_worker(self, loader, cancel_event):
         try:
-            temp_df = pd.read_csv(file_path)
+            temp_df = loader.cargar(progress_callback=lambda pct: self.after(0, self._update_load_progress, pct),
+                                    cancel_event=cancel_event)
+            if cancel_event.is_set():
+                return
             if temp_df.empty:
                 raise ValueError("El archivo CSV está vacío o no contiene datos válidos.")
-            self.data = temp_df.copy() # Store a copy of the loaded data
-            self._populate_variable_selectors()
-            messagebox.showinfo("Éxito", f"Archivo '{os.path.basename(file_path)}' cargado correctamente. Puedes iniciar el análisis.")
-            self.show_view("exploratory") # Move to exploratory view after data load
+            fingerprint = loader.huella or CacheResultados.huella(temp_df) # Stored with the columnar cache, no need to rehash
+            dataset = DatasetCompartido(temp_df, cargador=loader)
+            datetime_cols = self._get_datetime_cols(dataset) # Parses date columns here, off the Tk thread
+            self.after(0, self._on_csv_loaded, loader, dataset, fingerprint, datetime_cols)
         except Exception as e:
-            messagebox.showerror("Error de Carga", f"No se pudo cargar el archivo: {e}\nAsegúrese de que es un CSV válido y no está corrupto.")
-
-    def _populate_variable_selectors(self):
+            if not cancel_event.is_set(): # A cancelled load may end early with no rows; nothing to report
+                self.after(0, self._on_csv_load_error, str(e))
+
+    def _update_load_progress(self, pct):
+        self.load_progress['value'] = pct
+        self.load_status_label.config(text=f"Cargando... {pct:.0f}%")
+
+    def _on_csv_loaded(self, loader, dataset, fingerprint, datetime_cols):
+        self.data = dataset.df
+        self.data_fingerprint = fingerprint
+        self.data_loader = loader
+        self.dataset = dataset
+        self._populate_variable_selectors(datetime_cols)
+        self.load_progress['value'] = 100
+        memory_mb = self.data.memory_usage(deep=True).sum() / 1024 ** 2
+        source = "caché, mapeado" if loader.desde_cache else f"{memory_mb:.0f} MB"
+        self.load_status_label.config(text=f"{len(self.data):,} filas ({source})")
+        message = f"Archivo '{os.path.basename(loader.file_path)}' cargado correctamente. Puedes iniciar el análisis."
+        if loader.truncado:
+            message += (f"\n\nSe alcanzó el límite de memoria ({self.memory_budget_mb} MB): "
+                        f"solo se cargaron las primeras {len(self.data):,} filas.")
+        messagebox.showinfo("Éxito", message)
+        self.show_view("exploratory") # Move to exploratory view after data load
+
+    def _on_csv_load_error(self, error_msg):
+        self.load_progress['value'] = 0
+        self.load_status_label.config(text="")
+        messagebox.showerror("Error de Carga", f"No se pudo cargar el archivo: {error_msg}\nAsegúrese de que es un CSV válido y no está corrupto.")
+
+    def _populate_variable_selectors(self, datetime_cols=None):
         if self.data is None: return
         numeric_cols = self.data.select_dtypes(include=np.number).columns.tolist()
         all_cols = self.data.columns.tolist()
-        datetime_cols = self._get_datetime_cols(self.data)
+        if datetime_cols is None:
+            datetime_cols = self._get_datetime_cols(self.dataset)
 
         # Exploratory selector
         self.exp_var_combo['values'] = all_cols
@@ -755,129 +2914,246 @@ class DataSuiteApp(tk.Tk):
         if numeric_cols: self.ts_target_combo.set(numeric_cols[0])
         else: self.ts_target_combo.set("")
 
+        self.ts_id_combo['values'] = all_cols
+        self.ts_id_combo.set("")
+
     def _get_datetime_cols(self, df):
-        """Identifies columns that can be converted to datetime."""
-        datetime_cols = []
-        for col in df.columns:
-            # Check for non-null values before trying conversion
-            if not df[col].dropna().empty:
-                try:
-                    # Attempt conversion on a small sample to be efficient
-                    # If conversion is successful for all, it's a candidate
-                    if pd.to_datetime(df[col].dropna(), errors='coerce').notna().all():
-                        datetime_cols.append(col)
-                except Exception:
-                    continue
-        return datetime_cols
+        """Identifies columns that can be converted to datetime (sampled sniffing, see DetectorFechas)."""
+        return DatasetCompartido.envolver(df).columnas_fecha()
             
     def run_analysis(self, analysis_type):
         if self.data is None:
             messagebox.showwarning("Sin Datos", "Por favor, carga un archivo CSV primero para realizar análisis.")
             return
+        try:
+            params = self._collect_analysis_params(analysis_type)
+        except ValueError as e:
+            messagebox.showwarning("Parámetros Inválidos", str(e))
+            return
+
+        cache_key = CacheResultados.clave(self.data_fingerprint, analysis_type, **params)
+        cached = self.result_cache.obtener(cache_key)
+        self._update_cache_label()
+        if cached is not None:
+            self._apply_analysis_results(*cached)
+            return
+
+        # The cache key identifies the job, so a repeated click joins the one already running
+        task, is_new = self.scheduler.enviar(
+            cache_key, lambda task: self._analysis_job(task, analysis_type, params, cache_key),
+            al_terminar=lambda results: self._apply_analysis_results(*results),
+            al_fallar=self._on_analysis_error, al_cancelar=self._on_analysis_cancelled,
+            al_progresar=self._update_analysis_progress)
+        if not is_new:
+            self.analysis_status_label.config(text="Ese análisis ya está en curso.")
+            return
 
         # Clear previous results immediately
         active_view_frame = self.views[self.current_view_name_str]
         active_view_frame.text_widget.delete(1.0, tk.END)
-        for widget in active_view_frame.plot_widget_frame.winfo_children():
-            widget.destroy()
         self.result_title.config(text="Calculando...") # Indicate processing
         self.current_plot = None
         self.current_text_result = ""
         self.current_data_table = None
+        self.analysis_progress['value'] = 0
+        self.analysis_status_label.config(text="En cola...")
 
-        # Launch the analysis in a thread
-        thread = threading.Thread(target=self._analysis_thread_worker, args=(analysis_type,))
-        thread.start()
-
-    def _analysis_thread_worker(self, analysis_type):
-        try:
-            plot = None
-            text_result = ""
-            title = "Resultado"
-            data_table = None # Initialize data_table to None
-
-            if analysis_type == "desc":
-                analyzer = AnalizadorExploratorio(self.data)
-                text_result, data_table = analyzer.get_resumen_descriptivo()
-                title = "Resumen Estadístico Descriptivo"
+    def _collect_analysis_params(self, analysis_type):
+        """Reads and validates the widget inputs of an analysis on the Tk thread."""
+        if analysis_type == "corr":
+            threshold_str = self.corr_threshold_entry.get().strip()
+            try:
+                threshold = float(threshold_str) if threshold_str else None
+            except ValueError:
+                raise ValueError("El umbral de correlación debe ser un número entre 0 y 1.")
+            if threshold is not None and not 0 <= threshold <= 1:
+                raise ValueError("El umbral de correlación debe ser un número entre 0 y 1.")
+            return {"method": self.corr_method_combo.get(), "threshold": threshold}
+
+        if analysis_type == "dist":
+            var = self.exp_var_combo.get()
+            if not var:
+                raise ValueError("Selecciona una variable para el análisis de distribución.")
+            return {"var": var}
+
+        if analysis_type == "regr":
+            y_var = self.reg_y_combo.get()
+            x_vars = [self.reg_x_listbox.get(i) for i in self.reg_x_listbox.curselection()]
+            if not y_var:
+                raise ValueError("Debes seleccionar la variable dependiente (Y).")
+            if not x_vars:
+                raise ValueError("Debes seleccionar al menos una variable independiente (X).")
+            return {"y_var": y_var, "x_vars": tuple(x_vars)}
+
+        if analysis_type in ("arima", "arima_batch"):
+            time_var = self.ts_time_combo.get()
+            target_var = self.ts_target_combo.get()
+            # Validate inputs for ARIMA order and steps
+            try:
+                p = int(self.p_entry.get())
+                d = int(self.d_entry.get())
+                q = int(self.q_entry.get())
+                steps = int(self.forecast_steps_entry.get())
+            except ValueError:
+                raise ValueError("Por favor, introduce números enteros válidos para el orden ARIMA y los pasos de pronóstico.")
+            if not all(x >= 0 for x in [p, d, q, steps]):
+                raise ValueError("Los valores de p, d, q y pasos de pronóstico deben ser no negativos.")
+            if not time_var or not target_var:
+                raise ValueError("Selecciona las columnas de tiempo y valor objetivo para el pronóstico ARIMA.")
+            if analysis_type == "arima_batch":
+                id_var = self.ts_id_combo.get()
+                if not id_var:
+                    raise ValueError("Selecciona la columna ID que identifica cada serie.")
+                return {"time_var": time_var, "target_var": target_var, "id_var": id_var, "order": (p, d, q), "steps": steps}
+            params = {"time_var": time_var, "target_var": target_var, "order": (p, d, q), "steps": steps,
+                      "auto": self.auto_arima_var.get(), "criterion": self.arima_criterion_combo.get()}
+            # Only what the run uses goes into the cache and job key, so identical searches share one result
+            del params["order" if params["auto"] else "criterion"]
+            return params
+
+        return {}
+
+    def _analysis_job(self, task, analysis_type, params, cache_key):
+        """Runs on the scheduler's pool; returns what _apply_analysis_results shows."""
+        plot = None
+        text_result = ""
+        title = "Resultado"
+        data_table = None # Initialize data_table to None
+        task.progreso(0, "Iniciando...")
+
+        if analysis_type == "desc":
+            analyzer = AnalizadorExploratorio(self.dataset)
+            task.progreso(10, "Resumen descriptivo...")
+            text_result, data_table = analyzer.get_resumen_descriptivo()
+            title = "Resumen Estadístico Descriptivo"
+        
+        elif analysis_type == "corr":
+            analyzer = AnalizadorExploratorio(self.dataset)
+            task.progreso(10, "Matriz de correlación...")
+            plot, text_result_corr = analyzer.plot_correlacion(metodo=params["method"], umbral=params["threshold"])
+            text_result = f"Matriz de Correlación calculada. Consulte el gráfico interactivo.\n\n{text_result_corr}" if plot else text_result_corr
+            title = "Análisis de Correlación"
+        
+        elif analysis_type == "dist":
+            analyzer = AnalizadorExploratorio(self.dataset)
+            var = params["var"]
+            task.progreso(10, "Distribución...")
+            plot, plot_info_text = analyzer.plot_distribucion(var)
+            task.progreso(60, "Tabla de frecuencias...")
+            freq_text, freq_df = analyzer.get_distribucion_frecuencias(var)
             
-            elif analysis_type == "corr":
-                analyzer = AnalizadorExploratorio(self.data)
-                plot, text_result_corr = analyzer.plot_correlacion()
-                text_result = f"Matriz de Correlación calculada. Consulte el gráfico interactivo.\n\n{text_result_corr}"
-                title = "Análisis de Correlación"
+            text_result = f"{plot_info_text}\n\n{freq_text}"
+            data_table = freq_df # This will be either categorical freq or binned numeric freq
+            title = f"Distribución de '{var}'"
+
+        elif analysis_type == "regr":
+            analyzer = AnalizadorRegresion(self.dataset)
+            fit_progress = task.subrango(0, 80, "Ajuste y diagnósticos...")
+            text_result_full, results_obj = analyzer.ejecutar_regresion(
+                params["y_var"], list(params["x_vars"]),
+                progress_callback=lambda done, total: fit_progress(100 * done / max(total, 1)))
+            task.comprobar()
+            task.progreso(80, "Gráficos de diagnóstico...")
+            plot = analyzer.plot_diagnosticos_regresion()
+            title = "Análisis de Regresión Múltiple"
+            text_result = text_result_full
             
-            elif analysis_type == "dist":
-                analyzer = AnalizadorExploratorio(self.data)
-                var = self.exp_var_combo.get()
-                if not var:
-                    raise ValueError("Selecciona una variable para el análisis de distribución.")
-                
-                plot, plot_info_text = analyzer.plot_distribucion(var)
-                freq_text, freq_df = analyzer.get_distribucion_frecuencias(var)
-                
-                text_result = f"{plot_info_text}\n\n{freq_text}"
-                data_table = freq_df # This will be either categorical freq or binned numeric freq
-                title = f"Distribución de '{var}'"
-
-            elif analysis_type == "regr":
-                analyzer = AnalizadorRegresion(self.data)
-                y_var = self.reg_y_combo.get()
-                x_vars_indices = self.reg_x_listbox.curselection()
-                x_vars = [self.reg_x_listbox.get(i) for i in x_vars_indices]
-                if not y_var:
-                    raise ValueError("Debes seleccionar la variable dependiente (Y).")
-                if not x_vars:
-                    raise ValueError("Debes seleccionar al menos una variable independiente (X).")
-                
-                text_result_full, results_obj = analyzer.ejecutar_regresion(y_var, x_vars)
-                plot = analyzer.plot_diagnosticos_regresion()
-                title = "Análisis de Regresión Múltiple"
-                text_result = text_result_full
-                
-                # Prepare coefficients table for PDF export
-                if results_obj:
-                    params_df = results_obj.params.to_frame(name='Coeficiente')
-                    params_df['Std Error'] = results_obj.bse
-                    params_df['t Value'] = results_obj.tvalues
-                    params_df['P > |t|'] = results_obj.pvalues
-                    params_df['[0.025'] = results_obj.conf_int()[0]
-                    params_df['0.975]'] = results_obj.conf_int()[1]
-                    data_table = params_df.round(4) # Round for better display in PDF table
-
-            elif analysis_type == "arima":
-                analyzer = AnalizadorSeriesTiempo(self.data)
-                time_var = self.ts_time_combo.get()
-                target_var = self.ts_target_combo.get()
-                
-                # Validate inputs for ARIMA order and steps
-                try:
-                    p = int(self.p_entry.get())
-                    d = int(self.d_entry.get())
-                    q = int(self.q_entry.get())
-                    steps = int(self.forecast_steps_entry.get())
-                    if not all(x >= 0 for x in [p, d, q, steps]):
-                        raise ValueError("Los valores de p, d, q y pasos de pronóstico deben ser no negativos.")
-                except ValueError:
-                    raise ValueError("Por favor, introduce números enteros válidos para el orden ARIMA y los pasos de pronóstico.")
-
-                if not time_var or not target_var:
-                    raise ValueError("Selecciona las columnas de tiempo y valor objetivo para el pronóstico ARIMA.")
-                
-                text_report, ts_data_hist, forecast_df_res = analyzer.ejecutar_arima(time_var, target_var, order=(p,d,q), steps=steps)
-                plot = analyzer.plot_arima_forecast(ts_data_hist, forecast_df_res)
-                title = "Pronóstico ARIMA"
-                text_result = text_report
-                data_table = forecast_df_res.round(4) # Export forecast as a table, rounded
-
-            self.current_plot = plot
-            self.current_text_result = text_result
-            self.current_data_table = data_table # Store the DataFrame
-            self.after(0, self.update_ui_with_results, plot, text_result, title)
-
-        except Exception as e:
-            self.after(0, lambda: messagebox.showerror("Error en Análisis", f"Ocurrió un error durante el análisis: {e}"))
-            self.after(0, lambda: self.result_title.config(text="Error en Análisis")) # Reset title on error
+            # Prepare coefficients table for PDF export
+            if results_obj:
+                params_df = results_obj.params.to_frame(name='Coeficiente')
+                params_df['Std Error'] = results_obj.bse
+                params_df['t Value'] = results_obj.tvalues
+                params_df['P > |t|'] = results_obj.pvalues
+                params_df['[0.025'] = results_obj.conf_int()[0]
+                params_df['0.975]'] = results_obj.conf_int()[1]
+                data_table = params_df.round(4) # Round for better display in PDF table
+
+        elif analysis_type == "arima":
+            analyzer = AnalizadorSeriesTiempo(self.dataset)
+            task.progreso(5, "Ajustando ARIMA...")
+            text_report, ts_data_hist, forecast_df_res = analyzer.ejecutar_arima(
+                params["time_var"], params["target_var"], order=params.get("order"), steps=params["steps"],
+                auto=params["auto"], criterio=params.get("criterion", 'aic'),
+                progress_callback=lambda done, total, best: task.progreso(5 + 85 * done / max(total, 1),
+                                                                          f"Buscando orden ARIMA: {done}/{total}" + (f" - mejor: {best}" if best else "")),
+                cancel_event=task.cancel_event)
+            task.progreso(90, "Gráfico del pronóstico...")
+            plot = analyzer.plot_arima_forecast(ts_data_hist, forecast_df_res)
+            title = "Pronóstico ARIMA"
+            text_result = text_report
+            data_table = forecast_df_res.round(4) # Export forecast as a table, rounded
+
+        elif analysis_type == "arima_batch":
+            analyzer = AnalizadorSeriesTiempo(self.dataset)
+            start = time.perf_counter()
+            forecasts, failures = analyzer.pronosticar_por_grupo(
+                params["time_var"], params["target_var"], params["id_var"], order=params["order"], steps=params["steps"],
+                progress_callback=lambda done, total: task.progreso(90 * done / max(total, 1), f"Pronosticando series: {done}/{total}"),
+                cancel_event=task.cancel_event)
+            elapsed = time.perf_counter() - start
+            n_series = forecasts.index.get_level_values('ID').nunique()
+            plot = analyzer.plot_pronosticos_grupos(forecasts)
+            title = "Pronóstico por Grupos"
+            text_result = (
+                f"--- Pronóstico por Grupos ({params['id_var']}), ARIMA{params['order']} ---\n"
+                f"Series pronosticadas: {n_series} en {elapsed:.1f} s ({n_series / elapsed * 60 if elapsed else 0:.0f} series/min)\n"
+                f"Series con error: {len(failures)}\n"
+            )
+            if failures:
+                text_result += "\n".join(f"  {key}: {error}" for key, error in failures[:20]) + "\n"
+            text_result += f"\n{forecasts.head(50).to_string()}"
+            data_table = forecasts.round(4)
+
+        task.comprobar() # Don't cache the result of a job cancelled while it finished
+        self.result_cache.guardar(cache_key, (plot, text_result, title, data_table))
+        task.progreso(100, "Mostrando resultados...")
+        return plot, text_result, title, data_table
+
+    def _update_analysis_progress(self, pct, stage):
+        self.analysis_progress['value'] = pct
+        self.analysis_status_label.config(text=f"{stage} {pct:.0f}%" if stage else f"{pct:.0f}%")
+
+    def _on_analysis_error(self, error_msg):
+        self._reset_analysis_progress()
+        messagebox.showerror("Error en Análisis", f"Ocurrió un error durante el análisis: {error_msg}")
+        self.result_title.config(text="Error en Análisis") # Reset title on error
+
+    def _on_analysis_cancelled(self, message):
+        self._reset_analysis_progress()
+        self.result_title.config(text="Análisis cancelado")
+        self.analysis_status_label.config(text=message)
+
+    def _reset_analysis_progress(self):
+        # Another job may still be running on the pool; its next event refills the bar
+        self.analysis_progress['value'] = 0
+        self.analysis_status_label.config(text="")
+
+    def cancel_analysis(self):
+        if not self.scheduler.cancelar():
+            self.analysis_status_label.config(text="No hay análisis en curso.")
+
+    def on_closing(self):
+        if self.load_cancel_event is not None:
+            self.load_cancel_event.set()
+        self.scheduler.cerrar()
+        self.destroy()
+
+    def _apply_analysis_results(self, plot, text_result, title, data_table):
+        if not len(self.scheduler):
+            self._reset_analysis_progress()
+        self.current_plot = plot
+        self.current_text_result = text_result
+        self.current_data_table = data_table # Store the DataFrame
+        self._update_cache_label()
+        self.update_ui_with_results(plot, text_result, title)
+
+    def _update_cache_label(self):
+        cache = self.result_cache
+        self.cache_label.config(text=f"Caché: {cache.hits} aciertos / {cache.misses} fallos\n"
+                                     f"{len(cache)} resultados, {cache.memoria / 1024 ** 2:.1f} MB")
+
+    def _toggle_cache_persistence(self):
+        self.result_cache.directorio = self.cache_dir if self.persist_cache_var.get() else None
 
     def update_ui_with_results(self, plot, text_result, title):
         active_view_frame = self.views[self.current_view_name_str]
@@ -886,34 +3162,22 @@ class DataSuiteApp(tk.Tk):
         active_view_frame.text_widget.delete(1.0, tk.END)
         active_view_frame.text_widget.insert(tk.END, text_result)
 
-        # Clear plot frame
-        for widget in active_view_frame.plot_widget_frame.winfo_children():
-            widget.destroy()
-
         if plot:
-            # Save as temporary HTML and open in browser for full interactivity
-            temp_dir = os.path.join(os.getcwd(), "temp_plots")
-            os.makedirs(temp_dir, exist_ok=True)
-            path = os.path.join(temp_dir, f"interactive_plot_{self.current_view_name_str}.html")
-            plot.write_html(path, auto_open=False) # Do not auto_open here, we'll open it with webbrowser
-
-            # Display a message and a button to open in browser
-            plot_frame = active_view_frame.plot_widget_frame
-            tk.Label(plot_frame, text="El gráfico interactivo se ha generado y está listo para abrir en tu navegador.", font=self.label_font, fg="white", bg="#1f2833").pack(pady=20)
-            tk.Label(plot_frame, text="Haz clic en el botón de abajo para explorarlo:", font=self.label_font, fg="white", bg="#1f2833").pack()
-            
-            open_button = ttk.Button(plot_frame, text="Abrir Gráfico en Navegador", command=lambda: webbrowser.open('file://' + os.path.abspath(path)), style="TButton")
-            open_button.pack(pady=10)
-
-            # Style for the new ttk.Button (defined here to ensure it's applied)
-            style = ttk.Style()
-            style.configure("TButton", font=self.button_font, background="#45a29e", foreground="white", borderwidth=0, relief="flat", padding=10)
-            style.map("TButton", background=[("active", "#66fcf1")], foreground=[("active", "black")])
-
+            # Drawn in-app on the view's persistent canvas; the browser version is written only on request
+            active_view_frame.plot_canvas.mostrar(plot)
         else:
-            plot_frame = active_view_frame.plot_widget_frame
-            tk.Label(plot_frame, text="No hay un gráfico interactivo disponible para este análisis o no se pudo generar.", font=self.label_font, fg="white", bg="#1f2833").pack(pady=20)
+            active_view_frame.plot_canvas.limpiar()
 
+    def open_plot_in_browser(self):
+        if self.current_plot is None:
+            messagebox.showwarning("Sin Gráfico", "No hay gráfico interactivo disponible.")
+            return
+        # plotly.js is written once next to the pages ('directory'), so each page is only a few KB
+        temp_dir = os.path.join(os.getcwd(), "temp_plots")
+        os.makedirs(temp_dir, exist_ok=True)
+        path = os.path.join(temp_dir, f"interactive_plot_{self.current_view_name_str}.html")
+        self.current_plot.write_html(path, include_plotlyjs='directory', auto_open=False)
+        webbrowser.open('file://' + os.path.abspath(path))
 
     def export_pdf(self):
         if not self.current_text_result and self.current_data_table is None:
@@ -924,62 +3188,35 @@ class DataSuiteApp(tk.Tk):
         if not file_path:
             return
 
+        # Snapshot what is on screen now; the report is built in a worker
+        title = self.result_title['text']
+        self.load_progress['value'] = 0
+        self.load_status_label.config(text="Generando PDF...")
+        thread = threading.Thread(target=self._export_pdf_worker,
+                                  args=(file_path, title, self.current_text_result, self.current_data_table), daemon=True)
+        thread.start()
+
+    def _export_pdf_worker(self, file_path, title, text_result, data_table):
         try:
-            doc = SimpleDocTemplate(file_path, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-            styles = getSampleStyleSheet()
-            story = []
+            self.pdf_report.construir(file_path, title, text_result, data_table,
+                                      progress_callback=lambda pct: self.after(0, self._update_pdf_progress, pct))
+            self.after(0, self._on_pdf_exported, file_path)
+        except Exception as e:
+            self.after(0, self._on_pdf_export_error, str(e))
 
-            # Add a title
-            story.append(Paragraph(f"<b>Reporte de Análisis: {self.result_title['text']}</b>", styles['h1']))
-            story.append(Spacer(1, 0.2 * inch))
+    def _update_pdf_progress(self, pct):
+        self.load_progress['value'] = pct
+        self.load_status_label.config(text=f"Generando PDF... {pct:.0f}%")
 
-            # Add the text result
-            if self.current_text_result:
-                story.append(Paragraph("<b>Resultados Detallados y Resumen:</b>", styles['h2']))
-                # Use a monospace font for preformatted text like summaries
-                code_style = styles['Code']
-                code_style.fontSize = 8 # Smaller font for dense output
-                code_style.leading = 9 # Line spacing
-                # Replace newline characters with <br/> for ReportLab's Paragraph to interpret them
-                story.append(Paragraph(self.current_text_result.replace('\n', '<br/>'), code_style))
-                story.append(Spacer(1, 0.2 * inch))
-
-            # Add the DataFrame as a table if available
-            if self.current_data_table is not None and not self.current_data_table.empty:
-                story.append(Paragraph("<b>Tabla de Datos Adicional:</b>", styles['h2']))
-                # Prepare data for ReportLab table, including index as the first column
-                # Convert DataFrame to list of lists, ensuring all elements are strings for consistency in PDF
-                data_to_export = [self.current_data_table.columns.insert(0, self.current_data_table.index.name if self.current_data_table.index.name else 'Index').tolist()] # Header
-                
-                for index, row in self.current_data_table.iterrows():
-                    # Format float values to a consistent precision, convert everything to string
-                    formatted_row = [f"{x:.4f}" if isinstance(x, (float, np.float_)) else str(x) for x in row.tolist()]
-                    data_to_export.append([str(index)] + formatted_row)
-                
-                table = Table(data_to_export)
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#45a29e")), # Header background
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke), # Header text color
-                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'), # Header text alignment
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor("#34495e")), # Body background
-                    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor("#1f2833")), # Grid lines
-                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.white), # Body text color
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('LEFTPADDING', (0,0), (-1,-1), 5),
-                    ('RIGHTPADDING', (0,0), (-1,-1), 5),
-                    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'), # Align index column left
-                    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'), # Align numeric data right
-                ]))
-                story.append(table)
-                story.append(Spacer(1, 0.2 * inch))
-
-            doc.build(story)
-            messagebox.showinfo("Éxito", f"Reporte PDF guardado exitosamente en:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Error de Exportación", f"No se pudo guardar el PDF: {e}")
+    def _on_pdf_exported(self, file_path):
+        self.load_progress['value'] = 100
+        self.load_status_label.config(text="PDF generado")
+        messagebox.showinfo("Éxito", f"Reporte PDF guardado exitosamente en:\n{file_path}")
+
+    def _on_pdf_export_error(self, error_msg):
+        self.load_progress['value'] = 0
+        self.load_status_label.config(text="")
+        messagebox.showerror("Error de Exportación", f"No se pudo guardar el PDF: {error_msg}")
 
     def export_plot(self):
         if self.current_plot is None:
@@ -997,14 +3234,18 @@ class DataSuiteApp(tk.Tk):
         if path:
             try:
                 if path.endswith(".html"):
-                    self.current_plot.write_html(path, auto_open=False)
-                elif path.endswith(".png"):
-                    self.current_plot.write_image(path, scale=2) # Higher resolution
-                elif path.endswith(".jpeg") or path.endswith(".jpg"):
-                    self.current_plot.write_image(path, scale=2, format='jpeg') # Explicitly set format for JPEG
+                    # References a plotly.min.js written once in the same folder
+                    self.current_plot.write_html(path, include_plotlyjs='directory', auto_open=False)
+                else:
+                    # PNG/JPEG drawn with Matplotlib (Agg) in a worker thread, no kaleido needed
+                    self.static_exporter.exportar(
+                        self.current_plot, path,
+                        al_terminar=lambda saved: self.after(0, lambda: messagebox.showinfo("Éxito", f"Gráfico guardado exitosamente en:\n{saved}")),
+                        al_fallar=lambda error: self.after(0, lambda: messagebox.showerror("Error de Exportación", f"No se pudo guardar el gráfico: {error}")))
+                    return
                 messagebox.showinfo("Éxito", f"Gráfico guardado exitosamente en:\n{path}")
             except Exception as e:
-                messagebox.showerror("Error de Exportación", f"No se pudo guardar el gráfico. Asegúrate de tener 'kaleido' instalado para exportar PNG/JPEG: {e}\n(pip install kaleido)")
+                messagebox.showerror("Error de Exportación", f"No se pudo guardar el gráfico: {e}")
 
 if __name__ == "__main__":
     app = DataSuiteApp()
@@ -4,22 +4,225 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError: # Opcional: sin pyarrow la caché columnar de datos queda desactivada
+    pa = feather = None
 import statsmodels.api as sm
-from statsmodels.stats.outliers_influence import variance_inflation_factor
 from scipy import stats
+import numpy as np
 import threading
+import os
+import json
+import hashlib
 from PIL import Image, ImageTk
 
 # --- Módulo de Análisis Estadístico Integrado ---
 # He creado esta clase para que el script sea autocontenido.
 # Utiliza statsmodels para un análisis robusto.
 
+class CalculadorVIF:
+    """
+    Calcula los VIF a partir de la matriz de correlación R de los predictores:
+    VIF_j = [R^-1]_jj, es decir, una sola factorización en lugar de una
+    regresión auxiliar por variable.
+    """
+    LIMITE_CONDICION = 1e12 # Por encima de este VIF la inversa por Cholesky deja de ser fiable
+
+    @classmethod
+    def desde_correlacion(cls, correlacion):
+        corr = np.array(correlacion, dtype=np.float64)
+        vif = np.full(corr.shape[0], np.inf)
+        # Una variable sin varianza es colineal con el intercepto
+        validas = np.isfinite(np.diag(corr)) & (np.abs(np.diag(corr) - 1) < 1e-8)
+        if not validas.any():
+            return vif
+        sub = corr[np.ix_(validas, validas)]
+        try:
+            l_inv = np.linalg.inv(np.linalg.cholesky(sub))
+            valores = (l_inv ** 2).sum(axis=0) # diag(R^-1) = suma por columnas de (L^-1)^2
+            if np.isfinite(valores).all() and valores.max() < cls.LIMITE_CONDICION:
+                vif[validas] = valores
+                return vif
+        except np.linalg.LinAlgError:
+            pass
+        vif[validas] = cls._desde_autovalores(sub)
+        return vif
+
+    @staticmethod
+    def _desde_autovalores(corr):
+        """Respaldo para matrices casi singulares: las variables que cargan en una dirección nula reciben VIF infinito."""
+        autovalores, autovectores = np.linalg.eigh(corr)
+        nulos = autovalores <= autovalores.max() * 1e-10
+        cargas = autovectores ** 2
+        vif = (cargas[:, ~nulos] / autovalores[~nulos]).sum(axis=1)
+        vif[cargas[:, nulos].sum(axis=1) > 1e-8] = np.inf
+        return vif
+
+class PruebaNormalidad:
+    """
+    Elige la prueba de normalidad de los residuos según el tamaño de la muestra,
+    con los mismos umbrales que DiagnosticosRegresion en modelos.py: Shapiro-Wilk
+    pierde precisión por encima de 5.000 observaciones y con millones de filas
+    cualquier desviación resulta "significativa".
+    """
+    MAX_ANDERSON = 5_000 # Anderson-Darling hasta aquí
+    MAX_DAGOSTINO = 100_000 # D'Agostino K^2 hasta aquí; por encima, Jarque-Bera + K-S sobre una muestra
+
+    @staticmethod
+    def _pvalor_anderson(a2, n):
+        """Aproximación del p-valor de D'Agostino y Stephens (1986), con media y varianza estimadas."""
+        a = a2 * (1 + 0.75 / n + 2.25 / n ** 2)
+        if a >= 0.6:
+            return np.exp(1.2937 - 5.709 * a + 0.0186 * a ** 2)
+        if a >= 0.34:
+            return np.exp(0.9177 - 4.279 * a - 1.38 * a ** 2)
+        if a >= 0.2:
+            return 1 - np.exp(-8.318 + 42.796 * a - 59.938 * a ** 2)
+        return 1 - np.exp(-13.436 + 101.14 * a - 223.73 * a ** 2)
+
+    @classmethod
+    def evaluar(cls, resid, tamano_muestra=5_000, semilla=0):
+        resid = np.asarray(resid, dtype=np.float64)
+        n = len(resid)
+        if n < 8:
+            raise ValueError(f"Se necesitan al menos 8 residuos (hay {n}).")
+        if n <= cls.MAX_ANDERSON:
+            z = np.sort((resid - resid.mean()) / resid.std(ddof=1))
+            pesos = 2 * np.arange(1, n + 1) - 1
+            a2 = -n - (pesos * (stats.norm.logcdf(z) + stats.norm.logsf(z[::-1]))).sum() / n
+            return {'prueba': "Anderson-Darling", 'estadistico': a2, 'p_valor': cls._pvalor_anderson(a2, n)}
+        if n <= cls.MAX_DAGOSTINO:
+            resultado = stats.normaltest(resid)
+            return {'prueba': "D'Agostino K²", 'estadistico': resultado.statistic, 'p_valor': resultado.pvalue}
+        jb = stats.jarque_bera(resid)
+        rng = np.random.default_rng(semilla)
+        muestra = resid[rng.choice(n, tamano_muestra, replace=False)]
+        ks = stats.kstest((muestra - muestra.mean()) / muestra.std(ddof=1), 'norm')
+        return {'prueba': "Jarque-Bera + Kolmogorov-Smirnov", 'estadistico': jb.statistic, 'p_valor': jb.pvalue,
+                'ks_estadistico': ks.statistic, 'ks_p_valor': ks.pvalue, 'ks_muestra': len(muestra)}
+
+class CacheColumnar:
+    """
+    Copia columnar en disco de los conjuntos de datos cargados. La primera
+    carga completa de un archivo se escribe en Feather (Arrow IPC) sin
+    compresión y en un único lote, y un manifiesto JSON la asocia con la ruta,
+    la fecha de modificación y el tamaño del original. Las cargas siguientes
+    mapean ese archivo en memoria: las columnas numéricas llegan sin copia y
+    solo se leen del disco las páginas de las columnas que un análisis usa.
+    Las entradas se separan por una etiqueta `formato` que indica cómo tipó el
+    cargador el DataFrame, para que las aplicaciones que comparten el directorio
+    nunca lean copias con tipos distintos a los suyos.
+    """
+    def __init__(self, directorio, formato):
+        self.directorio = directorio
+        self.formato = formato # Manifiesto y nombres de archivo propios de cada formato
+        self._lock = threading.Lock()
+
+    def _ruta_manifiesto(self):
+        return os.path.join(self.directorio, f"manifiesto_{self.formato}.json")
+
+    def _leer_manifiesto(self):
+        try:
+            with open(self._ruta_manifiesto(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_manifiesto(self, manifiesto):
+        # Se escribe en un temporal y se renombra: un corte nunca deja el manifiesto a medias
+        temporal = self._ruta_manifiesto() + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=1)
+        os.replace(temporal, self._ruta_manifiesto())
+
+    @staticmethod
+    def _firma(ruta):
+        info = os.stat(ruta)
+        return {'mtime_ns': info.st_mtime_ns, 'tamano': info.st_size}
+
+    def entrada(self, ruta):
+        """Entrada del manifiesto de `ruta` si su caché sigue vigente (misma fecha y tamaño), o None."""
+        if feather is None:
+            return None
+        ruta = os.path.abspath(ruta)
+        try:
+            firma = self._firma(ruta)
+        except OSError:
+            return None
+        with self._lock:
+            entrada = self._leer_manifiesto().get(ruta)
+        if entrada is None or any(entrada.get(k) != v for k, v in firma.items()):
+            return None
+        if not os.path.exists(os.path.join(self.directorio, entrada['archivo'])):
+            return None
+        return entrada
+
+    @staticmethod
+    def _tabla_arrow(df):
+        """Tabla Arrow de un solo bloque por columna; las columnas numéricas conservan NaN como valor para leerse sin copia."""
+        arrays = []
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'iuf':
+                arrays.append(pa.array(serie.to_numpy()))
+            else:
+                arrays.append(pa.array(serie, from_pandas=True))
+        return pa.table(arrays, names=list(df.columns))
+
+    def escribir(self, ruta, df, **metadatos):
+        """Guarda `df` como contenido de `ruta`. Devuelve False si el DataFrame no se puede almacenar."""
+        if feather is None:
+            return False
+        if not all(isinstance(col, str) for col in df.columns):
+            return False # Feather exige nombres de columna de texto; otros no volverían iguales
+        ruta = os.path.abspath(ruta)
+        try:
+            firma = self._firma(ruta)
+            archivo = hashlib.sha1(repr((self.formato, ruta, firma['mtime_ns'], firma['tamano'])).encode()).hexdigest() + ".feather"
+            os.makedirs(self.directorio, exist_ok=True)
+            destino = os.path.join(self.directorio, archivo)
+            # Un único lote: una columna troceada no pasa a pandas sin copiarse
+            feather.write_feather(self._tabla_arrow(df), destino + ".tmp", compression='uncompressed', chunksize=max(len(df), 1))
+            os.replace(destino + ".tmp", destino)
+            with self._lock:
+                manifiesto = self._leer_manifiesto()
+                anterior = manifiesto.get(ruta)
+                manifiesto[ruta] = dict(firma, archivo=archivo, filas=len(df), columnas=list(df.columns), **metadatos)
+                self._guardar_manifiesto(manifiesto)
+            if anterior and anterior.get('archivo') != archivo:
+                try:
+                    os.remove(os.path.join(self.directorio, anterior['archivo'])) # Caché de una versión anterior del archivo
+                except OSError:
+                    pass # Aún mapeado por un DataFrame abierto (Windows); se limpiará en otra ejecución
+            return True
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            return False
+
+    def leer(self, ruta, columnas=None):
+        """
+        Mapea en memoria el DataFrame guardado de `ruta`, o solo `columnas` (se omiten las que no existan).
+        Devuelve (DataFrame, entrada del manifiesto), o None si no hay caché vigente.
+        """
+        entrada = self.entrada(ruta)
+        if entrada is None:
+            return None
+        if columnas is not None:
+            columnas = [col for col in columnas if col in entrada['columnas']]
+        try:
+            tabla = feather.read_table(os.path.join(self.directorio, entrada['archivo']), columns=columnas, memory_map=True)
+            return tabla.to_pandas(split_blocks=True), entrada
+        except (OSError, pa.ArrowException):
+            return None # Caché ilegible: se vuelve a leer el original
+
 class AnalizadorEstadistico:
     """
     Clase para realizar un análisis de regresión lineal múltiple,
     verificación de supuestos y generación de resultados y gráficos.
     """
-    def __init__(self):
+    def __init__(self, cache=None):
+        self.cache = cache # CacheColumnar; None lee siempre el archivo original
         self.data = None
         self.dependiente = None
         self.independientes = None
@@ -31,13 +234,20 @@ class AnalizadorEstadistico:
         if not (archivo and dependiente and independientes):
             raise ValueError("Archivo, variable dependiente e independientes son requeridos.")
             
-        try:
-            if archivo.endswith('.csv'):
-                self.data = pd.read_csv(archivo)
-            else:
-                self.data = pd.read_excel(archivo)
-        except Exception as e:
-            raise IOError(f"Error al leer el archivo: {e}")
+        # Con caché vigente solo se mapean las columnas del modelo, sin volver a leer el CSV o el Excel
+        guardado = self.cache.leer(archivo, columnas=[dependiente] + independientes) if self.cache else None
+        if guardado is not None:
+            self.data = guardado[0]
+        else:
+            try:
+                if archivo.endswith('.csv'):
+                    self.data = pd.read_csv(archivo)
+                else:
+                    self.data = pd.read_excel(archivo)
+            except Exception as e:
+                raise IOError(f"Error al leer el archivo: {e}")
+            if self.cache:
+                self.cache.escribir(archivo, self.data)
 
         self.dependiente = dependiente
         self.independientes = independientes
@@ -79,15 +289,14 @@ class AnalizadorEstadistico:
 
     def _generar_texto_supuestos(self):
         """Genera un reporte de texto con la verificación de supuestos."""
-        X_for_vif = sm.add_constant(self.data[self.independientes])
-        
-        # 1. Multicolinealidad (VIF)
+        # 1. Multicolinealidad (VIF), todos a la vez desde la inversa de la matriz de correlación
+        X = self.data[self.independientes]
         vif_data = pd.DataFrame()
-        vif_data["Variable"] = X_for_vif.columns
-        vif_data["VIF"] = [variance_inflation_factor(X_for_vif.values, i) for i in range(X_for_vif.shape[1])]
+        vif_data["Variable"] = X.columns
+        vif_data["VIF"] = CalculadorVIF.desde_correlacion(X.corr().to_numpy())
         
-        # 2. Normalidad de los residuos (Shapiro-Wilk)
-        shapiro_test = stats.shapiro(self.resultados.resid)
+        # 2. Normalidad de los residuos (prueba elegida según el tamaño de la muestra)
+        normalidad = PruebaNormalidad.evaluar(self.resultados.resid)
         
         # 3. Homocedasticidad (Breusch-Pagan)
         bp_test = sm.stats.het_breuschpagan(self.resultados.resid, self.resultados.model.exog)
@@ -101,8 +310,11 @@ class AnalizadorEstadistico:
         reporte += "   (Valores > 5 o 10 pueden indicar un problema)\n"
         reporte += vif_data.to_string(index=False) + "\n\n"
         reporte += "-"*40 + "\n"
-        reporte += "2. Normalidad de los Residuos (Test de Shapiro-Wilk):\n"
-        reporte += f"   Estadístico W: {shapiro_test.statistic:.4f}, p-valor: {shapiro_test.pvalue:.4f}\n"
+        reporte += f"2. Normalidad de los Residuos (Test de {normalidad['prueba']}):\n"
+        reporte += f"   Estadístico: {normalidad['estadistico']:.4f}, p-valor: {normalidad['p_valor']:.4f}\n"
+        if 'ks_p_valor' in normalidad:
+            reporte += (f"   K-S sobre una muestra de {normalidad['ks_muestra']}: "
+                        f"D = {normalidad['ks_estadistico']:.4f}, p-valor: {normalidad['ks_p_valor']:.4f}\n")
         reporte += "   (Si p > 0.05, los residuos se distribuyen normalmente)\n\n"
         reporte += "-"*40 + "\n"
         reporte += "3. Homocedasticidad (Test de Breusch-Pagan):\n"
@@ -165,7 +377,7 @@ class InterfazEstadistica:
     def __init__(self, root):
         self.root = root
         self.root.title("Analizador Estadístico de Regresión Múltiple")
-        self.analizador = AnalizadorEstadistico()
+        self.analizador = AnalizadorEstadistico(cache=CacheColumnar(os.path.join(os.getcwd(), "dataset_cache"), "crudo"))
         self.canvas_supuestos = None
         self.canvas_dispersion = None
 
@@ -282,12 +494,14 @@ class InterfazEstadistica:
         
         # Cargar columnas en los widgets de selección
         try:
-            if archivo.endswith('.csv'):
-                df = pd.read_csv(archivo, nrows=1)
+            entrada = self.analizador.cache.entrada(archivo) if self.analizador.cache else None
+            if entrada is not None:
+                columnas = entrada['columnas'] # Del manifiesto: el Excel no se vuelve a abrir
+            elif archivo.endswith('.csv'):
+                columnas = pd.read_csv(archivo, nrows=1).columns.tolist()
             else:
-                df = pd.read_excel(archivo, nrows=1)
-            
-            columnas = df.columns.tolist()
+                columnas = pd.read_excel(archivo, nrows=1).columns.tolist()
+
             self.combo_dependiente['values'] = columnas
             self.listbox_independientes.delete(0, tk.END)
             for col in columnas:
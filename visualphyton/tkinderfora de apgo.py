@@ -5,7 +5,10 @@ import json
 import os
 import hashlib
 import uuid
+import sqlite3
 from collections import defaultdict
+import bisect
+import itertools
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
@@ -517,6 +520,528 @@ class LoginWindow:
         """Ejecuta la ventana de login"""
         self.window.mainloop()
 
+class FinanceStore:
+    """
+    Almacén transaccional de los datos de un usuario sobre SQLite en modo WAL.
+    Cada alta, edición o baja escribe solo su fila (y el balance) en una
+    transacción, en lugar de reescribir todo el historial en JSON.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS balances (
+            username TEXT PRIMARY KEY,
+            balance REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            description TEXT,
+            category TEXT,
+            amount REAL NOT NULL,
+            original_amount REAL,
+            account TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (username, date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (username, category, date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (username, type, date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions (username, account, date);
+        CREATE TABLE IF NOT EXISTS budgets (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            category TEXT NOT NULL,
+            budgeted_amount REAL NOT NULL,
+            period TEXT NOT NULL,
+            start_date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_budgets_user ON budgets (username);
+        CREATE TABLE IF NOT EXISTS goals (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            name TEXT NOT NULL,
+            target_amount REAL NOT NULL,
+            saved_amount REAL NOT NULL DEFAULT 0,
+            due_date TEXT NOT NULL,
+            created_date TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (username);
+        CREATE TABLE IF NOT EXISTS migrations (
+            username TEXT PRIMARY KEY,
+            source TEXT,
+            migrated_at TEXT NOT NULL
+        );
+    """
+    TRANSACTION_FIELDS = ("id", "date", "type", "description", "category", "amount", "original_amount", "account")
+    BUDGET_FIELDS = ("id", "category", "budgeted_amount", "period", "start_date")
+    GOAL_FIELDS = ("id", "name", "target_amount", "saved_amount", "due_date", "created_date")
+
+    def __init__(self, username, db_path="finanzas.db"):
+        self.username = username
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL") # Escrituras por anexado al log, lecturas sin bloqueo
+        self.conn.execute("PRAGMA synchronous=NORMAL") # Seguro con WAL: un corte solo puede perder la última transacción
+        with self.conn:
+            self.conn.executescript(self.SCHEMA)
+            self.conn.execute("INSERT OR IGNORE INTO balances (username, balance) VALUES (?, 0)", (username,))
+
+    def _insert(self, table, fields, item, verb="INSERT"):
+        columns = ", ".join(("username",) + fields)
+        placeholders = ", ".join("?" * (len(fields) + 1))
+        self.conn.execute(f"{verb} INTO {table} ({columns}) VALUES ({placeholders})",
+                          (self.username,) + tuple(item.get(field) for field in fields))
+
+    def _adjust_balance(self, delta):
+        self.conn.execute("UPDATE balances SET balance = balance + ? WHERE username = ?", (delta, self.username))
+
+    def _rows(self, table, order_by):
+        cursor = self.conn.execute(f"SELECT * FROM {table} WHERE username = ? ORDER BY {order_by}", (self.username,))
+        # Las columnas sin valor (p. ej. original_amount en datos antiguos) no aparecen en el diccionario
+        return [{key: row[key] for key in row.keys() if key != "username" and row[key] is not None} for row in cursor]
+
+    def migrate_json(self, json_path):
+        """Importa una sola vez el archivo JSON anterior del usuario. Devuelve True si migró datos."""
+        if self.conn.execute("SELECT 1 FROM migrations WHERE username = ?", (self.username,)).fetchone():
+            return False
+        data = {}
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # Sin registrar la migración: si el archivo se repara se importará en la próxima carga
+                return False
+        with self.conn: # Todo o nada: una migración interrumpida se repite completa
+            for table, fields, key in (("transactions", self.TRANSACTION_FIELDS, 'transactions'),
+                                       ("budgets", self.BUDGET_FIELDS, 'budgets'),
+                                       ("goals", self.GOAL_FIELDS, 'goals')):
+                for item in data.get(key, []):
+                    item.setdefault('id', str(uuid.uuid4()))
+                    self._insert(table, fields, item, verb="INSERT OR REPLACE")
+            self.conn.execute("UPDATE balances SET balance = ? WHERE username = ?", (data.get('balance', 0.0), self.username))
+            self.conn.execute("INSERT INTO migrations (username, source, migrated_at) VALUES (?, ?, ?)",
+                              (self.username, json_path if data else None, datetime.now().isoformat()))
+        return bool(data)
+
+    def load(self):
+        """Devuelve (balance, transacciones, presupuestos) del usuario."""
+        row = self.conn.execute("SELECT balance FROM balances WHERE username = ?", (self.username,)).fetchone()
+        balance = row["balance"] if row else 0.0
+        return balance, self._rows("transactions", "date, rowid"), self._rows("budgets", "rowid")
+
+    def add_transaction(self, transaction):
+        with self.conn:
+            self._insert("transactions", self.TRANSACTION_FIELDS, transaction)
+            self._adjust_balance(transaction['amount'])
+
+    def update_transaction(self, transaction, balance_delta):
+        """Reescribe la fila de `transaction` y ajusta el balance en `balance_delta`."""
+        fields = self.TRANSACTION_FIELDS[1:]
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self.conn:
+            self.conn.execute(f"UPDATE transactions SET {assignments} WHERE id = ? AND username = ?",
+                              tuple(transaction.get(field) for field in fields) + (transaction['id'], self.username))
+            self._adjust_balance(balance_delta)
+
+    def delete_transaction(self, transaction):
+        with self.conn:
+            self.conn.execute("DELETE FROM transactions WHERE id = ? AND username = ?", (transaction['id'], self.username))
+            self._adjust_balance(-transaction['amount'])
+
+    def add_budget(self, budget):
+        with self.conn:
+            self._insert("budgets", self.BUDGET_FIELDS, budget)
+
+    def delete_budget(self, budget_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM budgets WHERE id = ? AND username = ?", (budget_id, self.username))
+
+    def close(self):
+        self.conn.close()
+
+
+
+class TransactionLedger:
+    """
+    Índice en memoria de las transacciones por (categoría, tipo).
+    Cada grupo guarda sus fechas ordenadas y las sumas acumuladas de los importes,
+    así el total de cualquier intervalo son dos búsquedas binarias y una resta.
+    """
+    def __init__(self, transactions=()):
+        self.rebuild(transactions)
+
+    def rebuild(self, transactions):
+        """Reconstruye el índice completo; las fechas se analizan una sola vez aquí."""
+        self._entries = {} # id -> (clave, fecha, importe) para poder quitar o editar sin volver a analizar
+        self._dates = defaultdict(list)
+        self._amounts = defaultdict(list)
+        self._prefix = {}
+        for trans in sorted(transactions, key=lambda t: t['date']):
+            key, date, amount = self._entry(trans)
+            self._entries[trans['id']] = (key, date, amount)
+            self._dates[key].append(date)
+            self._amounts[key].append(amount)
+
+    @staticmethod
+    def _entry(trans):
+        return (trans['category'], trans['type']), datetime.fromisoformat(trans['date']), abs(trans['amount'])
+
+    def add(self, trans):
+        key, date, amount = self._entry(trans)
+        self._entries[trans['id']] = (key, date, amount)
+        index = bisect.bisect_right(self._dates[key], date)
+        self._dates[key].insert(index, date)
+        self._amounts[key].insert(index, amount)
+        self._prefix.pop(key, None) # Las sumas de este grupo se recalculan en la próxima consulta
+
+    def remove(self, trans):
+        entry = self._entries.pop(trans['id'], None)
+        if entry is None:
+            return
+        key, date, amount = entry
+        dates, amounts = self._dates[key], self._amounts[key]
+        index = bisect.bisect_left(dates, date)
+        while amounts[index] != amount: # Varias transacciones con la misma fecha
+            index += 1
+        del dates[index], amounts[index]
+        self._prefix.pop(key, None)
+
+    def update(self, trans):
+        """Reindexa una transacción editada en su lugar."""
+        self.remove(trans)
+        self.add(trans)
+
+    def total(self, category, trans_type, start, end):
+        """Suma de los importes (en valor absoluto) de la categoría y tipo con fecha en [start, end]."""
+        key = (category, trans_type)
+        dates = self._dates.get(key)
+        if not dates:
+            return 0.0
+        prefix = self._prefix.get(key)
+        if prefix is None:
+            prefix = self._prefix[key] = [0.0, *itertools.accumulate(self._amounts[key])]
+        return prefix[bisect.bisect_right(dates, end)] - prefix[bisect.bisect_left(dates, start)]
+
+
+class AggregationCube:
+    """
+    Agregados de las transacciones en arreglos NumPy de día × categoría × cuenta × tipo
+    (importe neto y número de movimientos). Se actualiza en su lugar con cada cambio;
+    los meses y años se obtienen reduciendo el eje de días, sin volver a recorrer el historial.
+    """
+    FIELDS = ('category', 'account', 'type') # Ejes 1, 2 y 3 del cubo
+    MIN_YEAR = 1970 # Rango de fechas aceptado: de MIN_YEAR al año actual + MAX_YEARS_AHEAD
+    MAX_YEARS_AHEAD = 10
+
+    def __init__(self, transactions=()):
+        self.rebuild(transactions)
+
+    @classmethod
+    def date_range_error(cls, date):
+        """Mensaje de error si `date` cae fuera del rango aceptado, o None."""
+        last_year = datetime.now().year + cls.MAX_YEARS_AHEAD
+        if cls.MIN_YEAR <= date.year <= last_year:
+            return None
+        return f"La fecha debe estar entre {cls.MIN_YEAR} y {last_year}."
+
+    @classmethod
+    def _day(cls, trans):
+        """Ordinal del día; una fecha fuera de rango (datos antiguos) se acota al extremo más cercano."""
+        day = datetime.fromisoformat(trans['date']).toordinal()
+        first = datetime(cls.MIN_YEAR, 1, 1).toordinal()
+        last = datetime(datetime.now().year + cls.MAX_YEARS_AHEAD, 12, 31).toordinal()
+        return min(max(day, first), last)
+
+    def rebuild(self, transactions):
+        """Reconstruye el cubo completo con una sola pasada vectorizada."""
+        transactions = list(transactions)
+        self.labels = tuple({} for _ in self.FIELDS) # Por eje: etiqueta -> índice
+        self.first_day = 0 # Ordinal del primer día con datos
+        self.n_days = 0
+        self._offset = 0 # Posición de first_day en el búfer
+        self._amounts = np.zeros((0, 0, 0, 0)) # Búferes con holgura en todos los ejes
+        self._counts = np.zeros((0, 0, 0, 0), dtype=np.int64)
+        if not transactions:
+            return
+        days = np.array([self._day(t) for t in transactions])
+        cells = [np.array([labels.setdefault(t[field], len(labels)) for t in transactions])
+                 for labels, field in zip(self.labels, self.FIELDS)]
+        self._reserve(int(days.min()), int(days.max()))
+        index = (days - self.first_day + self._offset, *cells)
+        np.add.at(self._amounts, index, np.array([t['amount'] for t in transactions], dtype=float))
+        np.add.at(self._counts, index, 1)
+
+    def _used(self):
+        return (slice(self._offset, self._offset + self.n_days),) + tuple(slice(0, len(labels)) for labels in self.labels)
+
+    @property
+    def amounts(self):
+        """Vista de la parte ocupada del búfer: días con datos × etiquetas conocidas."""
+        return self._amounts[self._used()]
+
+    @property
+    def counts(self):
+        return self._counts[self._used()]
+
+    def _reserve(self, first, last):
+        """
+        Asegura lugar para los días [first, last] y todas las etiquetas. Al ampliar, la
+        capacidad de cada eje que crece al menos se duplica (los días por el lado que
+        crece), así que agregar movimientos del día no copia el cubo en cada alta.
+        """
+        before = 0
+        if self.n_days:
+            before = max(0, self.first_day - first)
+            first, last = min(first, self.first_day), max(last, self.first_day + self.n_days - 1)
+        span = last - first + 1
+        sizes = tuple(len(labels) for labels in self.labels)
+        capacity = self._amounts.shape
+        if (self._offset >= before and self._offset - before + span <= capacity[0]
+                and all(size <= cap for size, cap in zip(sizes, capacity[1:]))):
+            self._offset -= before
+        else:
+            slack = max(span, 32)
+            offset = slack if before else 0 # La holgura de días va hacia el lado que crece
+            shape = (span + slack,) + tuple(cap if size <= cap else max(size, 2 * cap) for size, cap in zip(sizes, capacity[1:]))
+            amounts, counts = np.zeros(shape), np.zeros(shape, dtype=np.int64)
+            if self.n_days:
+                old = (slice(self._offset, self._offset + self.n_days),) + tuple(slice(0, cap) for cap in capacity[1:])
+                new = (slice(offset + before, offset + before + self.n_days),) + tuple(slice(0, cap) for cap in capacity[1:])
+                amounts[new], counts[new] = self._amounts[old], self._counts[old]
+            self._amounts, self._counts, self._offset = amounts, counts, offset
+        self.first_day, self.n_days = first, span
+
+    def _cell(self, trans):
+        """Posición de la transacción en el cubo; amplía los búferes si la fecha o una etiqueta no caben."""
+        day = self._day(trans)
+        cell = [labels.setdefault(trans[field], len(labels)) for labels, field in zip(self.labels, self.FIELDS)]
+        self._reserve(day, day)
+        return (day - self.first_day, *cell)
+
+    def add(self, trans, sign=1):
+        cell = self._cell(trans)
+        self.amounts[cell] += sign * trans['amount']
+        self.counts[cell] += sign
+
+    def remove(self, trans):
+        self.add(trans, sign=-1)
+
+    def update(self, trans, previous):
+        self.remove(previous)
+        self.add(trans)
+
+    def _days(self):
+        if not self.amounts.shape[0]:
+            return np.array([], dtype='datetime64[D]')
+        start = np.datetime64(datetime.fromordinal(self.first_day).date(), 'D')
+        return start + np.arange(self.amounts.shape[0])
+
+    def _by_type(self, trans_type):
+        """Importes y conteos día × categoría × cuenta de un tipo (o de todos)."""
+        if trans_type is None:
+            return self.amounts.sum(axis=3), self.counts.sum(axis=3)
+        index = self.labels[2].get(trans_type)
+        if index is None:
+            return np.zeros(self.amounts.shape[:3]), np.zeros(self.counts.shape[:3], dtype=np.int64)
+        return self.amounts[..., index], self.counts[..., index]
+
+    def daily_balance(self):
+        """Fechas con movimientos y balance acumulado al cierre de cada una."""
+        balances = np.cumsum(self.amounts.sum(axis=(1, 2, 3)))
+        present = self.counts.sum(axis=(1, 2, 3)) > 0
+        return self._days()[present], balances[present]
+
+    def totals(self, field, trans_type=None):
+        """Suma por categoría o cuenta (`field`), solo de las etiquetas con movimientos."""
+        axis = self.FIELDS.index(field)
+        amounts, counts = self._by_type(trans_type)
+        other = (0, 2 - axis) # Días y el otro eje de etiquetas
+        sums, present = amounts.sum(axis=other), counts.sum(axis=other) > 0
+        return {label: float(sums[i]) for label, i in self.labels[axis].items() if present[i]}
+
+    def by_period(self, unit, trans_type=None):
+        """Suma por mes ('M') o año ('Y') de los períodos con movimientos: (etiquetas, sumas)."""
+        if not self.amounts.shape[0]:
+            return [], np.zeros(0)
+        amounts, _ = self._by_type(trans_type)
+        periods, starts = np.unique(self._days().astype(f'datetime64[{unit}]'), return_index=True)
+        sums = np.add.reduceat(amounts.sum(axis=(1, 2)), starts)
+        present = np.add.reduceat(self.counts.sum(axis=(1, 2, 3)), starts) > 0
+        return [str(period) for period in periods[present]], sums[present]
+
+
+class ChangeNotifier:
+    """
+    Publica los cambios de datos (altas, ediciones y bajas) a las vistas suscritas,
+    para que cada vista se actualice solo cuando cambian sus entradas.
+    """
+    TRANSACTION_ADDED = "transaction_added"
+    TRANSACTION_UPDATED = "transaction_updated"
+    TRANSACTION_DELETED = "transaction_deleted"
+    BUDGET_ADDED = "budget_added"
+    BUDGET_DELETED = "budget_deleted"
+    TRANSACTION_EVENTS = (TRANSACTION_ADDED, TRANSACTION_UPDATED, TRANSACTION_DELETED)
+    BUDGET_EVENTS = (BUDGET_ADDED, BUDGET_DELETED)
+
+    def __init__(self):
+        self._subscribers = defaultdict(list)
+
+    def subscribe(self, events, callback):
+        """`callback(event, item, previous)` se llama con cada evento de `events`."""
+        for event in events:
+            self._subscribers[event].append(callback)
+
+    def notify(self, event, item, previous=None):
+        """`previous` es la copia del elemento antes de una edición."""
+        for callback in self._subscribers[event]:
+            callback(event, item, previous)
+
+
+class VirtualTreeview:
+    """
+    Lista virtual sobre un ttk.Treeview: mantiene un índice ordenado (y filtrado) de
+    los elementos y solo materializa en el widget las filas que caben en pantalla.
+    El desplazamiento, la ordenación por columna y el filtro trabajan sobre el índice.
+    """
+    def __init__(self, tree, scrollbar, row_builder, sort_keys, sort_column, reverse=False):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_builder = row_builder # elemento -> (valores, tags)
+        self.sort_keys = sort_keys # columna -> función clave
+        self.sort_column = sort_column
+        self.reverse = reverse
+        self.filter_text = ""
+        self.items = {} # id -> elemento
+        self._search_text = {} # id -> texto en minúsculas para el filtro
+        self._keys = [] # claves ordenadas de la vista
+        self._rows = [] # elementos de la vista, en el mismo orden que _keys
+        self.start = 0 # primera posición visible
+        self.visible = 20 # filas que caben en el widget
+        self._shown = [] # iids materializados, en orden
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self._on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel)
+        for column in sort_keys:
+            tree.heading(column, command=lambda c=column: self.sort_by(c))
+        self._update_headings()
+
+    def _key(self, item):
+        return (self.sort_keys[self.sort_column](item), item['id'])
+
+    def _matches(self, item):
+        if not self.filter_text:
+            return True
+        text = self._search_text.get(item['id'])
+        if text is None:
+            values, _ = self.row_builder(item)
+            text = self._search_text[item['id']] = " ".join(str(value) for value in values).lower()
+        return self.filter_text in text
+
+    def _rebuild(self):
+        rows = sorted((item for item in self.items.values() if self._matches(item)), key=self._key)
+        self._rows = rows
+        self._keys = [self._key(item) for item in rows]
+        self.render()
+
+    def set_items(self, items):
+        """Reemplaza todos los elementos y reconstruye el índice."""
+        self.items = {item['id']: item for item in items}
+        self._search_text.clear()
+        self._rebuild()
+
+    def add(self, item, render=True):
+        self.items[item['id']] = item
+        if self._matches(item):
+            key = self._key(item)
+            index = bisect.bisect_left(self._keys, key)
+            self._keys.insert(index, key)
+            self._rows.insert(index, item)
+        if render:
+            self.render()
+
+    def remove(self, item, previous=None, render=True):
+        """Quita `item` del índice; `previous` es su copia antes de editarlo, si cambió."""
+        old = previous or item
+        self.items.pop(item['id'], None)
+        self._search_text.pop(item['id'], None)
+        key = self._key(old)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index], self._rows[index]
+        if render:
+            self.render()
+
+    def update(self, item, previous):
+        self.remove(item, previous, render=False)
+        self.add(item)
+
+    def sort_by(self, column):
+        """Ordena por `column`; un segundo clic en la misma columna invierte el orden."""
+        self.reverse = not self.reverse if column == self.sort_column else False
+        self.sort_column = column
+        self._update_headings()
+        self._rebuild()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().lower()
+        self.start = 0
+        self._rebuild()
+
+    def _update_headings(self):
+        for column in self.sort_keys:
+            arrow = (" ▼" if self.reverse else " ▲") if column == self.sort_column else ""
+            self.tree.heading(column, text=column + arrow)
+
+    def _row_at(self, position):
+        return self._rows[len(self._rows) - 1 - position if self.reverse else position]
+
+    def render(self):
+        """Materializa solo la ventana visible reutilizando las filas que ya estaban en el widget."""
+        total = len(self._rows)
+        self.start = max(0, min(self.start, total - self.visible))
+        window = [self._row_at(position) for position in range(self.start, min(self.start + self.visible, total))]
+        wanted = {item['id'] for item in window}
+        for iid in self._shown:
+            if iid not in wanted and self.tree.exists(iid):
+                self.tree.delete(iid)
+        for index, item in enumerate(window):
+            values, tags = self.row_builder(item)
+            if self.tree.exists(item['id']):
+                self.tree.item(item['id'], values=values, tags=tags)
+                self.tree.move(item['id'], "", index)
+            else:
+                self.tree.insert("", index, iid=item['id'], values=values, tags=tags)
+        self._shown = [item['id'] for item in window]
+        if total:
+            self.scrollbar.set(self.start / total, min(1.0, (self.start + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Comando de la barra de desplazamiento ('moveto' fracción o 'scroll' n unidades/páginas)."""
+        if args[0] == "moveto":
+            self.start = int(float(args[1]) * len(self._rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.start += step * self.visible if args[2] == "pages" else step
+        self.render()
+
+    def _on_wheel(self, event):
+        direction = -1 if event.num == 4 or event.delta > 0 else 1
+        self.yview("scroll", direction * 3, "units")
+        return "break"
+
+    def _on_resize(self, event):
+        style = ttk.Style()
+        row_height = int(style.lookup(self.tree.cget("style") or "Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - 30) // row_height) # Descontar la fila de encabezados
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+
 class FinanceManager(tk.Tk):
     """
     Gestor de Finanzas Personales Avanzado con autenticación
@@ -537,9 +1062,18 @@ class FinanceManager(tk.Tk):
             "Gastos": ["Alimentación", "Transporte", "Entretenimiento", "Servicios", "Salud", "Educación", "Otros"]
         }
         self.accounts = ["Efectivo", "Banco Principal", "Banco Secundario", "Tarjeta de Crédito", "Ahorros"]
+        self.store = None # FinanceStore del usuario actual
+        self.ledger = TransactionLedger() # Índice de gastos por categoría para los presupuestos
+        self.cube = AggregationCube() # Agregados por día, categoría, cuenta y tipo para los gráficos
+        self.events = ChangeNotifier()
+        self.chart_tabs = {} # Pestaña del notebook -> gráfico que contiene
+        self.stale_charts = set() # Gráficos cuyas transacciones cambiaron desde el último dibujo
+        self.chart_refresh_pending = False
+        self.transaction_filter_job = None # Filtro de transacciones pendiente (se aplica al dejar de teclear)
 
         self.setup_styles()
         self.create_main_interface()
+        self.subscribe_views()
         self.load_user_data()
         self.update_displays()
 
@@ -676,6 +1210,7 @@ class FinanceManager(tk.Tk):
         """Crea la pestaña de resumen (dashboard)"""
         dashboard_frame = ttk.Frame(self.notebook, style='Dark.TFrame')
         self.notebook.add(dashboard_frame, text="📊 Resumen")
+        self.chart_tabs[str(dashboard_frame)] = "trend"
 
         # Balance Actual
         balance_card = ttk.Frame(dashboard_frame, style='Card.TFrame', padding=20)
@@ -774,17 +1309,22 @@ class FinanceManager(tk.Tk):
         ttk.Label(transactions_frame, text="Historial de Transacciones",
                   style='Subtitle.TLabel').pack(pady=(10, 5), padx=20, anchor='w')
 
-        self.transactions_tree = ttk.Treeview(transactions_frame,
+        filter_frame = ttk.Frame(transactions_frame, style='Dark.TFrame')
+        filter_frame.pack(padx=20, fill='x')
+        ttk.Label(filter_frame, text="Filtrar:", style='Dark.TLabel').pack(side='left')
+        self.transaction_filter = ttk.Entry(filter_frame, style='Dark.TEntry', width=40)
+        self.transaction_filter.pack(side='left', padx=(10, 0))
+        self.transaction_filter.bind("<KeyRelease>", self.schedule_transaction_filter)
+
+        tree_frame = ttk.Frame(transactions_frame, style='Dark.TFrame')
+        tree_frame.pack(pady=10, padx=20, fill='both', expand=True)
+
+        self.transactions_tree = ttk.Treeview(tree_frame,
                                               columns=("Fecha", "Tipo", "Descripción", "Categoría", "Monto", "Cuenta"),
                                               show="headings", style="Dark.Treeview")
-        self.transactions_tree.pack(pady=10, padx=20, fill='both', expand=True)
-
-        self.transactions_tree.heading("Fecha", text="Fecha")
-        self.transactions_tree.heading("Tipo", text="Tipo")
-        self.transactions_tree.heading("Descripción", text="Descripción")
-        self.transactions_tree.heading("Categoría", text="Categoría")
-        self.transactions_tree.heading("Monto", text="Monto")
-        self.transactions_tree.heading("Cuenta", text="Cuenta")
+        transactions_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical')
+        transactions_scrollbar.pack(side='right', fill='y')
+        self.transactions_tree.pack(side='left', fill='both', expand=True)
 
         self.transactions_tree.column("Fecha", width=100, anchor='center')
         self.transactions_tree.column("Tipo", width=80, anchor='center')
@@ -793,6 +1333,17 @@ class FinanceManager(tk.Tk):
         self.transactions_tree.column("Monto", width=100, anchor='e')
         self.transactions_tree.column("Cuenta", width=120)
 
+        # Solo las filas visibles viven en el widget; los encabezados ordenan el índice completo
+        self.transactions_view = VirtualTreeview(
+            self.transactions_tree, transactions_scrollbar, self._transaction_row,
+            sort_keys={"Fecha": lambda t: t['date'],
+                       "Tipo": lambda t: t['type'],
+                       "Descripción": lambda t: t['description'].lower(),
+                       "Categoría": lambda t: t['category'],
+                       "Monto": lambda t: abs(t['amount']),
+                       "Cuenta": lambda t: t['account']},
+            sort_column="Fecha", reverse=True)
+
         # Botones de edición y eliminación
         action_buttons_frame = ttk.Frame(transactions_frame, style='Dark.TFrame')
         action_buttons_frame.pack(pady=(0, 10), padx=20, fill='x')
@@ -875,6 +1426,7 @@ class FinanceManager(tk.Tk):
         """Crea la pestaña de informes"""
         reports_frame = ttk.Frame(self.notebook, style='Dark.TFrame')
         self.notebook.add(reports_frame, text="📈 Informes")
+        self.chart_tabs[str(reports_frame)] = "report"
 
         # Opciones de informe
         options_frame = ttk.Frame(reports_frame, style='Card.TFrame', padding=20)
@@ -921,37 +1473,11 @@ class FinanceManager(tk.Tk):
         if not username:
             return
 
-        user_file = f"{username}_data.json"
-        if os.path.exists(user_file):
-            try:
-                with open(user_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.current_balance = data.get('balance', 0.0)
-                    self.transactions = data.get('transactions', [])
-                    self.budgets = data.get('budgets', [])
-            except:
-                self.current_balance = 0.0
-                self.transactions = []
-                self.budgets = []
-        else:
-            self.current_balance = 0.0
-            self.transactions = []
-            self.budgets = []
-
-    def save_user_data(self):
-        """Guarda los datos de transacciones y presupuestos del usuario actual"""
-        username = self.auth_manager.current_user
-        if not username:
-            return
-
-        user_file = f"{username}_data.json"
-        data = {
-            'balance': self.current_balance,
-            'transactions': self.transactions,
-            'budgets': self.budgets
-        }
-        with open(user_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self.store = FinanceStore(username)
+        self.store.migrate_json(f"{username}_data.json") # Importa el JSON anterior la primera vez
+        self.current_balance, self.transactions, self.budgets = self.store.load()
+        self.ledger.rebuild(self.transactions)
+        self.cube.rebuild(self.transactions)
 
     def update_displays(self):
         """Actualiza todos los elementos de la interfaz que muestran datos"""
@@ -961,6 +1487,35 @@ class FinanceManager(tk.Tk):
         self.plot_balance_trend()
         self.generate_report() # Regenerar informe por defecto
 
+    def subscribe_views(self):
+        """Suscribe cada vista a los eventos de datos de los que depende."""
+        self.events.subscribe(ChangeNotifier.TRANSACTION_EVENTS, self.on_transactions_changed)
+        self.events.subscribe(ChangeNotifier.TRANSACTION_EVENTS, self.on_transaction_row_changed)
+        self.events.subscribe(ChangeNotifier.TRANSACTION_EVENTS, self.on_budget_spending_changed)
+        self.events.subscribe(ChangeNotifier.TRANSACTION_EVENTS, self.mark_charts_stale)
+        self.events.subscribe(ChangeNotifier.BUDGET_EVENTS, self.on_budget_changed)
+        self.notebook.bind("<<NotebookTabChanged>>", self.refresh_visible_charts)
+
+    def on_transactions_changed(self, event, trans, previous):
+        """Actualiza la etiqueta de balance."""
+        self.balance_label.config(text=f"${self.current_balance:.2f}")
+
+    def mark_charts_stale(self, event, trans, previous):
+        """Marca los gráficos como desactualizados; se redibujan una sola vez y solo si están visibles."""
+        self.stale_charts.update(("trend", "report"))
+        if not self.chart_refresh_pending:
+            self.chart_refresh_pending = True
+            self.after_idle(self.refresh_visible_charts)
+
+    def refresh_visible_charts(self, event=None):
+        """Redibuja el gráfico de la pestaña visible si sus datos cambiaron."""
+        self.chart_refresh_pending = False
+        chart = self.chart_tabs.get(self.notebook.select())
+        if chart == "trend" and "trend" in self.stale_charts:
+            self.plot_balance_trend()
+        elif chart == "report" and "report" in self.stale_charts:
+            self.generate_report()
+
     def add_transaction(self):
         """Añade una nueva transacción a la lista"""
         description = self.transaction_description.get().strip()
@@ -984,10 +1539,15 @@ class FinanceManager(tk.Tk):
             return
 
         try:
-            transaction_date = datetime.strptime(date_str, "%d-%m-%Y").isoformat()
+            transaction_date = datetime.strptime(date_str, "%d-%m-%Y")
         except ValueError:
             messagebox.showerror("Error", "Formato de fecha inválido. Use DD-MM-AAAA.")
             return
+        date_error = AggregationCube.date_range_error(transaction_date) # Un año mal tecleado (p. ej. 0202) no entra al historial
+        if date_error:
+            messagebox.showerror("Error", date_error)
+            return
+        transaction_date = transaction_date.isoformat()
 
         if transaction_type == "Gasto":
             amount *= -1 # Los gastos son negativos
@@ -1002,37 +1562,53 @@ class FinanceManager(tk.Tk):
             "account": account
         }
 
+        self.store.add_transaction(transaction)
         self.transactions.append(transaction)
+        self.ledger.add(transaction)
+        self.cube.add(transaction)
         self.current_balance += amount
-        self.save_user_data()
-        self.update_displays()
+        self.events.notify(ChangeNotifier.TRANSACTION_ADDED, transaction)
         self.clear_transaction_form()
         messagebox.showinfo("Éxito", "Transacción añadida correctamente.")
 
     def update_transactions_tree(self):
         """Actualiza el Treeview de transacciones"""
-        for item in self.transactions_tree.get_children():
-            self.transactions_tree.delete(item)
-
-        # Ordenar transacciones por fecha descendente
-        sorted_transactions = sorted(self.transactions, key=lambda x: x['date'], reverse=True)
-
-        for trans in sorted_transactions:
-            date_fmt = datetime.fromisoformat(trans['date']).strftime("%d-%m-%Y")
-            amount_fmt = f"${trans['amount']:.2f}"
-            if trans['type'] == 'Gasto':
-                amount_fmt = f"- {amount_fmt}" # Mostrar gastos con signo negativo visible
-            else:
-                amount_fmt = f"+ {amount_fmt}"
-
-            self.transactions_tree.insert("", tk.END, iid=trans['id'],
-                                           values=(date_fmt, trans['type'], trans['description'],
-                                                   trans['category'], amount_fmt, trans['account']))
-            # Colorear filas
-            if trans['type'] == 'Gasto':
-                self.transactions_tree.tag_configure(trans['id'], foreground='#ef4444')
-            else:
-                self.transactions_tree.tag_configure(trans['id'], foreground='#10b981')
+        # Colorear filas
+        self.transactions_tree.tag_configure('expense_row', foreground='#ef4444')
+        self.transactions_tree.tag_configure('income_row', foreground='#10b981')
+
+        self.transactions_view.set_items(self.transactions)
+
+    def schedule_transaction_filter(self, event=None):
+        """Aplica el filtro cuando el usuario deja de teclear."""
+        if self.transaction_filter_job:
+            self.after_cancel(self.transaction_filter_job)
+        self.transaction_filter_job = self.after(250, self.apply_transaction_filter)
+
+    def apply_transaction_filter(self):
+        self.transaction_filter_job = None
+        self.transactions_view.set_filter(self.transaction_filter.get())
+
+    def _transaction_row(self, trans):
+        """Valores y tags de la fila de una transacción en el Treeview."""
+        date_fmt = datetime.fromisoformat(trans['date']).strftime("%d-%m-%Y")
+        amount_fmt = f"${trans['amount']:.2f}"
+        if trans['type'] == 'Gasto':
+            amount_fmt = f"- {amount_fmt}" # Mostrar gastos con signo negativo visible
+            tag_name = 'expense_row'
+        else:
+            amount_fmt = f"+ {amount_fmt}"
+            tag_name = 'income_row'
+        return (date_fmt, trans['type'], trans['description'], trans['category'], amount_fmt, trans['account']), (tag_name,)
+
+    def on_transaction_row_changed(self, event, trans, previous):
+        """Actualiza el índice de la lista virtual; solo se redibuja la ventana visible."""
+        if event == ChangeNotifier.TRANSACTION_ADDED:
+            self.transactions_view.add(trans)
+        elif event == ChangeNotifier.TRANSACTION_UPDATED:
+            self.transactions_view.update(trans, previous)
+        else:
+            self.transactions_view.remove(trans)
 
     def clear_transaction_form(self):
         """Limpia los campos del formulario de transacción"""
@@ -1062,7 +1638,7 @@ class FinanceManager(tk.Tk):
             messagebox.showwarning("Advertencia", "Por favor seleccione una transacción para editar.")
             return
 
-        transaction_id = self.transactions_tree.item(selected_item)['iid']
+        transaction_id = selected_item # El iid de cada fila es el id de la transacción
         transaction_to_edit = next((t for t in self.transactions if t['id'] == transaction_id), None)
 
         if not transaction_to_edit:
@@ -1142,13 +1718,20 @@ class FinanceManager(tk.Tk):
                 return
 
             try:
-                new_date = datetime.strptime(new_date_str, "%d-%m-%Y").isoformat()
+                new_date = datetime.strptime(new_date_str, "%d-%m-%Y")
             except ValueError:
                 messagebox.showerror("Error", "Formato de fecha inválido. Use DD-MM-AAAA.", parent=edit_window)
                 return
+            date_error = AggregationCube.date_range_error(new_date)
+            if date_error:
+                messagebox.showerror("Error", date_error, parent=edit_window)
+                return
+            new_date = new_date.isoformat()
 
             # Ajustar balance actual antes de la actualización
-            self.current_balance -= transaction['amount'] # Restar el monto viejo
+            previous = dict(transaction)
+            old_amount = transaction['amount']
+            self.current_balance -= old_amount # Restar el monto viejo
 
             if new_type == "Gasto":
                 new_amount *= -1
@@ -1161,8 +1744,10 @@ class FinanceManager(tk.Tk):
             transaction['date'] = new_date
 
             self.current_balance += new_amount # Sumar el monto nuevo
-            self.save_user_data()
-            self.update_displays()
+            self.store.update_transaction(transaction, new_amount - old_amount)
+            self.ledger.update(transaction)
+            self.cube.update(transaction, previous)
+            self.events.notify(ChangeNotifier.TRANSACTION_UPDATED, transaction, previous)
             messagebox.showinfo("Éxito", "Transacción actualizada correctamente.", parent=edit_window)
             edit_window.destroy()
 
@@ -1178,14 +1763,16 @@ class FinanceManager(tk.Tk):
 
         confirm = messagebox.askyesno("Confirmar Eliminación", "¿Está seguro de que desea eliminar esta transacción?")
         if confirm:
-            transaction_id = self.transactions_tree.item(selected_item)['iid']
+            transaction_id = selected_item
             transaction_to_delete = next((t for t in self.transactions if t['id'] == transaction_id), None)
 
             if transaction_to_delete:
+                self.store.delete_transaction(transaction_to_delete)
                 self.transactions.remove(transaction_to_delete)
+                self.ledger.remove(transaction_to_delete)
+                self.cube.remove(transaction_to_delete)
                 self.current_balance -= transaction_to_delete['amount']
-                self.save_user_data()
-                self.update_displays()
+                self.events.notify(ChangeNotifier.TRANSACTION_DELETED, transaction_to_delete)
                 messagebox.showinfo("Éxito", "Transacción eliminada correctamente.")
             else:
                 messagebox.showerror("Error", "Transacción no encontrada.")
@@ -1223,9 +1810,9 @@ class FinanceManager(tk.Tk):
             "start_date": datetime.now().isoformat() # Se asume que el presupuesto empieza hoy
         }
 
+        self.store.add_budget(budget_item)
         self.budgets.append(budget_item)
-        self.save_user_data()
-        self.update_budget_tree()
+        self.events.notify(ChangeNotifier.BUDGET_ADDED, budget_item)
         self.clear_budget_form()
         messagebox.showinfo("Éxito", "Presupuesto añadido correctamente.")
 
@@ -1234,36 +1821,52 @@ class FinanceManager(tk.Tk):
         for item in self.budget_tree.get_children():
             self.budget_tree.delete(item)
 
+        # Colorear filas según el estado
+        self.budget_tree.tag_configure('Excedido', foreground='#ef4444')
+        self.budget_tree.tag_configure('Cerca', foreground='#facc15') # Amarillo
+        self.budget_tree.tag_configure('Dentro', foreground='#10b981')
+
         for budget in self.budgets:
-            category = budget['category']
-            budgeted_amount = budget['budgeted_amount']
-            period = budget['period']
-            start_date = datetime.fromisoformat(budget['start_date'])
-
-            spent_amount = self.calculate_spent_in_period(category, start_date, period)
-            remaining_amount = budgeted_amount - spent_amount
-
-            status = "Dentro"
-            if remaining_amount < 0:
-                status = "Excedido"
-            elif remaining_amount <= budgeted_amount * 0.1: # 10% restante
-                status = "Cerca"
-
-            self.budget_tree.insert("", tk.END, iid=budget['id'],
-                                     values=(category, f"${budgeted_amount:.2f}",
-                                             f"${spent_amount:.2f}", f"${remaining_amount:.2f}",
-                                             period, status))
-            # Colorear filas según el estado
-            if status == "Excedido":
-                self.budget_tree.tag_configure(budget['id'], foreground='#ef4444')
-            elif status == "Cerca":
-                self.budget_tree.tag_configure(budget['id'], foreground='#facc15') # Amarillo
-            else:
-                self.budget_tree.tag_configure(budget['id'], foreground='#10b981')
+            values, tags = self._budget_row(budget)
+            self.budget_tree.insert("", tk.END, iid=budget['id'], tags=tags, values=values)
+
+    def _budget_row(self, budget):
+        """Valores y tags de la fila de un presupuesto; el tag es su estado."""
+        category = budget['category']
+        budgeted_amount = budget['budgeted_amount']
+        period = budget['period']
+        start_date = datetime.fromisoformat(budget['start_date'])
+
+        spent_amount = self.calculate_spent_in_period(category, start_date, period)
+        remaining_amount = budgeted_amount - spent_amount
+
+        status = "Dentro"
+        if remaining_amount < 0:
+            status = "Excedido"
+        elif remaining_amount <= budgeted_amount * 0.1: # 10% restante
+            status = "Cerca"
+
+        return (category, f"${budgeted_amount:.2f}", f"${spent_amount:.2f}", f"${remaining_amount:.2f}",
+                period, status), (status,)
+
+    def on_budget_changed(self, event, budget, previous):
+        """Inserta o quita solo la fila del presupuesto afectado."""
+        if event == ChangeNotifier.BUDGET_DELETED:
+            self.budget_tree.delete(budget['id'])
+        else:
+            values, tags = self._budget_row(budget)
+            self.budget_tree.insert("", tk.END, iid=budget['id'], tags=tags, values=values)
+
+    def on_budget_spending_changed(self, event, trans, previous):
+        """Recalcula solo los presupuestos de las categorías de gasto afectadas."""
+        categories = {t['category'] for t in (trans, previous) if t and t['type'] == 'Gasto'}
+        for budget in self.budgets:
+            if budget['category'] in categories:
+                values, tags = self._budget_row(budget)
+                self.budget_tree.item(budget['id'], values=values, tags=tags)
 
     def calculate_spent_in_period(self, category, start_date, period):
         """Calcula el monto gastado para una categoría en un período dado."""
-        spent = 0.0
         end_date = start_date # Initialize end_date to start_date
 
         if period == "Mensual":
@@ -1275,11 +1878,7 @@ class FinanceManager(tk.Tk):
         elif period == "Anual":
             end_date = start_date.replace(month=12, day=31)
 
-        for trans in self.transactions:
-            trans_date = datetime.fromisoformat(trans['date'])
-            if trans['type'] == 'Gasto' and trans['category'] == category and start_date <= trans_date <= end_date:
-                spent += abs(trans['amount']) # Sumar el valor absoluto del gasto
-        return spent
+        return self.ledger.total(category, 'Gasto', start_date, end_date)
 
     def clear_budget_form(self):
         """Limpia los campos del formulario de presupuesto"""
@@ -1296,19 +1895,20 @@ class FinanceManager(tk.Tk):
 
         confirm = messagebox.askyesno("Confirmar Eliminación", "¿Está seguro de que desea eliminar este presupuesto?")
         if confirm:
-            budget_id = self.budget_tree.item(selected_item)['iid']
+            budget_id = selected_item
             budget_to_delete = next((b for b in self.budgets if b['id'] == budget_id), None)
 
             if budget_to_delete:
+                self.store.delete_budget(budget_id)
                 self.budgets.remove(budget_to_delete)
-                self.save_user_data()
-                self.update_budget_tree()
+                self.events.notify(ChangeNotifier.BUDGET_DELETED, budget_to_delete)
                 messagebox.showinfo("Éxito", "Presupuesto eliminado correctamente.")
             else:
                 messagebox.showerror("Error", "Presupuesto no encontrado.")
 
     def plot_balance_trend(self):
         """Grafica la tendencia del balance a lo largo del tiempo."""
+        self.stale_charts.discard("trend")
         # Limpiar gráfico anterior
         self.ax.clear()
         self.ax.set_facecolor('#1e293b')
@@ -1320,18 +1920,8 @@ class FinanceManager(tk.Tk):
             self.canvas.draw()
             return
 
-        # Agrupar transacciones por fecha para calcular el balance acumulado
-        daily_balances = defaultdict(float)
-        sorted_transactions = sorted(self.transactions, key=lambda x: x['date'])
-
-        cumulative_balance = 0.0
-        for trans in sorted_transactions:
-            trans_date = datetime.fromisoformat(trans['date']).date()
-            cumulative_balance += trans['amount']
-            daily_balances[trans_date] = cumulative_balance # Solo guarda el balance final del día
-
-        dates = sorted(daily_balances.keys())
-        balances = [daily_balances[d] for d in dates]
+        # Balance al cierre de cada día: np.cumsum de los cambios diarios del cubo de agregados
+        dates, balances = self.cube.daily_balance()
 
         self.ax.plot(dates, balances, marker='o', linestyle='-', color='#3b82f6', linewidth=2)
         self.ax.set_title("Tendencia del Balance a lo Largo del Tiempo", color='#f8fafc', fontsize=14)
@@ -1345,6 +1935,7 @@ class FinanceManager(tk.Tk):
 
     def generate_report(self):
         """Genera un informe según el tipo seleccionado y lo muestra en el gráfico."""
+        self.stale_charts.discard("report")
         self.report_ax.clear()
         self.report_ax.set_facecolor('#1e293b')
         self.report_ax.tick_params(axis='x', colors='#cbd5e1')
@@ -1380,10 +1971,7 @@ class FinanceManager(tk.Tk):
 
     def _plot_expenses_by_category(self):
         """Genera un gráfico de pastel de gastos por categoría."""
-        expenses_by_category = defaultdict(float)
-        for trans in self.transactions:
-            if trans['type'] == 'Gasto':
-                expenses_by_category[trans['category']] += abs(trans['amount'])
+        expenses_by_category = {category: abs(total) for category, total in self.cube.totals('category', 'Gasto').items()}
 
         if not expenses_by_category:
             self.report_ax.text(0.5, 0.5, "No hay gastos registrados.",
@@ -1401,10 +1989,7 @@ class FinanceManager(tk.Tk):
 
     def _plot_income_by_category(self):
         """Genera un gráfico de pastel de ingresos por categoría."""
-        income_by_category = defaultdict(float)
-        for trans in self.transactions:
-            if trans['type'] == 'Ingreso':
-                income_by_category[trans['category']] += trans['amount']
+        income_by_category = self.cube.totals('category', 'Ingreso')
 
         if not income_by_category:
             self.report_ax.text(0.5, 0.5, "No hay ingresos registrados.",
@@ -1422,26 +2007,16 @@ class FinanceManager(tk.Tk):
 
     def _plot_monthly_trend(self):
         """Genera un gráfico de líneas de ingresos y gastos mensuales."""
-        monthly_data = defaultdict(lambda: {'income': 0.0, 'expenses': 0.0})
+        sorted_months, incomes = self.cube.by_period('M', 'Ingreso')
+        _, expenses = self.cube.by_period('M', 'Gasto')
+        expenses = np.abs(expenses)
 
-        for trans in self.transactions:
-            trans_date = datetime.fromisoformat(trans['date'])
-            month_year = trans_date.strftime("%Y-%m")
-            if trans['type'] == 'Ingreso':
-                monthly_data[month_year]['income'] += trans['amount']
-            elif trans['type'] == 'Gasto':
-                monthly_data[month_year]['expenses'] += abs(trans['amount'])
-
-        if not monthly_data:
+        if not sorted_months:
             self.report_ax.text(0.5, 0.5, "No hay datos mensuales para graficar.",
                                  horizontalalignment='center', verticalalignment='center',
                                  color='#cbd5e1', transform=self.report_ax.transAxes)
             return
 
-        sorted_months = sorted(monthly_data.keys())
-        incomes = [monthly_data[m]['income'] for m in sorted_months]
-        expenses = [monthly_data[m]['expenses'] for m in sorted_months]
-
         bar_width = 0.35
         r1 = np.arange(len(sorted_months))
         r2 = [x + bar_width for x in r1]
@@ -1459,21 +2034,15 @@ class FinanceManager(tk.Tk):
 
     def _plot_annual_balance(self):
         """Genera un gráfico de barras del balance anual."""
-        annual_balance = defaultdict(float)
-
-        for trans in self.transactions:
-            trans_date = datetime.fromisoformat(trans['date'])
-            year = trans_date.year
-            annual_balance[year] += trans['amount']
+        years, balances = self.cube.by_period('Y')
 
-        if not annual_balance:
+        if not years:
             self.report_ax.text(0.5, 0.5, "No hay datos anuales para graficar.",
                                  horizontalalignment='center', verticalalignment='center',
                                  color='#cbd5e1', transform=self.report_ax.transAxes)
             return
 
-        sorted_years = sorted(annual_balance.keys())
-        balances = [annual_balance[y] for y in sorted_years]
+        sorted_years = [int(year) for year in years]
 
         colors = ['#10b981' if b >= 0 else '#ef4444' for b in balances]
         self.report_ax.bar(sorted_years, balances, color=colors)
@@ -1517,6 +2086,8 @@ class FinanceManager(tk.Tk):
         confirm = messagebox.askyesno("Cerrar Sesión", "¿Está seguro de que desea cerrar sesión?")
         if confirm:
             self.auth_manager.current_user = None
+            if self.store:
+                self.store.close()
             self.destroy() # Cierra la ventana actual de FinanceManager
             # Reabre la ventana de login
             auth_manager = AuthenticationManager()